@@ -0,0 +1,177 @@
+"""
+Benchmark capture: list các bytes + b''.join() (cách cũ) so với CaptureBuffer
+cấp phát trước, và đường callback -> SPSCRingBuffer -> CaptureBuffer.
+
+Đo cho mỗi độ dài bản ghi:
+    - write: thời gian ghi trung bình mỗi chunk (µs)
+    - release: thời gian từ lúc thả phím tới khi có mảng int16 (ms)
+    - peak: bộ nhớ cấp phát thêm tối đa (tracemalloc) và peak RSS của 1 process riêng
+
+Chạy:
+    python benchmarks/bench_capture.py
+    python benchmarks/bench_capture.py --seconds 10 60 --rate 48000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio import CaptureBuffer, SPSCRingBuffer  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODES = ('list_join', 'capture_buffer', 'callback_ring')
+
+
+def source_audio(seconds: float, rate: int) -> np.ndarray:
+    # Sinh thẳng int16 (không qua float64) để không đẩy peak RSS trước khi đo
+    rng = np.random.default_rng(0)
+    return rng.integers(-4000, 4000, int(seconds * rate), dtype=np.int16)
+
+
+def record(mode: str, audio: np.ndarray, rate: int, chunk: int, seconds: float):
+    """
+    Ghi audio theo từng chunk như stream.read() rồi "thả phím"
+
+    Returns:
+        (mảng int16, tổng thời gian write (s), thời gian release (s))
+    """
+    write_time = 0.0
+    if mode == 'list_join':
+        frames = []
+        for start in range(0, len(audio), chunk):
+            data = audio[start:start + chunk].tobytes()  # stream.read() trả bytes mới
+            began = time.perf_counter()
+            frames.append(data)
+            write_time += time.perf_counter() - began
+        began = time.perf_counter()
+        result = np.frombuffer(b''.join(frames), dtype=np.int16)
+        return result, write_time, time.perf_counter() - began
+
+    buffer = CaptureBuffer(seconds, rate, extra_frames=chunk)
+    buffer.reset()
+    if mode == 'capture_buffer':
+        for start in range(0, len(audio), chunk):
+            data = audio[start:start + chunk].tobytes()
+            began = time.perf_counter()
+            buffer.write(data)
+            write_time += time.perf_counter() - began
+        began = time.perf_counter()
+        result = buffer.take()
+        return result, write_time, time.perf_counter() - began
+
+    # Callback mode: PortAudio đẩy vào ring, thread ghi âm rút ra capture buffer
+    ring = SPSCRingBuffer(rate)
+    for start in range(0, len(audio), chunk):
+        data = audio[start:start + chunk].tobytes()
+        began = time.perf_counter()
+        ring.push(np.frombuffer(data, dtype=np.int16))
+        buffer.write(ring.pop(chunk))
+        write_time += time.perf_counter() - began
+    began = time.perf_counter()
+    remaining = ring.pop(ring.available())
+    if len(remaining):
+        buffer.write(remaining)
+    result = buffer.take()
+    return result, write_time, time.perf_counter() - began
+
+
+def measure(mode: str, seconds: float, rate: int, chunk: int, repeats: int) -> dict:
+    audio = source_audio(seconds, rate)
+    chunks = -(-len(audio) // chunk)
+
+    writes, releases = [], []
+    for _ in range(repeats):
+        result, write_time, release_time = record(mode, audio, rate, chunk, seconds)
+        assert np.array_equal(result, audio)
+        writes.append(write_time / chunks)
+        releases.append(release_time)
+        del result
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    result = record(mode, audio, rate, chunk, seconds)[0]
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    del result
+
+    return {
+        'mode': mode,
+        'seconds': seconds,
+        'write_us': 1e6 * float(np.median(writes)),
+        'release_ms': 1e3 * float(np.median(releases)),
+        'traced_peak_mb': peak / 1e6
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS của process hiện tại (None nếu hệ điều hành không hỗ trợ)"""
+    # Linux: ru_maxrss được giữ qua execve (process con thừa hưởng peak của cha),
+    # VmHWM thì tính riêng cho không gian địa chỉ hiện tại
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1e3
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1e6 if sys.platform == 'darwin' else peak / 1e3  # macOS: byte, Linux: KB
+
+
+def child(mode: str, seconds: float, rate: int, chunk: int):
+    """Chạy 1 lần ghi trong process riêng để peak RSS không lẫn giữa các mode"""
+    audio = source_audio(seconds, rate)
+    before = peak_rss_mb()
+    result = record(mode, audio, rate, chunk, seconds)[0]
+    after = peak_rss_mb()
+    del result
+    print(json.dumps({'rss_mb': None if before is None else after - before}))
+
+
+def isolated_rss(mode: str, seconds: float, rate: int, chunk: int) -> float:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', mode,
+         '--seconds', str(seconds), '--rate', str(rate), '--chunk', str(chunk)],
+        check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])['rss_mb']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, nargs='+', default=[5, 30, 120])
+    parser.add_argument('--rate', type=int, default=22050)
+    parser.add_argument('--chunk', type=int, default=1024)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.seconds[0], args.rate, args.chunk)
+        return
+
+    print(f"[BENCH] Capture {args.rate}Hz, chunk {args.chunk}, median of {args.repeats}")
+    print(f"{'mode':<16}{'seconds':>8}{'write µs':>10}{'release ms':>12}{'traced MB':>11}{'RSS MB':>9}")
+    for seconds in args.seconds:
+        for mode in MODES:
+            row = measure(mode, seconds, args.rate, args.chunk, args.repeats)
+            rss = isolated_rss(mode, seconds, args.rate, args.chunk)
+            rss_text = 'n/a' if rss is None else f"{rss:.1f}"
+            print(f"{mode:<16}{seconds:>8g}{row['write_us']:>10.2f}{row['release_ms']:>12.3f}"
+                  f"{row['traced_peak_mb']:>11.2f}{rss_text:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark high-pass RC: vòng lặp Python từng sample (cách cũ trong
+_enhance_audio) so với highpass_rc vector hóa và RCHighPassFilter theo chunk
+(đường streaming / EnhancementPipeline).
+
+Mỗi độ dài clip in thời gian (ms), tốc độ so với vòng lặp và sai số lớn nhất
+so với vòng lặp (tương đối theo biên độ tín hiệu).
+
+Chạy:
+    python benchmarks/bench_highpass.py
+    python benchmarks/bench_highpass.py --seconds 1 10 60 --rate 48000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio import RCHighPassFilter, highpass_rc  # noqa: E402
+
+ALPHA = 0.97
+CHUNK = 1024
+
+
+def loop_highpass(audio_float: np.ndarray, alpha: float = ALPHA) -> np.ndarray:
+    """Cài đặt cũ (nguyên văn từ _enhance_audio)"""
+    filtered = np.zeros_like(audio_float)
+    filtered[0] = audio_float[0]
+    for i in range(1, len(audio_float)):
+        filtered[i] = alpha * (filtered[i-1] + audio_float[i] - audio_float[i-1])
+    return filtered
+
+
+def chunked_highpass(audio_float: np.ndarray, alpha: float = ALPHA) -> np.ndarray:
+    highpass = RCHighPassFilter(alpha)
+    return np.concatenate([highpass.process(audio_float[start:start + CHUNK])
+                           for start in range(0, len(audio_float), CHUNK)])
+
+
+def best_time(run, repeats: int):
+    """(thời gian nhanh nhất (s), kết quả lần cuối)"""
+    best, result = None, None
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, nargs='+', default=[1, 5, 30, 120])
+    parser.add_argument('--rate', type=int, default=22050)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"[BENCH] High-pass RC alpha={ALPHA}, {args.rate}Hz, best of {args.repeats} "
+          f"(vòng lặp: 1 lần)")
+    print(f"{'seconds':>8}{'method':>12}{'ms':>11}{'speedup':>10}{'max err':>11}")
+    for seconds in args.seconds:
+        n = int(seconds * args.rate)
+        t = np.arange(n) / args.rate
+        audio_float = (8000 * np.sin(2 * np.pi * 220 * t) + 2000 + rng.normal(0, 500, n)).astype(np.float32)
+
+        loop_time, reference = best_time(lambda: loop_highpass(audio_float), 1)
+        scale = float(np.max(np.abs(reference)))
+        rows = [('loop', loop_time, reference)]
+        for name, run in (('vectorized', lambda: highpass_rc(audio_float, ALPHA)),
+                          ('chunked', lambda: chunked_highpass(audio_float))):
+            elapsed, result = best_time(run, args.repeats)
+            rows.append((name, elapsed, result))
+
+        for name, elapsed, result in rows:
+            error = float(np.max(np.abs(result.astype(np.float64) - reference))) / scale
+            print(f"{seconds:>8g}{name:>12}{1e3 * elapsed:>11.2f}{loop_time / elapsed:>9.0f}x{error:>11.1e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark giảm nhiễu: SpectralNoiseReducer (STFT spectral subtraction) theo
+frame size, so với noise gate biên độ cũ, trên 1 core.
+
+Mỗi dòng in thời gian xử lý tính theo ms cho mỗi giây audio và SNR trước/sau
+(tín hiệu giả lập: âm hữu thanh ngắt quãng + nhiễu trắng). Thoát với mã 1 nếu
+cấu hình nào vượt --budget-ms.
+
+Chạy:
+    python benchmarks/bench_noise_reduction.py
+    python benchmarks/bench_noise_reduction.py --frame-sizes 512 --rate 48000 --budget-ms 10
+"""
+import os
+
+# 1 core: đặt trước khi import NumPy để BLAS / FFT không dùng thêm thread
+for _name in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+    os.environ.setdefault(_name, '1')
+
+import argparse  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio import EnhancementPipeline, SpectralNoiseReducer  # noqa: E402
+
+
+def noisy_speech(seconds: float, rate: int, noise: float):
+    """(clean, noisy) float32 - âm hữu thanh bật/tắt mỗi 0.5s"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    voiced = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 12))
+    clean = 0.3 * voiced / np.abs(voiced).max() * (np.sin(2 * np.pi * 1.0 * t) > 0)
+    noisy = clean + rng.normal(0, noise, len(t))
+    return clean.astype(np.float32), noisy.astype(np.float32)
+
+
+def snr_db(clean: np.ndarray, signal: np.ndarray) -> float:
+    error = signal.astype(np.float64) - clean
+    return 10 * np.log10(np.sum(clean.astype(np.float64) ** 2) / np.sum(error ** 2))
+
+
+def best_time(run, repeats: int):
+    best, result = None, None
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def gate(pipeline: EnhancementPipeline, noisy: np.ndarray) -> np.ndarray:
+    """Noise gate biên độ cũ (noise_reduction_method = "gate")"""
+    work = noisy.copy()
+    pipeline.reduce_noise_inplace(work)
+    return work
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frame-sizes', type=int, nargs='+', default=[256, 512, 1024, 2048])
+    parser.add_argument('--rate', type=int, default=16000)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--noise', type=float, default=0.03, help="Độ lệch chuẩn nhiễu trắng (biên độ 0..1)")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=10.0,
+                        help="Giới hạn ms xử lý cho mỗi giây audio")
+    args = parser.parse_args()
+
+    clean, noisy = noisy_speech(args.seconds, args.rate, args.noise)
+    print(f"[BENCH] Noise reduction {args.seconds:g}s @ {args.rate}Hz, best of {args.repeats}, "
+          f"budget {args.budget_ms:g} ms/s, SNR vào {snr_db(clean, noisy):.1f} dB")
+    print(f"{'method':<16}{'ms/s':>9}{'SNR dB':>9}{'':>6}")
+
+    cases = [(f"stft {size}", lambda size=size: SpectralNoiseReducer(frame_size=size).reduce(noisy))
+             for size in args.frame_sizes]
+    pipeline = EnhancementPipeline({'noise_reduction_method': 'gate'})
+    cases.append(('gate (cũ)', lambda: gate(pipeline, noisy)))
+
+    over_budget = False
+    for name, run in cases:
+        elapsed, result = best_time(run, args.repeats)
+        per_second = 1e3 * elapsed / args.seconds
+        status = ''
+        if name.startswith('stft'):
+            status = 'OK' if per_second <= args.budget_ms else 'OVER'
+            over_budget |= per_second > args.budget_ms
+        print(f"{name:<16}{per_second:>9.2f}{snr_db(clean, result):>9.1f}{status:>6}")
+
+    if over_budget:
+        print(f"[WARNING] Vượt ngân sách {args.budget_ms:g} ms mỗi giây audio")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
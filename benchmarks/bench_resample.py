@@ -0,0 +1,89 @@
+"""
+Benchmark PolyphaseResampler: các tần số thu âm thường gặp -> 16kHz, tính
+theo ms CPU cho mỗi giây audio, resample cả clip lúc thả phím so với theo
+chunk (như khi resample ngay trong lúc ghi).
+
+Theo chunk: mỗi chunk dài bội số của `down` sample (để sample đầu ra rơi
+đúng lưới) và kèm thêm ngữ cảnh mỗi bên đủ phủ bộ lọc, nên kết quả ghép lại
+trùng với resample cả clip (cột max err, đơn vị LSB) - phần ngữ cảnh lặp lại
+là chi phí thêm của cách này. Với up lớn (22050/44100 -> 16000, up = 320/160)
+mỗi lần process() lặp qua `up` lớp đồng dư mà mỗi lớp chỉ còn vài hàng, nên
+chunk nhỏ chậm hơn cả clip hàng chục lần; 48000 -> 16000 (up = 1) chỉ chậm ~2
+lần do phần ngữ cảnh.
+
+Chạy:
+    python benchmarks/bench_resample.py
+    python benchmarks/bench_resample.py --rates 22050 48000 --seconds 60 --chunk 4096
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio import PolyphaseResampler  # noqa: E402
+
+DST_RATE = 16000
+
+
+def chunked_resample(resampler: PolyphaseResampler, audio: np.ndarray, chunk: int) -> np.ndarray:
+    """Resample từng chunk kèm ngữ cảnh 2 bên, ghép phần đầu ra của chunk"""
+    down, up = resampler.down, resampler.up
+    step = max(chunk // down, 1) * down
+    context = -(-resampler.taps_per_phase // down) * down
+    out = np.empty(resampler.output_length(len(audio)), dtype=np.float32)
+    written = 0
+    for start in range(0, len(audio), step):
+        end = min(start + step, len(audio))
+        begin = max(start - context, 0)
+        block = resampler.process(audio[begin:end + context])
+        offset = (start - begin) // down * up
+        count = resampler.output_length(end - start)
+        out[written:written + count] = block[offset:offset + count]
+        written += count
+    return out
+
+
+def best_time(run, repeats: int):
+    """(thời gian nhanh nhất (s), kết quả lần cuối)"""
+    best, result = None, None
+    for _ in range(repeats):
+        began = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - began
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', type=int, nargs='+', default=[22050, 44100, 48000])
+    parser.add_argument('--seconds', type=float, default=30.0)
+    parser.add_argument('--chunk', type=int, default=1024, help="Số sample mỗi chunk ở tần số gốc")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"[BENCH] Resample -> {DST_RATE}Hz, {args.seconds:g}s clip, chunk ~{args.chunk}, "
+          f"best of {args.repeats}")
+    print(f"{'rate':>7}{'up/down':>10}{'taps':>6}{'method':>9}{'ms total':>10}{'ms / s':>9}{'max err':>9}")
+    for rate in args.rates:
+        resampler = PolyphaseResampler(rate, DST_RATE)
+        n = int(args.seconds * rate)
+        t = np.arange(n) / rate
+        audio = (6000 * np.sin(2 * np.pi * 220 * t) + rng.normal(0, 500, n)).astype(np.int16)
+
+        whole_time, whole = best_time(lambda: resampler.process(audio), args.repeats)
+        chunk_time, chunked = best_time(lambda: chunked_resample(resampler, audio, args.chunk), args.repeats)
+        ratio = f"{resampler.up}/{resampler.down}"
+        for name, elapsed, result in (('whole', whole_time, whole), ('chunked', chunk_time, chunked)):
+            error = float(np.max(np.abs(result - whole)))
+            print(f"{rate:>7}{ratio:>10}{resampler.taps_per_phase:>6}{name:>9}"
+                  f"{1e3 * elapsed:>10.2f}{1e3 * elapsed / args.seconds:>9.3f}{error:>9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark nhận dạng theo đoạn: độ trễ từ lúc thả phím tới khi có kết quả khi
+các đoạn đã được gửi trong lúc ghi (SegmentedTranscription + VAD thật), so
+với gửi cả clip sau khi thả phím.
+
+STT được thay bằng hàm giả có chi phí cố định + tỉ lệ theo độ dài audio
+(--stt-base-ms, --stt-ms-per-second); bản ghi giả lập là các câu nói 1.5-3.5s
+xen khoảng dừng 0.7s, phát lại nhanh hơn thời gian thực (--speedup).
+
+Chạy:
+    python benchmarks/bench_segmented.py
+    python benchmarks/bench_segmented.py --clips 10 60 --stt-base-ms 300
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio.vad import VoiceActivityDetector  # noqa: E402
+from src.core.segmented import SegmentedTranscription  # noqa: E402
+
+SR = 16000
+CHUNK = 1024
+
+
+def synthetic_take(seconds: float, rng) -> np.ndarray:
+    """Các câu nói (âm hữu thanh, f0 dao động) xen khoảng dừng 0.7s"""
+    def speech(length):
+        t = np.arange(int(length * SR)) / SR
+        phase = 2 * np.pi * np.cumsum(140 + 20 * np.sin(2 * np.pi * 3 * t)) / SR
+        x = sum(np.sin(k * phase) / k for k in range(1, 8))
+        return x * (0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)) * 3000
+
+    pieces, total = [], 0.0
+    while total < seconds:
+        length = min(rng.uniform(1.5, 3.5), seconds - total)
+        pieces += [speech(length), rng.normal(0, 30, int(0.7 * SR))]
+        total += length + 0.7
+    return np.concatenate(pieces).astype(np.int16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clips', type=float, nargs='+', default=[5, 15, 30])
+    parser.add_argument('--stt-base-ms', type=float, default=200.0)
+    parser.add_argument('--stt-ms-per-second', type=float, default=20.0)
+    parser.add_argument('--min-segment-seconds', type=float, default=6.0)
+    parser.add_argument('--min-pause-seconds', type=float, default=0.4)
+    parser.add_argument('--max-parallel', type=int, default=3)
+    parser.add_argument('--speedup', type=float, default=20.0, help="Phát lại nhanh hơn thời gian thực")
+    args = parser.parse_args()
+
+    def fake_stt(audio, segments):
+        time.sleep((args.stt_base_ms + args.stt_ms_per_second * len(audio) / SR) / 1000.0)
+        return f"[{len(audio) / SR:.1f}s]"
+
+    rng = np.random.default_rng(0)
+    print(f"[BENCH] Thả phím -> kết quả, STT giả {args.stt_base_ms:g}ms + "
+          f"{args.stt_ms_per_second:g}ms/s audio, {args.max_parallel} request song song")
+    print(f"{'clip s':>7}{'segments':>10}{'segmented ms':>14}{'whole clip ms':>15}")
+    for seconds in args.clips:
+        audio = synthetic_take(seconds, rng)
+        executor = ThreadPoolExecutor(args.max_parallel)
+        segmented = SegmentedTranscription(executor, fake_stt, SR, 1, args.min_segment_seconds,
+                                           args.min_pause_seconds)
+        vad = VoiceActivityDetector(SR)
+        # Ghi âm: mỗi chunk qua VAD, cắt và gửi đoạn ngay khi gặp khoảng dừng
+        for start in range(0, len(audio), CHUNK):
+            chunk = audio[start:start + CHUNK]
+            vad.process(chunk)
+            cut = segmented.plan_cut(vad)
+            if cut:
+                segmented.submit(audio[segmented.cut_sample:cut].copy(), cut, vad.segments(include_open=False))
+            time.sleep(len(chunk) / SR / args.speedup)
+
+        # Thả phím: chỉ còn phần đuôi, rồi ghép theo thứ tự
+        released = time.perf_counter()
+        fake_stt(audio[segmented.cut_sample:], None)
+        segmented.results()
+        segmented_ms = 1e3 * (time.perf_counter() - released)
+        executor.shutdown()
+
+        released = time.perf_counter()
+        fake_stt(audio, None)
+        whole_ms = 1e3 * (time.perf_counter() - released)
+        print(f"{len(audio) / SR:>7.1f}{segmented.count + 1:>10}{segmented_ms:>14.0f}{whole_ms:>15.0f}")
+
+
+if __name__ == '__main__':
+    main()
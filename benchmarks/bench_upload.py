@@ -0,0 +1,203 @@
+"""
+Benchmark upload: WAV so với FLAC (kích thước payload, CPU encode, encode
+trong lúc ghi) và độ trễ đầu-cuối tới server giả lập cục bộ, có / không dùng
+lại kết nối keep-alive.
+
+Server giả lập (HTTP/1.1 keep-alive) thêm --connect-ms cho mỗi kết nối mới
+(thay cho DNS + TCP + TLS handshake) và đọc body theo --uplink-mbps để kích
+thước payload ảnh hưởng tới thời gian upload như mạng thật.
+
+Chạy:
+    python benchmarks/bench_upload.py
+    python benchmarks/bench_upload.py --seconds 10 --uplink-mbps 2 --connect-ms 150
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.audio import create_encoder  # noqa: E402
+from src.services.groq_stt_service import GroqSTTService  # noqa: E402
+
+RATE = 16000
+CHUNK = 1024
+
+
+class MockSTTServer:
+    """Endpoint /audio/transcriptions giả lập, đếm số kết nối TCP đã nhận"""
+
+    def __init__(self, connect_ms: float, uplink_mbps: float, processing_ms: float):
+        self.connections = 0
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Header và body được ghi riêng: không có TCP_NODELAY thì kết nối dùng
+            # lại bị Nagle + delayed ACK cộng thêm ~40ms mỗi phản hồi
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with server.lock:
+                    server.connections += 1
+                time.sleep(connect_ms / 1000.0)
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_POST(self):
+                remaining = int(self.headers.get('Content-Length', 0))
+                while remaining > 0:
+                    block = self.rfile.read(min(remaining, 65536))
+                    if not block:
+                        break
+                    remaining -= len(block)
+                    if uplink_mbps > 0:
+                        time.sleep(len(block) * 8 / (uplink_mbps * 1e6))
+                time.sleep(processing_ms / 1000.0)
+                body = json.dumps({'text': 'xin chào'}).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def speech_like(seconds: float) -> np.ndarray:
+    """Âm hữu thanh ngắt quãng + nhiễu nền (int16, 16kHz mono như lúc upload)"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * RATE)) / RATE
+    f0 = 140 + 30 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    voiced = sum(np.sin(k * phase) / k for k in range(1, 16)) * (np.sin(2 * np.pi * 0.8 * t) > -0.3)
+    audio = 6000 * voiced / np.abs(voiced).max() + rng.normal(0, 150, len(t))
+    return np.clip(np.rint(audio), -32768, 32767).astype(np.int16)
+
+
+def encode(name: str, audio: np.ndarray, streaming: bool):
+    """
+    Mã hóa như lúc ghi âm
+
+    Returns:
+        (encoder, CPU encode trong lúc ghi (s), thời gian encode sau khi thả phím (s))
+    """
+    encoder = create_encoder(name, RATE)
+    began = time.process_time()
+    if streaming:
+        for start in range(0, len(audio), CHUNK):
+            encoder.feed(audio[start:start + CHUNK])
+    during = time.process_time() - began
+
+    released = time.perf_counter()
+    if not streaming:
+        encoder.feed(audio)
+    encoder.finish()
+    return encoder, during, time.perf_counter() - released
+
+
+def create_service(url: str) -> GroqSTTService:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return GroqSTTService(api_base=url, api_keys=['bench'], api_key_env='VTT_BENCH_UNSET_KEY',
+                              max_network_retries=0)
+
+
+def release_to_text(service: GroqSTTService, name: str, audio: np.ndarray, streaming: bool) -> float:
+    """Thời gian từ lúc thả phím tới khi có văn bản (encode còn lại + upload + phản hồi)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        released = time.perf_counter()
+        encoder, _, _ = encode(name, audio, streaming)
+        service.transcribe_audio(encoder.parts(), filename=encoder.filename,
+                                 content_type=encoder.content_type, audio_seconds=len(audio) / RATE)
+        return time.perf_counter() - released
+
+
+def payload_table(seconds_list: list, repeats: int):
+    print(f"{'format':<8}{'seconds':>8}{'KB':>9}{'ratio':>8}{'encode CPU ms':>15}{'at release ms':>15}")
+    for seconds in seconds_list:
+        audio = speech_like(seconds)
+        wav_size = None
+        for name in ('wav', 'flac'):
+            runs = [encode(name, audio, streaming=True) for _ in range(repeats)]
+            size = len(runs[0][0].finish())
+            wav_size = wav_size or size
+            during = min(run[1] for run in runs)
+            at_release = min(run[2] for run in runs)
+            print(f"{name:<8}{seconds:>8g}{size / 1024:>9.1f}{size / wav_size:>8.2f}"
+                  f"{1e3 * during:>15.2f}{1e3 * at_release:>15.3f}")
+
+
+def latency_table(server: MockSTTServer, seconds: float, repeats: int):
+    audio = speech_like(seconds)
+    cases = [
+        ('wav, kết nối mới', 'wav', False, False),
+        ('wav, keep-alive', 'wav', False, True),
+        ('flac sau khi thả', 'flac', False, True),
+        ('flac trong lúc ghi', 'flac', True, True),
+    ]
+    print(f"{'case':<22}{'p50 ms':>9}{'min ms':>9}{'connections':>13}")
+    for label, name, streaming, reuse in cases:
+        before = server.connections
+        service = create_service(server.url) if reuse else None
+        if reuse:
+            release_to_text(service, name, audio, streaming)  # Mở kết nối trước (như prewarm)
+            before = server.connections
+        timings = []
+        for _ in range(repeats):
+            current = service or create_service(server.url)
+            timings.append(release_to_text(current, name, audio, streaming))
+            if not reuse:
+                current.close()
+        if service is not None:
+            service.close()
+        print(f"{label:<22}{1e3 * float(np.median(timings)):>9.1f}{1e3 * min(timings):>9.1f}"
+              f"{server.connections - before:>13}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=15, help="Độ dài audio cho phần đo độ trễ")
+    parser.add_argument('--payload-seconds', type=float, nargs='+', default=[5, 15, 30])
+    parser.add_argument('--connect-ms', type=float, default=80.0, help="Giả lập DNS + TCP + TLS mỗi kết nối mới")
+    parser.add_argument('--uplink-mbps', type=float, default=5.0, help="Băng thông upload (0 = không giới hạn)")
+    parser.add_argument('--processing-ms', type=float, default=50.0, help="Thời gian server xử lý")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"[BENCH] Payload / encode (16kHz mono, chunk {CHUNK}, min of {args.repeats})")
+    payload_table(args.payload_seconds, args.repeats)
+
+    server = MockSTTServer(args.connect_ms, args.uplink_mbps, args.processing_ms)
+    try:
+        print(f"\n[BENCH] Thả phím -> văn bản, {args.seconds:g}s audio, connect {args.connect_ms:g}ms, "
+              f"uplink {args.uplink_mbps:g} Mbit/s, server {args.processing_ms:g}ms")
+        latency_table(server, args.seconds, args.repeats)
+    finally:
+        server.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+"""
+Audio package - Capture buffers and audio processing
+"""
+from .capture_buffer import CaptureBuffer
+from .capture_stats import CaptureStats
+from .ring_buffer import SPSCRingBuffer, PrerollRing, PrerollReader
+from .warm_stream import WarmInputStream
+from .filters import highpass_rc, first_order_recursive, RCHighPassFilter
+from .noise_reduction import SpectralNoiseReducer
+from .pipeline import EnhancementPipeline
+from .enhancer import StreamingEnhancer
+from .features import FeatureExtractor, FeatureTimeline
+from .vad import VoiceActivityDetector, detect_speech_segments
+from .trim import SpeechTimeMap, compact_silence
+from .resample import PolyphaseResampler, resample
+from .encoders import UploadEncoder, WavEncoder, FlacEncoder, create_encoder, wav_header
+
+__all__ = ['CaptureBuffer', 'CaptureStats', 'SPSCRingBuffer', 'PrerollRing', 'PrerollReader',
+           'WarmInputStream', 'highpass_rc', 'first_order_recursive', 'RCHighPassFilter',
+           'SpectralNoiseReducer', 'EnhancementPipeline', 'StreamingEnhancer',
+           'FeatureExtractor', 'FeatureTimeline', 'VoiceActivityDetector', 'detect_speech_segments',
+           'SpeechTimeMap', 'compact_silence', 'PolyphaseResampler', 'resample',
+           'UploadEncoder', 'WavEncoder', 'FlacEncoder', 'create_encoder', 'wav_header']
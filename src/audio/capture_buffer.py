@@ -0,0 +1,114 @@
+"""
+Capture Buffer - Bộ đệm ghi âm int16 cấp phát trước
+"""
+import math
+import threading
+
+import numpy as np
+
+
+class CaptureBuffer:
+    """
+    Bộ đệm ghi âm dùng MỘT mảng int16 cấp phát trước (theo max_recording_time).
+
+    Mỗi chunk từ stream được copy thẳng vào mảng, không giữ list các bytes nhỏ
+    và không cần b''.join() khi thả hotkey. Khi dừng, take() trả về view
+    zero-copy của phần đã ghi và nhường mảng đó cho thread xử lý; lần ghi sau
+    sẽ dùng một mảng mới (np.empty nên không tốn RAM cho phần chưa ghi).
+    """
+
+    def __init__(self, max_seconds: float, sample_rate: int, channels: int = 1,
+                 extra_frames: int = 0):
+        """
+        Args:
+            max_seconds: Thời gian ghi tối đa (max_recording_time)
+            sample_rate: Tần số lấy mẫu
+            channels: Số kênh
+            extra_frames: Dư thêm (thường = chunk_size) để không cắt chunk cuối
+        """
+        self.sample_rate = int(sample_rate)
+        self.channels = int(channels)
+        frames = int(math.ceil(float(max_seconds) * self.sample_rate)) + int(extra_frames)
+        self.capacity = max(frames, 1) * self.channels
+
+        self._lock = threading.Lock()
+        self._buffer = None
+        self._length = 0
+        self.dropped_samples = 0
+
+    def reset(self):
+        """Chuẩn bị cho lần ghi mới (cấp phát mảng nếu mảng cũ đã được take())"""
+        with self._lock:
+            if self._buffer is None:
+                self._buffer = np.empty(self.capacity, dtype=np.int16)
+            self._length = 0
+            self.dropped_samples = 0
+
+    def write(self, data) -> np.ndarray:
+        """
+        Ghi 1 chunk (bytes từ stream.read hoặc mảng int16) vào bộ đệm
+
+        Returns:
+            View int16 của chunk vừa ghi (dùng để tính level, không copy thêm)
+        """
+        if isinstance(data, np.ndarray):
+            chunk = data
+        else:
+            chunk = np.frombuffer(data, dtype=np.int16)
+        with self._lock:
+            if self._buffer is None:
+                # Đã take() - chunk đến muộn sau khi dừng, bỏ qua
+                self.dropped_samples += len(chunk)
+                return chunk
+
+            start = self._length
+            count = min(len(chunk), self.capacity - start)
+            if count > 0:
+                self._buffer[start:start + count] = chunk[:count]
+                self._length = start + count
+            if count < len(chunk):
+                self.dropped_samples += len(chunk) - count
+        return chunk
+
+    def take(self) -> np.ndarray:
+        """
+        Lấy toàn bộ audio đã ghi (view zero-copy) và nhường mảng cho caller.
+
+        Returns:
+            Mảng int16 (có thể rỗng). Bộ đệm không còn giữ tham chiếu tới mảng này.
+        """
+        with self._lock:
+            if self._buffer is None:
+                return np.empty(0, dtype=np.int16)
+            audio = self._buffer[:self._length]
+            self._buffer = None
+            self._length = 0
+        return audio
+
+    def copy(self, start: int, end: int) -> np.ndarray:
+        """
+        Bản sao đoạn [start, end) đã ghi - đọc được trong lúc vẫn đang ghi
+
+        Returns:
+            Mảng int16 độc lập với bộ đệm (rỗng nếu bộ đệm đã take())
+        """
+        with self._lock:
+            if self._buffer is None:
+                return np.empty(0, dtype=np.int16)
+            end = min(end, self._length)
+            return self._buffer[start:end].copy()
+
+    @property
+    def samples(self) -> int:
+        """Số sample đã ghi"""
+        return self._length
+
+    @property
+    def duration(self) -> float:
+        """Thời lượng đã ghi (giây)"""
+        return self._length / float(self.sample_rate * self.channels)
+
+    @property
+    def is_full(self) -> bool:
+        """Bộ đệm đã đầy (đạt max_recording_time)"""
+        return self._buffer is not None and self._length >= self.capacity
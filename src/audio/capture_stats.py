@@ -0,0 +1,71 @@
+"""
+Capture Stats - Bộ đếm overflow / dropped frames / jitter của callback ghi âm
+"""
+import time
+
+
+class CaptureStats:
+    """Thống kê xrun cho chế độ ghi âm callback"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Reset bộ đếm cho lần ghi mới"""
+        self.callbacks = 0
+        self.frames = 0
+        self.overflows = 0
+        self.dropped_frames = 0
+        self.max_jitter_ms = 0.0
+        self._jitter_sum_ms = 0.0
+        self._jitter_count = 0
+        self._last_callback_at = None
+
+    def record_callback(self, frame_count: int, sample_rate: int, overflow: bool = False,
+                        dropped: int = 0, now: float = None):
+        """
+        Ghi nhận 1 lần gọi callback
+
+        Args:
+            frame_count: Số frame nhận được
+            sample_rate: Tần số lấy mẫu (để tính khoảng cách kỳ vọng)
+            overflow: PortAudio báo input overflow
+            dropped: Số frame bị bỏ do bộ đệm đầy
+            now: Thời điểm gọi (perf_counter), mặc định lấy hiện tại
+        """
+        if now is None:
+            now = time.perf_counter()
+
+        self.callbacks += 1
+        self.frames += frame_count
+        if overflow:
+            self.overflows += 1
+        self.dropped_frames += dropped
+
+        # Jitter = độ lệch giữa khoảng cách thực tế và khoảng cách kỳ vọng
+        if self._last_callback_at is not None and sample_rate > 0:
+            expected = frame_count / float(sample_rate)
+            jitter_ms = abs((now - self._last_callback_at) - expected) * 1000.0
+            self._jitter_sum_ms += jitter_ms
+            self._jitter_count += 1
+            if jitter_ms > self.max_jitter_ms:
+                self.max_jitter_ms = jitter_ms
+        self._last_callback_at = now
+
+    @property
+    def mean_jitter_ms(self) -> float:
+        """Jitter trung bình (ms)"""
+        if self._jitter_count == 0:
+            return 0.0
+        return self._jitter_sum_ms / self._jitter_count
+
+    def to_dict(self) -> dict:
+        """Snapshot bộ đếm"""
+        return {
+            'callbacks': self.callbacks,
+            'frames': self.frames,
+            'overflows': self.overflows,
+            'dropped_frames': self.dropped_frames,
+            'mean_jitter_ms': round(self.mean_jitter_ms, 3),
+            'max_jitter_ms': round(self.max_jitter_ms, 3)
+        }
@@ -0,0 +1,162 @@
+"""
+Streaming Audio Enhancer - Cải thiện audio theo từng chunk trong lúc ghi âm
+"""
+import numpy as np
+
+from .filters import RCHighPassFilter
+from .noise_reduction import SpectralNoiseReducer
+from .pipeline import (FILTER_ALPHA, PEAK_TARGET, TARGET_RMS, MIN_GAIN, MAX_GAIN,
+                       render_int16, sum_squares)
+
+
+class StreamingEnhancer:
+    """
+    Chạy các bước nặng của _enhance_audio ngay khi mỗi chunk về (DC removal,
+    high-pass, noise gate), giữ trạng thái bộ lọc giữa các chunk. Khi thả
+    hotkey chỉ còn finalize(): tính gain toàn cục (chuẩn hóa đỉnh + RMS),
+    nén động và chuyển về int16 trong 1 lượt vector hóa - vẫn O(n) nhưng rẻ
+    (~0.1-0.2ms mỗi giây audio với noise gate hoặc tắt giảm nhiễu).
+
+    Các bước trước khi tính gain đều tuyến tính / bất biến theo tỉ lệ, nên bỏ
+    chuẩn hóa đỉnh (bước 2) trong lúc stream và gộp nó vào gain cuối cho kết
+    quả khớp với đường batch.
+
+    Với noise_reduction_method = "spectral" (mặc định), spectral subtraction
+    cần noise profile của cả clip nên chạy STFT toàn clip ở finalize(): chi phí
+    lúc thả phím tăng tuyến tính theo độ dài (~0.8-1ms mỗi giây audio, tức
+    ~25ms cho 30s - xem benchmarks/bench_noise_reduction.py).
+    """
+
+    NOISE_SAMPLES = 1600  # 0.1s ở 16kHz - cùng giới hạn với đường batch
+
+    def __init__(self, config: dict, capacity: int):
+        """
+        Args:
+            config: Cấu hình audio_enhancement
+            capacity: Số sample tối đa của 1 lần ghi
+        """
+        self.config = config or {}
+        self.capacity = max(int(capacity), 1)
+        self._highpass = RCHighPassFilter(FILTER_ALPHA)
+        self._buffer = np.empty(self.capacity, dtype=np.float32)
+        self._length = 0
+
+        # Trạng thái chạy
+        self._dc_sum = 0.0
+        self._dc_count = 0
+        self._peak = 0.0          # Đỉnh sau DC removal (trước high-pass) - cho bước 2
+        self._sum_squares = 0.0   # Tổng bình phương sau noise gate - cho bước 5
+        self._noise_threshold = None
+        self._gate_from = 0       # Vị trí đầu tiên chưa qua noise gate
+
+        self._spectral = (self.config.get('reduce_noise', True)
+                          and self.config.get('noise_reduction_method', 'spectral') == 'spectral')
+
+    @property
+    def samples(self) -> int:
+        """Số sample đã xử lý"""
+        return self._length
+
+    def process(self, chunk: np.ndarray):
+        """
+        Xử lý 1 chunk int16 vừa ghi được
+
+        Args:
+            chunk: Mảng int16 (view của chunk, không bị giữ lại)
+        """
+        count = min(len(chunk), self.capacity - self._length)
+        if count <= 0:
+            return
+        x = chunk[:count].astype(np.float64)
+
+        # 1. Loại bỏ DC offset - dùng trung bình chạy thay cho trung bình toàn clip
+        if self.config.get('reduce_noise', True):
+            self._dc_sum += float(x.sum())
+            self._dc_count += count
+            x -= self._dc_sum / self._dc_count
+
+        peak = float(np.max(np.abs(x)))
+        if peak > self._peak:
+            self._peak = peak
+
+        # 3. High-pass filter có giữ trạng thái giữa các chunk
+        start = self._length
+        end = start + count
+        if self.config.get('apply_filter', True):
+            self._buffer[start:end] = self._highpass.process(x)
+        else:
+            self._buffer[start:end] = x
+        self._length = end
+
+        # 4. Noise gate - ngưỡng ước lượng từ 0.1s đầu
+        # (spectral subtraction cần cả clip nên để dành cho finalize)
+        if self._spectral:
+            return
+        if self.config.get('reduce_noise', True):
+            if self._noise_threshold is None and self._length >= self.NOISE_SAMPLES:
+                noise_estimate = float(np.std(self._buffer[:self.NOISE_SAMPLES]))
+                self._noise_threshold = noise_estimate * 2.0 if noise_estimate > 0 else 0.0
+            if self._noise_threshold is not None:
+                self._apply_gate(self._gate_from, self._length)
+        else:
+            self._accumulate(start, end)
+
+    def _apply_gate(self, start: int, end: int):
+        """Áp dụng noise gate cho đoạn [start, end) và cộng dồn năng lượng"""
+        segment = self._buffer[start:end]
+        if self._noise_threshold > 0:
+            quiet = np.abs(segment) <= self._noise_threshold
+            segment[quiet] *= 0.3  # Giảm tiếng ồn xuống 30%
+        self._gate_from = end
+        self._accumulate(start, end)
+
+    def _accumulate(self, start: int, end: int):
+        """Cộng dồn tổng bình phương (dùng cho RMS khi finalize)"""
+        segment = self._buffer[start:end].astype(np.float64)
+        self._sum_squares += float(np.dot(segment, segment))
+
+    def finalize(self, out: np.ndarray = None) -> np.ndarray:
+        """
+        Hoàn tất: gain toàn cục, nén động, chuẩn hóa cuối và chuyển int16
+        (xử lý tại chỗ trên buffer float32, ghi thẳng vào buffer int16)
+
+        Args:
+            out: Buffer int16 đích (tùy chọn)
+
+        Returns:
+            Mảng int16 đã cải thiện
+
+        Raises:
+            ValueError: Nếu chưa đủ dữ liệu để xử lý streaming
+        """
+        n = self._length
+        if n == 0 or self._peak == 0:
+            raise ValueError("Không có dữ liệu audio để xử lý")
+
+        # Clip ngắn hơn cửa sổ ước lượng noise: gate chưa chạy
+        if self.config.get('reduce_noise', True) and not self._spectral and self._noise_threshold is None:
+            raise ValueError("Audio quá ngắn cho streaming enhancement")
+
+        audio_float = self._buffer[:n]
+
+        # 4. Spectral subtraction trên toàn clip (tại chỗ)
+        if self._spectral:
+            reducer = SpectralNoiseReducer(frame_size=self.config.get('noise_frame_size', 512))
+            reducer.reduce(audio_float, out=audio_float)
+            self._sum_squares = sum_squares(audio_float)
+
+        # 2 + 5. Gain toàn cục = chuẩn hóa đỉnh * chuẩn hóa RMS
+        gain = 1.0
+        if self.config.get('normalize_volume', True):
+            peak_gain = PEAK_TARGET / self._peak  # Giữ lại headroom
+            rms = np.sqrt(self._sum_squares / n) * peak_gain
+            rms_gain = 1.0
+            if rms > 0:
+                rms_gain = min(max(TARGET_RMS / rms, MIN_GAIN), MAX_GAIN)
+            gain = peak_gain * rms_gain
+
+        # 6 + 7. Compressor + limiter + int16 trong 1 lượt
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+        render_int16(audio_float, out, gain, self.config.get('enhance_speech', True))
+        return out
@@ -0,0 +1,140 @@
+"""
+Audio Features - Trích xuất đặc trưng theo chunk và timeline dạng mảng
+"""
+import numpy as np
+
+# Thứ tự cột trong timeline
+FEATURE_FIELDS = ('rms', 'peak', 'clipped', 'zcr', 'band_low', 'band_mid', 'band_high')
+RMS, PEAK, CLIPPED, ZCR, BAND_LOW, BAND_MID, BAND_HIGH = range(len(FEATURE_FIELDS))
+
+# Ranh giới dải tần (Hz): thấp < 300 <= giọng nói < 3400 <= cao
+BAND_EDGES = (300.0, 3400.0)
+
+# Level hiển thị wave: RMS / WAVE_SCALE, chặn ở 1.0
+WAVE_SCALE = 500.0
+
+
+def wave_level(rms: float) -> float:
+    """Chuẩn hóa RMS về 0-1 cho hiệu ứng wave"""
+    return min(rms / WAVE_SCALE, 1.0)
+
+
+class FeatureExtractor:
+    """
+    Tính một lần cho mỗi chunk: RMS, peak, số sample bị clip, zero-crossing
+    rate và tỉ lệ năng lượng 3 dải tần. Kết quả dùng chung cho wave overlay,
+    VAD và energy gate trước khi upload.
+    """
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = int(sample_rate)
+        self._band_cache = {}
+
+    def _band_slices(self, n: int):
+        """Chỉ số bin rfft cho các dải tần với chunk dài n (cache theo n)"""
+        if n not in self._band_cache:
+            bin_hz = self.sample_rate / float(n)
+            low = int(np.ceil(BAND_EDGES[0] / bin_hz))
+            mid = int(np.ceil(BAND_EDGES[1] / bin_hz))
+            last = n // 2 + 1
+            low, mid = min(low, last), min(mid, last)
+            self._band_cache[n] = (slice(1, low), slice(low, mid), slice(mid, last))
+        return self._band_cache[n]
+
+    def extract(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Trích xuất đặc trưng của 1 chunk int16
+
+        Returns:
+            Mảng float64 theo thứ tự FEATURE_FIELDS
+        """
+        row = np.zeros(len(FEATURE_FIELDS), dtype=np.float64)
+        n = len(chunk)
+        if n == 0:
+            return row
+
+        x = chunk.astype(np.float32)
+        row[RMS] = np.sqrt(float(np.dot(x, x)) / n)
+        row[PEAK] = max(float(x.max()), -float(x.min()))
+        row[CLIPPED] = np.count_nonzero(chunk >= 32767) + np.count_nonzero(chunk <= -32768)
+        if n > 1:
+            signs = np.signbit(x)
+            row[ZCR] = np.count_nonzero(signs[1:] != signs[:-1]) / float(n - 1)
+
+        # Tỉ lệ năng lượng theo dải (bỏ bin DC)
+        power = np.abs(np.fft.rfft(x))
+        power *= power
+        low, mid, high = self._band_slices(n)
+        total = float(power[1:].sum())
+        if total > 0:
+            row[BAND_LOW] = power[low].sum() / total
+            row[BAND_MID] = power[mid].sum() / total
+            row[BAND_HIGH] = power[high].sum() / total
+        return row
+
+
+class FeatureTimeline:
+    """Timeline đặc trưng của 1 lần ghi âm: mảng (n_chunks, n_fields) + vị trí sample bắt đầu"""
+
+    def __init__(self, capacity: int = 256):
+        self._rows = np.zeros((max(int(capacity), 1), len(FEATURE_FIELDS)), dtype=np.float64)
+        self._starts = np.zeros(len(self._rows), dtype=np.int64)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, row: np.ndarray, start_sample: int):
+        """Thêm đặc trưng của 1 chunk (tự mở rộng khi đầy)"""
+        if self._length == len(self._rows):
+            self._rows = np.concatenate((self._rows, np.zeros_like(self._rows)))
+            self._starts = np.concatenate((self._starts, np.zeros_like(self._starts)))
+        self._rows[self._length] = row
+        self._starts[self._length] = start_sample
+        self._length += 1
+
+    @property
+    def rows(self) -> np.ndarray:
+        """View (n_chunks, n_fields) các đặc trưng đã ghi"""
+        return self._rows[:self._length]
+
+    @property
+    def starts(self) -> np.ndarray:
+        """Sample bắt đầu của từng chunk"""
+        return self._starts[:self._length]
+
+    def column(self, field: str) -> np.ndarray:
+        """View 1 cột theo tên (vd. 'rms')"""
+        return self._rows[:self._length, FEATURE_FIELDS.index(field)]
+
+    def mean(self, field: str) -> float:
+        """Giá trị trung bình của 1 đặc trưng (0 nếu chưa có chunk nào)"""
+        if self._length == 0:
+            return 0.0
+        return float(self.column(field).mean())
+
+    def latest(self) -> dict:
+        """Đặc trưng của chunk mới nhất dạng dict"""
+        if self._length == 0:
+            return {}
+        return features_to_dict(self._rows[self._length - 1])
+
+    def summary(self) -> dict:
+        """Tóm tắt cả lần ghi (để log / phân tích)"""
+        if self._length == 0:
+            return {'chunks': 0}
+        rows = self.rows
+        return {
+            'chunks': self._length,
+            'rms_mean': round(float(rows[:, RMS].mean()), 1),
+            'rms_max': round(float(rows[:, RMS].max()), 1),
+            'peak_max': round(float(rows[:, PEAK].max()), 1),
+            'clipped_total': int(rows[:, CLIPPED].sum()),
+            'zcr_mean': round(float(rows[:, ZCR].mean()), 4),
+            'band_mid_mean': round(float(rows[:, BAND_MID].mean()), 3)
+        }
+
+
+def features_to_dict(row: np.ndarray) -> dict:
+    """Chuyển 1 dòng đặc trưng thành dict {tên: giá trị}"""
+    return {name: float(row[i]) for i, name in enumerate(FEATURE_FIELDS)}
@@ -0,0 +1,124 @@
+"""
+Audio filters - Bộ lọc IIR vector hóa bằng NumPy (không cần scipy)
+"""
+import math
+
+import numpy as np
+
+
+def _block_size_for(alpha: float, max_gain: float = 1e6, max_block: int = 4096) -> int:
+    """Chọn kích thước block sao cho alpha^-block không vượt max_gain (giữ độ chính xác float64)"""
+    if alpha <= 0.0 or alpha >= 1.0:
+        return max_block
+    block = int(math.log(max_gain) / -math.log(alpha))
+    return min(max(block, 1), max_block)
+
+
+def first_order_recursive(u: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    Tính y[n] = alpha * y[n-1] + u[n] (y[-1] = 0) không dùng vòng lặp theo sample.
+
+    Chia tín hiệu thành các block, trong mỗi block nghiệm zero-state là
+    alpha^i * cumsum(u[k] * alpha^-k); sau đó cộng phần "carry" từ block
+    trước (chỉ lặp theo số block, không theo số sample).
+
+    Args:
+        u: Tín hiệu đầu vào 1D
+        alpha: Hệ số hồi quy (|alpha| < 1)
+
+    Returns:
+        Mảng float64 cùng độ dài với u
+    """
+    u = np.asarray(u, dtype=np.float64)
+    n = len(u)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+
+    block = min(_block_size_for(abs(alpha)), n)
+    n_blocks = -(-n // block)
+    padded = np.zeros(n_blocks * block, dtype=np.float64)
+    padded[:n] = u
+    blocks = padded.reshape(n_blocks, block)
+
+    exponents = np.arange(block, dtype=np.float64)
+    powers = np.power(alpha, exponents)
+    # Nghiệm zero-state của từng block (vector hóa trên toàn bộ các block)
+    zero_state = np.cumsum(blocks / powers, axis=1) * powers
+
+    # Lan truyền trạng thái cuối block: C[j] = end[j] + alpha^block * C[j-1]
+    # (vòng lặp scalar theo số block, rồi cộng carry cho mọi block một lần)
+    if n_blocks > 1:
+        decay = float(alpha) ** block
+        ends = zero_state[:, -1].tolist()
+        carries = np.empty(n_blocks - 1, dtype=np.float64)
+        carry = 0.0
+        for j in range(n_blocks - 1):
+            carry = ends[j] + decay * carry
+            carries[j] = carry
+        zero_state[1:] += carries[:, None] * np.power(alpha, exponents + 1.0)
+
+    return zero_state.reshape(-1)[:n]
+
+
+def highpass_rc(audio: np.ndarray, alpha: float = 0.97) -> np.ndarray:
+    """
+    High-pass filter RC: y[i] = alpha * (y[i-1] + x[i] - x[i-1]), y[0] = x[0].
+
+    Tương đương vòng lặp Python cũ trong _enhance_audio nhưng vector hóa.
+
+    Args:
+        audio: Tín hiệu float 1D
+        alpha: Hệ số lọc (0.97 ~ cut-off 50Hz ở 16kHz)
+
+    Returns:
+        Mảng float32 đã lọc
+    """
+    x = np.asarray(audio, dtype=np.float64)
+    if len(x) == 0:
+        return np.empty(0, dtype=np.float32)
+
+    # Đưa về dạng y[n] = alpha * y[n-1] + u[n]
+    u = np.empty_like(x)
+    u[0] = x[0]
+    np.subtract(x[1:], x[:-1], out=u[1:])
+    u[1:] *= alpha
+
+    return first_order_recursive(u, alpha).astype(np.float32)
+
+
+class RCHighPassFilter:
+    """High-pass RC có giữ trạng thái giữa các chunk (dùng cho xử lý streaming)"""
+
+    def __init__(self, alpha: float = 0.97):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self):
+        """Xóa trạng thái (bắt đầu tín hiệu mới)"""
+        self._prev_x = None
+        self._prev_y = 0.0
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Lọc 1 chunk, kết quả nối tiếp liền mạch với chunk trước
+
+        Returns:
+            Mảng float32 đã lọc
+        """
+        x = np.asarray(chunk, dtype=np.float64)
+        if len(x) == 0:
+            return np.empty(0, dtype=np.float32)
+
+        alpha = self.alpha
+        u = np.empty_like(x)
+        if self._prev_x is None:
+            u[0] = x[0]
+        else:
+            u[0] = alpha * (x[0] - self._prev_x) + alpha * self._prev_y
+        np.subtract(x[1:], x[:-1], out=u[1:])
+        u[1:] *= alpha
+
+        y = first_order_recursive(u, alpha)
+        self._prev_x = float(x[-1])
+        self._prev_y = float(y[-1])
+        return y.astype(np.float32)
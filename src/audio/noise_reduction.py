@@ -0,0 +1,169 @@
+"""
+Spectral Noise Reduction - Giảm nhiễu bằng spectral subtraction (STFT, NumPy)
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class SpectralNoiseReducer:
+    """
+    Giảm nhiễu spectral subtraction trên STFT, xử lý vector hóa theo nhóm frame:
+      - Chia frame (cửa sổ sqrt-Hann, overlap theo hop), rfft theo nhóm frame
+      - Học noise profile theo từng bin từ các frame năng lượng thấp nhất
+        (coi là non-speech)
+      - Trừ phổ với hệ số over-subtraction và spectral floor, giữ nguyên phase
+      - irfft + overlap-add để dựng lại tín hiệu
+    """
+
+    SEGMENT_FRAMES = 64  # Số frame xử lý mỗi lượt (giới hạn bộ nhớ phụ)
+
+    def __init__(self, frame_size: int = 512, hop_size: int = None,
+                 over_subtraction: float = 1.5, spectral_floor: float = 0.1,
+                 noise_percentile: float = 20.0):
+        """
+        Args:
+            frame_size: Số sample mỗi frame (nên là lũy thừa của 2)
+            hop_size: Bước nhảy giữa các frame (mặc định frame_size / 2, phải chia hết frame_size)
+            over_subtraction: Hệ số nhân noise profile khi trừ phổ
+            spectral_floor: Gain tối thiểu của mỗi bin (tránh "musical noise")
+            noise_percentile: Frame có năng lượng <= percentile này được dùng để học noise
+        """
+        self.frame_size = int(frame_size)
+        self.hop_size = int(hop_size) if hop_size else self.frame_size // 2
+        if self.frame_size <= 0 or self.hop_size <= 0 or self.frame_size % self.hop_size != 0:
+            raise ValueError(f"frame_size ({frame_size}) phải chia hết cho hop_size ({hop_size})")
+
+        self.over_subtraction = float(over_subtraction)
+        self.spectral_floor = float(spectral_floor)
+        self.noise_percentile = float(noise_percentile)
+
+        # sqrt-Hann (periodic) cho cả phân tích và tổng hợp
+        n = np.arange(self.frame_size)
+        hann = 0.5 - 0.5 * np.cos(2.0 * np.pi * n / self.frame_size)
+        self.window = np.sqrt(hann).astype(np.float32)
+
+    def _overlap_add(self, frames: np.ndarray) -> np.ndarray:
+        """Overlap-add các frame (n_frames, frame_size) thành tín hiệu 1D"""
+        n_frames = frames.shape[0]
+        ratio = self.frame_size // self.hop_size
+        parts = frames.reshape(n_frames, ratio, self.hop_size)
+        out = np.zeros((n_frames + ratio - 1, self.hop_size), dtype=frames.dtype)
+        for r in range(ratio):
+            out[r:r + n_frames] += parts[:, r, :]
+        return out.reshape(-1)
+
+    def _padded_slice(self, x: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Lấy đoạn [start, stop) của tín hiệu đã pad (pad = frame - hop số 0 ở đầu, số 0 ở cuối)"""
+        pad = self.frame_size - self.hop_size
+        chunk = np.zeros(stop - start, dtype=np.float32)
+        src_start = max(start - pad, 0)
+        src_stop = min(stop - pad, len(x))
+        if src_stop > src_start:
+            dst = src_start + pad - start
+            chunk[dst:dst + (src_stop - src_start)] = x[src_start:src_stop]
+        return chunk
+
+    def _frames(self, x: np.ndarray, first: int, last: int) -> np.ndarray:
+        """Các frame [first, last) đã nhân cửa sổ, shape (last - first, frame_size)"""
+        hop = self.hop_size
+        chunk = self._padded_slice(x, first * hop, (last - 1) * hop + self.frame_size)
+        return sliding_window_view(chunk, self.frame_size)[::hop] * self.window
+
+    def noise_profile(self, x: np.ndarray, n_frames: int) -> np.ndarray:
+        """
+        Ước lượng noise profile (biên độ trung bình mỗi bin) từ các frame yên lặng
+
+        Năng lượng frame tính trong miền thời gian (Parseval) để chọn frame
+        yên lặng mà không cần giữ phổ của toàn clip trong bộ nhớ.
+
+        Args:
+            x: Tín hiệu float32 1D
+            n_frames: Tổng số frame
+        """
+        energy = np.empty(n_frames, dtype=np.float64)
+        for first in range(0, n_frames, self.SEGMENT_FRAMES):
+            last = min(first + self.SEGMENT_FRAMES, n_frames)
+            frames = self._frames(x, first, last)
+            energy[first:last] = np.einsum('ij,ij->i', frames, frames)
+
+        threshold = np.percentile(energy, self.noise_percentile)
+        profile = np.zeros(self.frame_size // 2 + 1, dtype=np.float64)
+        count = 0
+        for first in range(0, n_frames, self.SEGMENT_FRAMES):
+            last = min(first + self.SEGMENT_FRAMES, n_frames)
+            quiet = energy[first:last] <= threshold
+            if not np.any(quiet):
+                continue
+            frames = self._frames(x, first, last)[quiet]
+            profile += np.abs(np.fft.rfft(frames, axis=1)).sum(axis=0)
+            count += len(frames)
+        return profile / max(count, 1)
+
+    def reduce(self, audio: np.ndarray, noise_profile: np.ndarray = None,
+               out: np.ndarray = None) -> np.ndarray:
+        """
+        Giảm nhiễu cho toàn bộ tín hiệu, xử lý theo từng nhóm frame
+
+        Bộ nhớ phụ chỉ tỉ lệ với SEGMENT_FRAMES. Cho phép out là chính audio
+        (in-place): vùng output đã hoàn tất luôn nằm trước vùng input sẽ đọc tiếp.
+
+        Args:
+            audio: Tín hiệu float 1D
+            noise_profile: Noise profile có sẵn (mặc định học từ chính tín hiệu)
+            out: Buffer float32 đích (tùy chọn, có thể là audio)
+
+        Returns:
+            Mảng float32 cùng độ dài (chính là out nếu được truyền vào)
+        """
+        x = np.asarray(audio, dtype=np.float32)
+        n = len(x)
+        frame, hop = self.frame_size, self.hop_size
+        if out is None:
+            out = x.copy()
+        elif out is not x:
+            out[:] = x
+        if n < frame:
+            return out
+
+        pad = frame - hop
+        n_frames = -(-(n + pad) // hop)
+        if noise_profile is None:
+            noise_profile = self.noise_profile(x, n_frames)
+        subtract = (noise_profile * self.over_subtraction).astype(np.float32)
+
+        # Tổng window^2 khi overlap-add (tuần hoàn theo hop ở vùng trong)
+        ratio = frame // hop
+        norm = (self.window * self.window).reshape(ratio, hop).sum(axis=0)
+        np.maximum(norm, 1e-6, out=norm)
+
+        tail = np.zeros(pad, dtype=np.float32)
+        for first in range(0, n_frames, self.SEGMENT_FRAMES):
+            last = min(first + self.SEGMENT_FRAMES, n_frames)
+            spectrum = np.fft.rfft(self._frames(x, first, last), axis=1)
+
+            # Gain theo bin: 1 - alpha * N / |X|, chặn dưới bởi spectral floor
+            gain = np.abs(spectrum)
+            np.maximum(gain, 1e-10, out=gain)
+            np.divide(subtract, gain, out=gain)
+            np.subtract(1.0, gain, out=gain)
+            np.maximum(gain, self.spectral_floor, out=gain)
+            spectrum *= gain
+
+            restored = np.fft.irfft(spectrum, n=frame, axis=1).astype(np.float32)
+            restored *= self.window
+            segment = self._overlap_add(restored)
+            segment[:pad] += tail
+
+            # Vùng [first*hop, last*hop) đã đủ mọi frame -> ghi ra out
+            done = (last - first) * hop
+            tail = segment[done:done + pad].copy()
+            finished = segment[:done].reshape(-1, hop)
+            finished /= norm
+            finished = finished.reshape(-1)
+
+            dst_start = first * hop - pad
+            src_from = max(-dst_start, 0)
+            dst_stop = min(dst_start + done, n)
+            if dst_stop > dst_start + src_from:
+                out[dst_start + src_from:dst_stop] = finished[src_from:dst_stop - dst_start]
+        return out
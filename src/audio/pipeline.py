@@ -0,0 +1,168 @@
+"""
+Enhancement Pipeline - Chuỗi cải thiện audio float32 xử lý tại chỗ (in-place)
+"""
+import numpy as np
+
+from .filters import RCHighPassFilter
+from .noise_reduction import SpectralNoiseReducer
+
+# Số sample mỗi block cho các bước cần bộ nhớ tạm (giới hạn bộ nhớ phụ)
+BLOCK_SIZE = 16384
+
+FILTER_ALPHA = 0.97       # Cut-off khoảng 50Hz ở 16kHz
+PEAK_TARGET = 0.85        # Chuẩn hóa đỉnh ban đầu (giữ headroom)
+TARGET_RMS = 0.25         # RMS mục tiêu cho speech recognition
+MIN_GAIN, MAX_GAIN = 0.1, 4.0
+COMPRESS_THRESHOLD = 0.8
+COMPRESS_RATIO = 0.5
+LIMIT_PEAK = 0.95
+
+
+def peak_abs(work: np.ndarray) -> float:
+    """Biên độ lớn nhất |x| không tạo mảng np.abs tạm"""
+    if len(work) == 0:
+        return 0.0
+    return float(max(work.max(), -work.min()))
+
+
+def sum_squares(work: np.ndarray) -> float:
+    """Tổng bình phương (cộng dồn float64 theo block)"""
+    total = 0.0
+    for start in range(0, len(work), BLOCK_SIZE):
+        block = work[start:start + BLOCK_SIZE]
+        total += float(np.dot(block, block))
+    return total
+
+
+def compress_value(value: float) -> float:
+    """Đường cong compressor cho 1 giá trị dương"""
+    if value > COMPRESS_THRESHOLD:
+        return COMPRESS_THRESHOLD + (value - COMPRESS_THRESHOLD) * COMPRESS_RATIO
+    return value
+
+
+def render_int16(work: np.ndarray, out: np.ndarray, gain: float, compress: bool):
+    """
+    Bước cuối gộp làm 1 lượt: gain -> compressor -> limiter -> int16.
+
+    Compressor đơn điệu nên đỉnh sau nén = compress(gain * đỉnh trước nén),
+    tính trước được hệ số limiter mà không cần thêm một lượt quét.
+
+    Args:
+        work: Buffer float32 (bị ghi đè)
+        out: Buffer int16 đích, cùng độ dài
+        gain: Gain toàn cục
+        compress: Có áp dụng compressor không
+    """
+    peak = peak_abs(work) * abs(gain)
+    if compress:
+        peak = compress_value(peak)
+    limiter = LIMIT_PEAK / peak if peak > LIMIT_PEAK else 1.0
+
+    offset = COMPRESS_THRESHOLD * (1.0 - COMPRESS_RATIO)
+    for start in range(0, len(work), BLOCK_SIZE):
+        block = work[start:start + BLOCK_SIZE]
+        if gain != 1.0:
+            block *= gain
+        if compress:
+            # |x| > t: x' = x * r + sign(x) * t * (1 - r)
+            over = block > COMPRESS_THRESHOLD
+            block[over] = block[over] * COMPRESS_RATIO + offset
+            under = block < -COMPRESS_THRESHOLD
+            block[under] = block[under] * COMPRESS_RATIO - offset
+        block *= limiter * 32767
+        np.clip(block, -32768, 32767, out=block)
+        np.copyto(out[start:start + BLOCK_SIZE], block, casting='unsafe')
+
+
+class EnhancementPipeline:
+    """
+    Chuỗi cải thiện audio dùng 1 buffer float32 làm việc và 1 buffer int16
+    đầu ra. Mọi bước đều xử lý tại chỗ (ufunc out=, theo block), bộ nhớ phụ
+    của từng bước bị giới hạn bởi BLOCK_SIZE thay vì tỉ lệ với độ dài clip.
+
+    Các bước (giống _enhance_audio cũ):
+      1. Loại bỏ DC offset     2. Chuẩn hóa đỉnh       3. High-pass RC
+      4. Giảm nhiễu            5. Chuẩn hóa RMS        6. Compressor
+      7. Limiter + int16
+    """
+
+    def __init__(self, config: dict):
+        """
+        Args:
+            config: Cấu hình audio_enhancement
+        """
+        self.config = config or {}
+
+    def process(self, audio: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Cải thiện audio int16
+
+        Args:
+            audio: Mảng int16 gốc (không bị sửa)
+            out: Buffer int16 đích (tùy chọn, cùng độ dài)
+
+        Returns:
+            Mảng int16 đã cải thiện (chính là `out` nếu được truyền vào)
+        """
+        n = len(audio)
+        if out is None:
+            out = np.empty(n, dtype=np.int16)
+
+        work = np.empty(n, dtype=np.float32)
+        np.copyto(work, audio, casting='unsafe')
+        config = self.config
+
+        # 1. Loại bỏ DC offset
+        if config.get('reduce_noise', True):
+            work -= np.float32(work.mean(dtype=np.float64))
+
+        # 2. Chuẩn hóa âm lượng ban đầu
+        if config.get('normalize_volume', True):
+            max_val = peak_abs(work)
+            if max_val > 0:
+                work *= np.float32(PEAK_TARGET / max_val)
+
+        # 3. High-pass filter theo block (trạng thái nối tiếp giữa các block)
+        if config.get('apply_filter', True) and n > 2:
+            self.highpass_inplace(work)
+
+        # 4. Giảm nhiễu
+        self.reduce_noise_inplace(work)
+
+        # 5. Gain RMS (gộp vào lượt render cuối)
+        gain = 1.0
+        if config.get('normalize_volume', True) and n > 0:
+            rms = np.sqrt(sum_squares(work) / n)
+            if rms > 0:
+                gain = min(max(TARGET_RMS / rms, MIN_GAIN), MAX_GAIN)
+
+        # 6 + 7. Compressor + limiter + int16 trong 1 lượt
+        render_int16(work, out, gain, config.get('enhance_speech', True))
+        return out
+
+    def highpass_inplace(self, work: np.ndarray):
+        """High-pass RC tại chỗ, xử lý theo block"""
+        highpass = RCHighPassFilter(FILTER_ALPHA)
+        for start in range(0, len(work), BLOCK_SIZE):
+            block = work[start:start + BLOCK_SIZE]
+            block[:] = highpass.process(block)
+
+    def reduce_noise_inplace(self, work: np.ndarray):
+        """Bước giảm nhiễu (spectral subtraction hoặc noise gate cũ) tại chỗ"""
+        config = self.config
+        if not config.get('reduce_noise', True):
+            return
+
+        if config.get('noise_reduction_method', 'spectral') == 'spectral':
+            reducer = SpectralNoiseReducer(frame_size=config.get('noise_frame_size', 512))
+            reducer.reduce(work, out=work)
+        elif len(work) > 512:
+            # Noise gate cũ: ước lượng tiếng ồn từ 10% đầu của signal
+            noise_sample_length = min(len(work) // 10, 1600)  # 0.1s ở 16kHz
+            noise_estimate = float(np.std(work[:noise_sample_length]))
+            if noise_estimate > 0:
+                threshold = noise_estimate * 2.0
+                for start in range(0, len(work), BLOCK_SIZE):
+                    block = work[start:start + BLOCK_SIZE]
+                    block[np.abs(block) <= threshold] *= 0.3  # Giảm tiếng ồn xuống 30%
@@ -0,0 +1,140 @@
+"""
+Resampler - Đổi tần số lấy mẫu bằng bộ lọc polyphase windowed-sinc (NumPy)
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class PolyphaseResampler:
+    """
+    Resample tỉ lệ hữu tỉ up/down (vd. 22050 -> 16000 = 320/441).
+
+    Bộ lọc thông thấp windowed-sinc (cửa sổ Kaiser) được thiết kế 1 lần ở
+    tần số trung gian src * up và tách thành `up` pha; mỗi sample đầu ra chỉ
+    cần 1 pha (taps_per_phase hệ số) nên không bao giờ tạo tín hiệu upsample
+    đầy đủ.
+
+    Các sample đầu ra m, m + up, m + 2*up... dùng cùng 1 pha và cửa sổ đầu vào
+    cách nhau đúng `down` sample, nên mỗi lớp đồng dư là 1 phép nhân ma trận
+    trên view trượt (không copy, không fancy indexing).
+    """
+
+    def __init__(self, src_rate: int, dst_rate: int, half_taps: int = 16,
+                 rolloff: float = 0.9, beta: float = 8.6):
+        """
+        Args:
+            src_rate: Tần số gốc
+            dst_rate: Tần số đích
+            half_taps: Số tap mỗi phía của sinc, tính theo chu kỳ tần số thấp hơn
+                (lớn hơn = dải chuyển tiếp hẹp hơn, chậm hơn)
+            rolloff: Tần số cắt / Nyquist của tần số thấp hơn (chừa dải chuyển tiếp chống aliasing)
+            beta: Tham số cửa sổ Kaiser (8.6 ~ suy hao dải chặn ~85dB)
+        """
+        if src_rate <= 0 or dst_rate <= 0:
+            raise ValueError(f"Tần số không hợp lệ: {src_rate} -> {dst_rate}")
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        divisor = math.gcd(self.src_rate, self.dst_rate)
+        self.up = self.dst_rate // divisor
+        self.down = self.src_rate // divisor
+
+        # Bộ lọc nguyên mẫu ở tần số src * up
+        factor = max(self.up, self.down)
+        taps_per_phase = -(-2 * int(half_taps) * factor // self.up)
+        length = taps_per_phase * self.up
+        # Độ dài lẻ để tâm rơi đúng 1 sample của trục upsample (độ dài chẵn lệch
+        # nửa sample = 1 / (2 * up) sample gốc, với up nhỏ như 48k -> 16k là lệch pha
+        # rõ rệt); nếu length chẵn thì hệ số cuối bằng 0
+        odd = length - (1 - length % 2)
+        center = (odd - 1) // 2
+        t = (np.arange(odd) - center) / factor
+        prototype = np.zeros(length)
+        prototype[:odd] = rolloff * np.sinc(rolloff * t) * np.kaiser(odd, beta)
+        prototype *= self.up / prototype.sum()  # DC gain = 1 sau khi chèn up-1 số 0
+
+        # Pha p gồm các hệ số prototype[p + j * up], j = 0..taps_per_phase-1,
+        # lưu đảo ngược để nhân thẳng với cửa sổ đầu vào theo thứ tự thời gian
+        self.taps_per_phase = taps_per_phase
+        bank = prototype.reshape(taps_per_phase, self.up).T
+        self.bank = np.ascontiguousarray(bank[:, ::-1], dtype=np.float32)
+        self.lead = center  # Độ trễ nhóm tính theo sample của trục upsample
+        self.delay = center / self.up  # Độ trễ nhóm tính theo sample gốc
+
+    @property
+    def is_identity(self) -> bool:
+        return self.up == self.down
+
+    def output_length(self, n: int) -> int:
+        """Số sample đầu ra cho n sample đầu vào"""
+        return -(-n * self.up // self.down)
+
+    def process(self, audio: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        Resample cả tín hiệu (đã bù độ trễ nhóm, không lệch thời gian)
+
+        Args:
+            audio: Mảng 1D (int16 hoặc float)
+            out: Buffer đích (tùy chọn, dài output_length(len(audio)));
+                 dtype int16 thì kết quả được làm tròn và chặn biên
+
+        Returns:
+            Mảng đã resample (float32, hoặc chính out nếu được truyền vào)
+        """
+        n = len(audio)
+        n_out = self.output_length(n)
+        if out is None:
+            out = np.empty(n_out, dtype=np.float32)
+        if self.is_identity:
+            np.copyto(out, audio[:n_out], casting='unsafe')
+            return out
+
+        up, down, taps = self.up, self.down, self.taps_per_phase
+        # Sample đầu ra m ứng với vị trí (m * down + lead) trên trục upsample,
+        # lead bù độ trễ nhóm của bộ lọc. y[m] = sum_j h[phase + j*up] * x[base - j]
+        lead = self.lead
+        padded = np.zeros(n + 2 * taps + 1, dtype=np.float32)
+        padded[taps:taps + n] = audio
+        windows = sliding_window_view(padded, taps)  # windows[i] = padded[i:i + taps]
+
+        result = out if out.dtype == np.float32 else np.empty(n_out, dtype=np.float32)
+        for residue in range(min(up, n_out)):
+            position = residue * down + lead
+            base, phase = position // up, position % up
+            count = len(range(residue, n_out, up))
+            # Cửa sổ kết thúc tại x[base] (= padded[base + taps]), bước down mỗi lần
+            rows = windows[base + 1:base + 1 + count * down:down]
+            np.matmul(rows, self.bank[phase], out=result[residue::up])
+
+        if result is not out:
+            if out.dtype == np.int16:
+                np.rint(result, out=result)
+                np.clip(result, -32768, 32767, out=result)
+            np.copyto(out, result, casting='unsafe')
+        return out
+
+
+_resampler_cache = {}
+
+
+def resample(audio: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """
+    Resample mảng int16 sang dst_rate (giữ dtype int16, dùng lại bộ lọc đã thiết kế)
+
+    Args:
+        audio: Mảng int16 mono
+        src_rate: Tần số gốc
+        dst_rate: Tần số đích
+
+    Returns:
+        Mảng int16 ở dst_rate (chính audio nếu cùng tần số)
+    """
+    if int(src_rate) == int(dst_rate):
+        return audio
+    key = (int(src_rate), int(dst_rate))
+    resampler = _resampler_cache.get(key)
+    if resampler is None:
+        resampler = _resampler_cache[key] = PolyphaseResampler(src_rate, dst_rate)
+    out = np.empty(resampler.output_length(len(audio)), dtype=np.int16)
+    return resampler.process(audio, out=out)
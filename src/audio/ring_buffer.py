@@ -0,0 +1,180 @@
+"""
+SPSC Ring Buffer - Bộ đệm vòng 1 producer / 1 consumer không dùng lock
+"""
+import numpy as np
+
+
+class SPSCRingBuffer:
+    """
+    Bộ đệm vòng int16 cho đúng 1 producer (callback PortAudio) và 1 consumer
+    (thread ghi âm).
+
+    Không dùng lock: producer chỉ ghi _write_index, consumer chỉ ghi _read_index.
+    Index tăng đơn điệu, vị trí thực = index % capacity. Dữ liệu được copy xong
+    rồi mới cập nhật index nên phía bên kia luôn thấy dữ liệu hoàn chỉnh
+    (phép gán int là atomic dưới GIL).
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Args:
+            capacity: Số sample tối đa chứa được
+        """
+        self.capacity = max(int(capacity), 1)
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        self._write_index = 0
+        self._read_index = 0
+
+    def available(self) -> int:
+        """Số sample đang chờ consumer đọc"""
+        return self._write_index - self._read_index
+
+    def free_space(self) -> int:
+        """Số sample producer còn ghi được"""
+        return self.capacity - (self._write_index - self._read_index)
+
+    def push(self, samples: np.ndarray) -> int:
+        """
+        Producer: ghi samples vào bộ đệm (không bao giờ block)
+
+        Returns:
+            Số sample bị bỏ do bộ đệm đầy
+        """
+        count = min(len(samples), self.free_space())
+        if count > 0:
+            start = self._write_index % self.capacity
+            first = min(count, self.capacity - start)
+            self._buffer[start:start + first] = samples[:first]
+            if count > first:
+                self._buffer[:count - first] = samples[first:count]
+            self._write_index += count
+        return len(samples) - count
+
+    def pop(self, max_samples: int) -> np.ndarray:
+        """
+        Consumer: lấy tối đa max_samples sample
+
+        Returns:
+            Mảng int16 mới (có thể rỗng)
+        """
+        count = min(int(max_samples), self.available())
+        if count <= 0:
+            return np.empty(0, dtype=np.int16)
+
+        start = self._read_index % self.capacity
+        first = min(count, self.capacity - start)
+        if count > first:
+            out = np.concatenate((self._buffer[start:], self._buffer[:count - first]))
+        else:
+            out = self._buffer[start:start + count].copy()
+        self._read_index += count
+        return out
+
+    def clear(self):
+        """Consumer: bỏ toàn bộ dữ liệu đang chờ"""
+        self._read_index = self._write_index
+
+
+class PrerollRing:
+    """
+    Bộ đệm vòng GHI ĐÈ cho input stream luôn mở (warm stream).
+
+    Producer (callback) ghi liên tục, dữ liệu cũ nhất bị ghi đè, không bao giờ
+    block hay bỏ frame. Mỗi lần ghi âm tạo một PrerollReader với con trỏ đọc
+    riêng, bắt đầu lùi lại một đoạn pre-roll tính từ thời điểm nhấn hotkey.
+    """
+
+    def __init__(self, capacity: int, guard: int = 0):
+        """
+        Args:
+            capacity: Số sample lịch sử giữ lại
+            guard: Vùng đệm an toàn (>= 1 chunk callback) - reader không đọc
+                   phần dữ liệu mà producer có thể đang ghi đè
+        """
+        self.guard = max(int(guard), 0)
+        self.capacity = max(int(capacity), 1) + self.guard
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        self._write_index = 0
+
+    @property
+    def write_index(self) -> int:
+        """Tổng số sample đã ghi từ khi mở stream"""
+        return self._write_index
+
+    def push(self, samples: np.ndarray):
+        """Producer: ghi samples, ghi đè dữ liệu cũ nhất"""
+        total = len(samples)
+        if total == 0:
+            return
+        if total > self.capacity:
+            samples = samples[-self.capacity:]
+        count = len(samples)
+        start = (self._write_index + total - count) % self.capacity
+        first = min(count, self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        if count > first:
+            self._buffer[:count - first] = samples[first:]
+        self._write_index += total
+
+    def reader(self, history: int = 0) -> 'PrerollReader':
+        """
+        Tạo reader bắt đầu từ `history` sample trước vị trí ghi hiện tại
+
+        Args:
+            history: Số sample pre-roll cần lấy lại (bị giới hạn bởi capacity)
+        """
+        write_index = self._write_index
+        history = min(max(int(history), 0), self.capacity - self.guard, write_index)
+        return PrerollReader(self, write_index - history)
+
+
+class PrerollReader:
+    """Con trỏ đọc của 1 lần ghi âm trên PrerollRing (cùng interface pop/available với SPSCRingBuffer)"""
+
+    def __init__(self, ring: PrerollRing, start_index: int):
+        self.ring = ring
+        self.start_index = start_index
+        self._cursor = start_index
+        self.dropped = 0
+
+    def available(self) -> int:
+        """Số sample chưa đọc"""
+        return self.ring.write_index - self._cursor
+
+    def _skip_overwritten(self, write_index: int) -> int:
+        """Nhảy qua phần dữ liệu đã (hoặc sắp) bị ghi đè, trả về số sample bỏ qua"""
+        oldest_safe = write_index - (self.ring.capacity - self.ring.guard)
+        if self._cursor < oldest_safe:
+            skipped = oldest_safe - self._cursor
+            self._cursor = oldest_safe
+            self.dropped += skipped
+            return skipped
+        return 0
+
+    def pop(self, max_samples: int) -> np.ndarray:
+        """
+        Lấy tối đa max_samples sample kể từ con trỏ đọc
+
+        Returns:
+            Mảng int16 mới (có thể rỗng)
+        """
+        ring = self.ring
+        self._skip_overwritten(ring.write_index)
+        count = min(int(max_samples), ring.write_index - self._cursor)
+        if count <= 0:
+            return np.empty(0, dtype=np.int16)
+
+        start = self._cursor % ring.capacity
+        first = min(count, ring.capacity - start)
+        if count > first:
+            out = np.concatenate((ring._buffer[start:], ring._buffer[:count - first]))
+        else:
+            out = ring._buffer[start:start + count].copy()
+
+        # Producer có thể đã ghi đè phần đầu trong lúc copy - bỏ phần đó đi
+        cursor = self._cursor
+        skipped = self._skip_overwritten(ring.write_index)
+        self._cursor = max(self._cursor, cursor + count)
+        if skipped > 0:
+            out = out[min(skipped, len(out)):]
+        return out
@@ -0,0 +1,151 @@
+"""
+Silence Trimming - Cắt khoảng lặng đầu/cuối và rút ngắn khoảng dừng dài trước khi upload
+"""
+import numpy as np
+
+
+class SpeechTimeMap:
+    """
+    Ánh xạ thời gian giữa audio đã rút gọn và bản ghi gốc.
+
+    Lưu các đoạn được giữ lại dưới dạng mảng song song: vị trí trong audio
+    rút gọn, vị trí trong audio gốc và độ dài (đơn vị frame = 1 sample mỗi
+    kênh, nên với mono là sample).
+    """
+
+    def __init__(self, sample_rate: int, original_samples: int, pieces: list):
+        """
+        Args:
+            sample_rate: Tần số lấy mẫu
+            original_samples: Số frame của bản ghi gốc
+            pieces: Các đoạn giữ lại [(src_start, src_end), ...] (frame) đã sắp xếp, không chồng nhau
+        """
+        self.sample_rate = int(sample_rate)
+        self.original_samples = int(original_samples)
+        src = np.asarray(pieces, dtype=np.int64).reshape(-1, 2)
+        self.src_starts = src[:, 0]
+        self.lengths = src[:, 1] - src[:, 0]
+        self.out_starts = np.concatenate(([0], np.cumsum(self.lengths)[:-1])).astype(np.int64)
+
+    @classmethod
+    def identity(cls, sample_rate: int, samples: int) -> 'SpeechTimeMap':
+        """Ánh xạ 1-1 (không cắt gì)"""
+        return cls(sample_rate, samples, [(0, samples)] if samples > 0 else [])
+
+    @property
+    def kept_samples(self) -> int:
+        """Số sample sau khi rút gọn"""
+        return int(self.lengths.sum())
+
+    @property
+    def saved_seconds(self) -> float:
+        """Số giây audio không phải upload"""
+        return (self.original_samples - self.kept_samples) / float(self.sample_rate)
+
+    def to_original(self, seconds: float) -> float:
+        """
+        Đổi mốc thời gian trong audio rút gọn (vd. timestamp từ STT) về bản ghi gốc
+
+        Args:
+            seconds: Thời điểm (giây) trong audio đã rút gọn
+
+        Returns:
+            Thời điểm (giây) tương ứng trong bản ghi gốc
+        """
+        if len(self.lengths) == 0:
+            return seconds
+        sample = int(round(seconds * self.sample_rate))
+        index = int(np.searchsorted(self.out_starts, sample, side='right')) - 1
+        index = min(max(index, 0), len(self.lengths) - 1)
+        offset = min(max(sample - self.out_starts[index], 0), self.lengths[index])
+        return float(self.src_starts[index] + offset) / self.sample_rate
+
+    def to_dict(self) -> dict:
+        """Thống kê để log / metrics"""
+        return {
+            'original_seconds': round(self.original_samples / float(self.sample_rate), 3),
+            'kept_seconds': round(self.kept_samples / float(self.sample_rate), 3),
+            'saved_seconds': round(self.saved_seconds, 3),
+            'pieces': len(self.lengths)
+        }
+
+
+def plan_kept_pieces(segments: list, total_samples: int, sample_rate: int,
+                     padding_ms: float = 200.0, max_pause_ms: float = 600.0) -> list:
+    """
+    Tính các đoạn cần giữ từ ranh giới đoạn nói của VAD
+
+    Mỗi đoạn nói được nới thêm padding hai đầu; khoảng dừng giữa hai đoạn dài
+    hơn max_pause_ms được rút còn max_pause_ms (nửa đầu + nửa cuối khoảng dừng).
+
+    Args:
+        segments: Các đoạn nói [(start_sample, end_sample), ...]
+        total_samples: Độ dài bản ghi
+        sample_rate: Tần số lấy mẫu
+        padding_ms: Khoảng lặng giữ lại trước/sau mỗi đoạn nói
+        max_pause_ms: Khoảng dừng tối đa giữ lại giữa hai đoạn nói
+
+    Returns:
+        Các đoạn [(src_start, src_end), ...] đã sắp xếp, không chồng nhau
+    """
+    padding = int(sample_rate * padding_ms / 1000.0)
+    max_pause = int(sample_rate * max_pause_ms / 1000.0)
+
+    pieces = []
+    for start, end in sorted(segments):
+        start = max(int(start) - padding, 0)
+        end = min(int(end) + padding, total_samples)
+        if end <= start:
+            continue
+        if pieces:
+            prev_start, prev_end = pieces[-1]
+            gap = start - prev_end
+            if gap <= max_pause:
+                pieces[-1] = (prev_start, max(prev_end, end))
+                continue
+            # Giữ max_pause sample của khoảng dừng: nửa sau đoạn trước, nửa trước đoạn sau
+            head = max_pause // 2
+            pieces[-1] = (prev_start, prev_end + head)
+            start -= max_pause - head
+        pieces.append((start, end))
+    return pieces
+
+
+def compact_silence(audio: np.ndarray, segments: list, sample_rate: int,
+                    padding_ms: float = 200.0, max_pause_ms: float = 600.0, channels: int = 1):
+    """
+    Cắt khoảng lặng đầu/cuối và rút ngắn khoảng dừng dài
+
+    Không có đoạn nói nào (VAD không chắc chắn) thì giữ nguyên audio.
+    Với nhiều kênh, đoạn cắt luôn nằm trên ranh giới frame (không tách các
+    kênh của cùng 1 thời điểm) và SpeechTimeMap tính theo frame.
+
+    Args:
+        audio: Mảng int16 (xen kẽ nếu nhiều kênh)
+        segments: Các đoạn nói [(start_sample, end_sample), ...] trên trục sample xen kẽ
+        sample_rate: Tần số lấy mẫu
+        padding_ms: Khoảng lặng giữ lại trước/sau mỗi đoạn nói
+        max_pause_ms: Khoảng dừng tối đa giữ lại giữa hai đoạn nói
+        channels: Số kênh
+
+    Returns:
+        (audio_rút_gọn, SpeechTimeMap) - audio là view của bản gốc nếu chỉ còn 1 đoạn
+    """
+    channels = max(int(channels), 1)
+    n = len(audio) // channels
+    if segments and channels > 1:
+        # Sample xen kẽ -> frame (làm tròn ra ngoài để không cắt mất tiếng nói)
+        segments = [(int(start) // channels, -(-int(end) // channels)) for start, end in segments]
+    pieces = plan_kept_pieces(segments, n, sample_rate, padding_ms, max_pause_ms) if segments else []
+    if not pieces:
+        return audio, SpeechTimeMap.identity(sample_rate, n)
+
+    time_map = SpeechTimeMap(sample_rate, n, pieces)
+    if len(pieces) == 1:
+        start, end = pieces[0]
+        return audio[start * channels:end * channels], time_map
+
+    out = np.empty(time_map.kept_samples * channels, dtype=audio.dtype)
+    for (start, end), dst in zip(pieces, time_map.out_starts):
+        out[dst * channels:(dst + end - start) * channels] = audio[start * channels:end * channels]
+    return out, time_map
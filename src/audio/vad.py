@@ -0,0 +1,240 @@
+"""
+Voice Activity Detection - VAD theo frame (năng lượng + ZCR + spectral flatness)
+"""
+import numpy as np
+
+# Tỉ lệ zero-crossing tối thiểu của frame speech: ~2 * 64Hz / 16kHz, thấp hơn
+# F0 của giọng nam trầm nhưng cao hơn tiếng ù điện lưới 50/60Hz
+MIN_SPEECH_ZCR = 0.008
+
+# Năng lượng và flatness chỉ tính trên dải giọng nói (bỏ tiếng ù, rung tần thấp)
+SPEECH_BAND = (80.0, 4000.0)
+
+
+class VoiceActivityDetector:
+    """
+    VAD streaming chia audio thành frame 10-30ms, mỗi frame tính:
+      - Năng lượng RMS trong dải giọng nói so với ngưỡng thích nghi
+        (noise floor * energy_ratio, chặn dưới bởi min_energy)
+      - Zero-crossing rate (loại nhiễu tần thấp như tiếng ù)
+      - Spectral flatness (tiếng ồn trắng phẳng ~0.5+, giọng nói có formant thấp hơn nhiều)
+
+    Quyết định thô theo frame được làm mượt bằng onset (cần N frame speech
+    liên tiếp mới bắt đầu đoạn nói) và hangover (giữ trạng thái speech thêm
+    một khoảng sau frame speech cuối), nên khoảng lặng ngắn giữa các từ
+    không cắt đoạn nói. Mọi thời gian tính theo số sample, không theo đồng hồ.
+
+    Audio nhiều kênh (sample xen kẽ) được downmix về mono trước khi chia
+    frame; vị trí trả về (processed_samples, segments) vẫn tính trên trục
+    sample xen kẽ của capture buffer.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: float = 20.0, min_energy: float = 150.0,
+                 energy_ratio: float = 3.0, flatness_threshold: float = 0.5,
+                 onset_ms: float = 60.0, hangover_ms: float = 300.0, channels: int = 1):
+        """
+        Args:
+            sample_rate: Tần số lấy mẫu
+            frame_ms: Độ dài frame (10-30ms)
+            min_energy: Ngưỡng RMS tuyệt đối tối thiểu (int16, như silence_threshold)
+            energy_ratio: Frame speech phải có RMS >= noise floor * energy_ratio
+            flatness_threshold: Spectral flatness tối đa của frame speech
+            onset_ms: Thời gian speech liên tiếp tối thiểu để bắt đầu đoạn nói
+            hangover_ms: Thời gian giữ trạng thái speech sau frame speech cuối
+            channels: Số kênh (sample xen kẽ)
+        """
+        if not 5.0 <= frame_ms <= 50.0:
+            raise ValueError(f"frame_ms ({frame_ms}) phải trong khoảng 5-50ms")
+        self.sample_rate = int(sample_rate)
+        self.channels = max(int(channels), 1)
+        self.frame_size = max(int(self.sample_rate * frame_ms / 1000.0), 16)  # Sample mỗi kênh
+        self.min_energy = float(min_energy)
+        self.energy_ratio = float(energy_ratio)
+        self.flatness_threshold = float(flatness_threshold)
+        self.onset_frames = max(int(round(onset_ms / frame_ms)), 1)
+        self.hangover_frames = max(int(round(hangover_ms / frame_ms)), 0)
+
+        bin_hz = self.sample_rate / float(self.frame_size)
+        last = self.frame_size // 2 + 1
+        self._band = slice(min(max(int(np.ceil(SPEECH_BAND[0] / bin_hz)), 1), last - 1),
+                           min(int(SPEECH_BAND[1] / bin_hz) + 1, last))
+        self.reset()
+
+    @classmethod
+    def from_config(cls, sample_rate: int, audio_config: dict) -> 'VoiceActivityDetector':
+        """Tạo VAD từ cấu hình audio (silence_threshold + mục vad)"""
+        vad_config = audio_config.get('vad', {})
+        return cls(
+            sample_rate,
+            frame_ms=vad_config.get('frame_ms', 20.0),
+            min_energy=audio_config.get('silence_threshold', 150),
+            energy_ratio=vad_config.get('energy_ratio', 3.0),
+            flatness_threshold=vad_config.get('flatness_threshold', 0.5),
+            onset_ms=vad_config.get('onset_ms', 60.0),
+            hangover_ms=vad_config.get('hangover_ms', 300.0),
+            channels=audio_config.get('channels', 1)
+        )
+
+    def reset(self):
+        """Xóa trạng thái cho lần ghi mới"""
+        self._pending = np.empty(0, dtype=np.int16)
+        self._frame_index = 0         # Số frame đã phân loại
+        self._noise_floor = self.min_energy / max(self.energy_ratio, 1e-6)
+        self._in_speech = False
+        self._onset_run = 0           # Số frame speech thô liên tiếp
+        self._silence_run = 0         # Số frame không phải speech từ frame speech cuối
+        self._segment_start = 0       # Frame bắt đầu đoạn nói đang mở
+        self._last_speech = -1        # Frame speech thô cuối cùng
+        self._segments = []           # Các đoạn đã đóng (start_frame, end_frame)
+
+    @property
+    def in_speech(self) -> bool:
+        """Đang trong đoạn nói (đã qua onset, chưa hết hangover)"""
+        return self._in_speech
+
+    @property
+    def speech_detected(self) -> bool:
+        """Đã có ít nhất 1 đoạn nói"""
+        return self._in_speech or bool(self._segments)
+
+    @property
+    def processed_samples(self) -> int:
+        """Số sample (xen kẽ) đã được phân loại (không tính phần chưa đủ 1 frame)"""
+        return self._frame_index * self.frame_size * self.channels
+
+    @property
+    def trailing_silence(self) -> float:
+        """Số giây không có speech tính tới frame cuối (cả khi chưa nói gì)"""
+        frames = self._frame_index - (self._last_speech + 1)
+        return frames * self.frame_size / float(self.sample_rate)
+
+    @property
+    def noise_floor(self) -> float:
+        """RMS nền ước lượng hiện tại"""
+        return self._noise_floor
+
+    def frame_features(self, frames: np.ndarray):
+        """
+        Đặc trưng của các frame (vector hóa)
+
+        Args:
+            frames: Mảng (n_frames, frame_size)
+
+        Returns:
+            (rms, zcr, flatness) - mỗi mảng dài n_frames; rms và flatness
+            tính trên SPEECH_BAND
+        """
+        x = frames.astype(np.float32)
+        n = x.shape[1]
+
+        signs = np.signbit(x)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / float(n - 1)
+
+        power = np.abs(np.fft.rfft(x, axis=1)[:, self._band])
+        power *= power
+        power += 1e-10
+
+        # Parseval: mỗi bin trong dải (không phải DC/Nyquist) đóng góp 2|X|^2 / n^2
+        rms = np.sqrt(2.0 * power.sum(axis=1, dtype=np.float64)) / n
+
+        # Spectral flatness = trung bình nhân / trung bình cộng của phổ công suất
+        flatness = np.exp(np.log(power).mean(axis=1)) / power.mean(axis=1)
+        return rms, zcr, flatness
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        """
+        Phân loại các frame đầy đủ trong chunk (phần dư được giữ cho chunk sau)
+
+        Args:
+            chunk: Mảng int16 (xen kẽ nếu nhiều kênh)
+
+        Returns:
+            Mảng bool quyết định đã làm mượt của từng frame mới
+        """
+        if len(self._pending):
+            chunk = np.concatenate((self._pending, chunk))
+        step = self.frame_size * self.channels
+        n_frames = len(chunk) // step
+        used = n_frames * step
+        self._pending = np.array(chunk[used:], dtype=np.int16)
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+
+        if self.channels > 1:
+            # Downmix: trung bình các kênh của từng sample
+            frames = chunk[:used].reshape(n_frames, self.frame_size, self.channels)
+            frames = frames.mean(axis=2, dtype=np.float32)
+        else:
+            frames = chunk[:used].reshape(n_frames, self.frame_size)
+        rms, zcr, flatness = self.frame_features(frames)
+        decisions = np.empty(n_frames, dtype=bool)
+        for i in range(n_frames):
+            decisions[i] = self._update(rms[i], zcr[i], flatness[i])
+        return decisions
+
+    def _update(self, rms: float, zcr: float, flatness: float) -> bool:
+        """Cập nhật state machine onset/hangover với 1 frame, trả về trạng thái sau frame"""
+        index = self._frame_index
+        self._frame_index += 1
+
+        threshold = max(self.min_energy, self._noise_floor * self.energy_ratio)
+        raw_speech = (rms >= threshold and flatness <= self.flatness_threshold
+                      and zcr >= MIN_SPEECH_ZCR)
+
+        if raw_speech:
+            self._last_speech = index
+            self._onset_run += 1
+            self._silence_run = 0
+            if not self._in_speech and self._onset_run >= self.onset_frames:
+                self._in_speech = True
+                self._segment_start = index - self._onset_run + 1
+        else:
+            self._onset_run = 0
+            # Noise floor: bám ngay xuống giá trị nhỏ hơn, tăng chậm (EMA)
+            if rms < self._noise_floor:
+                self._noise_floor = rms
+            else:
+                self._noise_floor += 0.05 * (rms - self._noise_floor)
+            if self._in_speech:
+                self._silence_run += 1
+                if self._silence_run > self.hangover_frames:
+                    self._in_speech = False
+                    self._segments.append((self._segment_start, self._last_speech + 1))
+        return self._in_speech
+
+    def segments(self, include_open: bool = True) -> list:
+        """
+        Các đoạn nói theo sample (xen kẽ) [(start, end), ...]
+
+        Args:
+            include_open: Tính cả đoạn đang mở (kết thúc ở frame speech cuối)
+        """
+        frames = list(self._segments)
+        if include_open and self._in_speech:
+            frames.append((self._segment_start, self._last_speech + 1))
+        step = self.frame_size * self.channels
+        return [(start * step, end * step) for start, end in frames]
+
+    def finalize(self) -> list:
+        """Đóng đoạn nói đang mở và trả về toàn bộ đoạn nói theo sample"""
+        if self._in_speech:
+            self._segments.append((self._segment_start, self._last_speech + 1))
+            self._in_speech = False
+        return self.segments(include_open=False)
+
+
+def detect_speech_segments(audio: np.ndarray, sample_rate: int, **kwargs) -> list:
+    """
+    Phát hiện các đoạn nói của cả 1 clip int16
+
+    Args:
+        audio: Mảng int16 (xen kẽ nếu nhiều kênh, truyền channels=...)
+        sample_rate: Tần số lấy mẫu
+        **kwargs: Tham số của VoiceActivityDetector
+
+    Returns:
+        Danh sách (start_sample, end_sample)
+    """
+    vad = VoiceActivityDetector(sample_rate, **kwargs)
+    vad.process(audio)
+    return vad.finalize()
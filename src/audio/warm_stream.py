@@ -0,0 +1,110 @@
+"""
+Warm Input Stream - Input stream luôn mở với bộ đệm pre-roll
+"""
+import time
+
+import numpy as np
+
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None
+
+from .capture_stats import CaptureStats
+from .ring_buffer import PrerollRing, PrerollReader
+
+
+class WarmInputStream:
+    """
+    Giữ input stream PyAudio luôn mở khi idle, callback ghi liên tục vào
+    PrerollRing. Nhấn hotkey chỉ cần đánh dấu vị trí bắt đầu (lùi lại một
+    đoạn pre-roll) thay vì mở device mới (50-200ms), nên không mất âm tiết đầu.
+    """
+
+    def __init__(self, audio, stream_params: dict, history_seconds: float,
+                 stats: CaptureStats = None):
+        """
+        Args:
+            audio: Instance pyaudio.PyAudio
+            stream_params: Tham số cho audio.open() (format, channels, rate...)
+            history_seconds: Độ dài lịch sử giữ trong ring (>= pre-roll + độ trễ đọc)
+            stats: CaptureStats để ghi nhận overflow/jitter
+        """
+        self.audio = audio
+        self.stream_params = dict(stream_params)
+        self.sample_rate = int(stream_params['rate'])
+        self.channels = int(stream_params['channels'])
+        self.stats = stats or CaptureStats()
+
+        guard = int(stream_params.get('frames_per_buffer', 1024)) * self.channels * 2
+        self.ring = PrerollRing(int(history_seconds * self.sample_rate) * self.channels, guard=guard)
+
+        self.stream = None
+        self._opened_at = None
+        self._busy_seconds = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """Stream đang mở"""
+        return self.stream is not None
+
+    def open(self):
+        """Mở stream (gọi 1 lần khi khởi động)"""
+        if self.stream is not None:
+            return
+        params = dict(self.stream_params)
+        params['stream_callback'] = self._callback
+        self._busy_seconds = 0.0
+        self._opened_at = time.perf_counter()
+        self.stream = self.audio.open(**params)
+
+    def _callback(self, in_data, frame_count, time_info, status_flags):
+        """PortAudio callback - chỉ ghi vào ring và đếm thống kê"""
+        started = time.perf_counter()
+        try:
+            if in_data:
+                self.ring.push(np.frombuffer(in_data, dtype=np.int16))
+            overflow = bool(status_flags & pyaudio.paInputOverflow)
+            self.stats.record_callback(frame_count, self.sample_rate, overflow, now=started)
+        except Exception:
+            pass
+        self._busy_seconds += time.perf_counter() - started
+        return (None, pyaudio.paContinue)
+
+    def open_reader(self, preroll_seconds: float) -> PrerollReader:
+        """
+        Đánh dấu điểm bắt đầu ghi âm (bao gồm pre-roll)
+
+        Returns:
+            PrerollReader có pop()/available() như SPSCRingBuffer
+        """
+        return self.ring.reader(int(preroll_seconds * self.sample_rate) * self.channels)
+
+    def cpu_percent(self) -> float:
+        """Tỉ lệ thời gian nằm trong callback so với thời gian mở stream (%)"""
+        if self._opened_at is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._opened_at
+        if elapsed <= 0:
+            return 0.0
+        return self._busy_seconds / elapsed * 100.0
+
+    def get_stats(self) -> dict:
+        """Thống kê chi phí idle của warm stream"""
+        uptime = 0.0 if self._opened_at is None else time.perf_counter() - self._opened_at
+        return {
+            'is_open': self.is_open,
+            'uptime_s': round(uptime, 1),
+            'callback_busy_s': round(self._busy_seconds, 3),
+            'callback_cpu_percent': round(self.cpu_percent(), 3)
+        }
+
+    def close(self):
+        """Đóng stream và giải phóng device"""
+        stream = self.stream
+        self.stream = None
+        if stream is not None:
+            try:
+                stream.stop_stream()
+            finally:
+                stream.close()
@@ -1,6 +1,13 @@
 """
 Core package - Core application logic
 """
-from .app import VoiceToTextApp
-
 __all__ = ['VoiceToTextApp']
+
+
+def __getattr__(name):
+    # Import app khi cần: app.py đòi PyAudio / GUI, còn transcription_pool,
+    # segmented, speculative... thì không (import được riêng, vd. trong test)
+    if name == 'VoiceToTextApp':
+        from .app import VoiceToTextApp
+        return VoiceToTextApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,14 @@
 """
 Voice to Text Application - Main application logic
 """
+import functools
 import json
 import logging
 import os
 import threading
 import time
-import tempfile
-import wave
 import queue
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 try:
@@ -21,9 +21,19 @@ except ImportError as e:
     import sys
     sys.exit(1)
 
-from ..services import GroqSTTService, VietnameseTextCorrector
+from ..audio import (CaptureBuffer, CaptureStats, SPSCRingBuffer, WarmInputStream, StreamingEnhancer,
+                     EnhancementPipeline, FeatureExtractor, FeatureTimeline, VoiceActivityDetector)
+from ..audio.features import RMS, features_to_dict, wave_level
+from ..audio.trim import SpeechTimeMap, compact_silence
+from ..audio.resample import resample
+from ..audio.encoders import UploadEncoder, create_encoder
+from ..services import GroqSTTService, STTRouter, LatencyHistogram, VietnameseTextCorrector
 from ..gui import ModernVoiceOverlay
 from .hotkey_manager import HotkeyManager
+from .recording_session import RecordingSession
+from .segmented import SegmentedTranscription, shift_segments
+from .speculative import SpeculativeTranscription, SpeculationStats
+from .transcription_pool import TranscriptionJob, TranscriptionPool
 
 
 class VoiceToTextApp:
@@ -37,12 +47,18 @@ class VoiceToTextApp:
         self.logger = logging.getLogger(__name__)
         self.logger.info("[START] Initializing Voice to Text Application")
         
-        # Audio recording
+        # Audio recording - trạng thái của lần ghi đang chạy nằm trong RecordingSession
         self.audio = None
-        self.stream = None
         self.is_recording = False
-        self.audio_data = []
-        self.recording_thread = None
+        self.recording = None
+        self._stop_lock = threading.Lock()
+
+        # Callback capture mode (stream_callback -> SPSC ring -> recording thread)
+        self.capture_mode = self.config.get('audio', {}).get('capture_mode', 'blocking')
+        self.capture_stats = CaptureStats()
+
+        # Warm stream: giữ input stream mở khi idle + pre-roll
+        self.warm_stream = None
         
         # Speech recognition - Chỉ dùng Groq STT
         self.remote_stt = None
@@ -71,8 +87,36 @@ class VoiceToTextApp:
 
         # Audio visualization
         self.current_audio_level = 0
-        self.total_audio_energy = 0
-        self.audio_samples_count = 0
+
+        # Đặc trưng theo chunk (RMS, peak, clip, ZCR, dải tần) dùng chung cho wave/VAD/energy gate
+        self.feature_extractor = FeatureExtractor(self._capture_rate())
+        self.last_feature_timeline = None
+
+        # VAD theo frame (onset/hangover) - dùng cho auto-stop và ranh giới đoạn nói
+        self.last_speech_segments = []
+
+        # Cắt khoảng lặng trước khi upload + thống kê số giây tiết kiệm
+        self.last_time_map = None
+        self.trim_stats = {'requests': 0, 'original_seconds': 0.0,
+                           'uploaded_seconds': 0.0, 'saved_seconds': 0.0}
+        self.trim_stats_lock = threading.Lock()
+
+        # Nhận dạng từng đoạn song song trong lúc ghi (bản ghi dài) + độ trễ
+        # thả phím -> dán theo độ dài clip
+        self.segment_executor = None
+        self.release_latency = LatencyHistogram()
+
+        # Nhận dạng thử khi người nói dừng lâu mà vẫn giữ hotkey
+        self.speculation_stats = SpeculationStats()
+
+        # Worker pool cố định cho các lần ghi, dán kết quả đúng thứ tự ghi
+        pool_config = self.config.get('stt', {}).get('transcription_pool', {})
+        self.transcription_pool = TranscriptionPool(
+            self._process_audio, self._deliver_transcription,
+            max_workers=pool_config.get('max_workers', 2),
+            max_pending=pool_config.get('max_pending', 4),
+            submit_timeout=pool_config.get('submit_timeout', 2.0)
+        )
 
         # Text correction
         self.text_corrector = None
@@ -100,7 +144,43 @@ class VoiceToTextApp:
                     "gsk_xxx",
                     "gsk_xxx"
                 ],
-                "timeout": 30
+                "timeout": 30,
+                "pool_size": 4,
+                "prewarm_connection": True,
+                "key_rpm": None,
+                "max_key_wait": 2.0,
+                "max_network_retries": 1,
+                "key_state_file": "key_state.json",
+                "hedge": {
+                    "enabled": False,
+                    "percentile": 95,
+                    "min_delay_ms": 500,
+                    "max_workers": None
+                },
+                "adaptive_timeout": False,
+                "deadline_seconds": None,
+                "segmented": {
+                    "enabled": False,
+                    "min_segment_seconds": 6.0,
+                    "min_pause_ms": 400,
+                    "max_parallel": 3
+                },
+                "speculative": {
+                    "enabled": False,
+                    "min_pause_ms": 700
+                },
+                "transcription_pool": {
+                    "max_workers": 2,
+                    "max_pending": 4,
+                    "submit_timeout": 2.0
+                },
+                "endpoints": [],
+                "routing": {
+                    "ewma_alpha": 0.3,
+                    "error_penalty": 4.0,
+                    "error_half_life": 60.0,
+                    "explore_after": 300.0
+                }
             },
             "hotkey": {
                 "key": "ctrl+alt",
@@ -108,6 +188,8 @@ class VoiceToTextApp:
             },
             "audio": {
                 "sample_rate": 16000,
+                "upload_sample_rate": 16000,
+                "upload_format": "wav",
                 "channels": 1,
                 "chunk_size": 2048,
                 "format": "int16",
@@ -116,13 +198,32 @@ class VoiceToTextApp:
                 "silence_duration": 3.0,
                 "max_recording_time": 30.0,
                 "min_recording_time": 1.0,
+                "capture_mode": "blocking",
+                "callback_buffer_seconds": 2.0,
+                "warm_stream": False,
+                "preroll_ms": 400,
                 "noise_reduction": False,
                 "auto_gain": False,
                 "voice_activity_detection": False,
+                "vad": {
+                    "frame_ms": 20,
+                    "energy_ratio": 3.0,
+                    "flatness_threshold": 0.5,
+                    "onset_ms": 60,
+                    "hangover_ms": 300
+                },
+                "trim_silence": {
+                    "enabled": False,
+                    "padding_ms": 200,
+                    "max_pause_ms": 600
+                },
                 "audio_enhancement": {
                     "enabled": False,
+                    "streaming": False,
                     "normalize_volume": False,
                     "reduce_noise": False,
+                    "noise_reduction_method": "spectral",
+                    "noise_frame_size": 512,
                     "enhance_speech": False,
                     "apply_filter": False
                 }
@@ -208,6 +309,55 @@ class VoiceToTextApp:
         print("[INFO] Using default config")
         return default_config
     
+    def _create_capture_buffer(self) -> CaptureBuffer:
+        """Tạo bộ đệm ghi âm cấp phát trước theo max_recording_time"""
+        audio_config = self.config.get('audio', {})
+        sample_rate = self._capture_rate()
+        extra_frames = audio_config.get('chunk_size', 2048)
+        if audio_config.get('warm_stream', False):
+            extra_frames += int(audio_config.get('preroll_ms', 400) / 1000.0 * sample_rate)
+        return CaptureBuffer(
+            max_seconds=audio_config.get('max_recording_time', 30.0),
+            sample_rate=sample_rate,
+            channels=audio_config.get('channels', 1),
+            extra_frames=extra_frames
+        )
+
+    def _capture_rate(self) -> int:
+        """Tần số ghi âm (16000 tạm thời nếu "native" chưa được phân giải)"""
+        sample_rate = self.config.get('audio', {}).get('sample_rate', 16000)
+        return sample_rate if isinstance(sample_rate, int) else 16000
+
+    def _resolve_capture_rate(self):
+        """
+        sample_rate = "native": ghi ở tần số mặc định của thiết bị (tránh resample
+        trong driver), audio được đưa về upload_sample_rate trước khi upload
+        """
+        audio_config = self.config['audio']
+        if audio_config.get('sample_rate') != 'native':
+            return
+        try:
+            device_index = audio_config.get('input_device_index')
+            if device_index is not None:
+                info = self.audio.get_device_info_by_index(device_index)
+            else:
+                info = self.audio.get_default_input_device_info()
+            sample_rate = int(info['defaultSampleRate'])
+        except Exception as e:
+            sample_rate = audio_config.get('upload_sample_rate', 16000)
+            print(f"[WARNING] Cannot read device sample rate, using {sample_rate}Hz: {e}")
+
+        audio_config['sample_rate'] = sample_rate
+        self.feature_extractor = FeatureExtractor(sample_rate)
+        print(f"[AUDIO] Native capture rate: {sample_rate}Hz")
+
+    def _create_stream_enhancer(self, capacity: int) -> Optional[StreamingEnhancer]:
+        """Tạo bộ cải thiện audio streaming cho 1 lần ghi (None nếu không bật)"""
+        enhancement_config = self.config['audio'].get('audio_enhancement', {})
+        if not enhancement_config.get('enabled', True) or not enhancement_config.get('streaming', False):
+            return None
+        return StreamingEnhancer(enhancement_config, capacity)
+
     def _setup_logging(self):
         """Thiết lập logging"""
         log_config = self.config.get('logging', {})
@@ -250,6 +400,12 @@ class VoiceToTextApp:
                 print("   4. Cài đặt lại: pip install pyaudio")
                 self.audio = None
                 raise audio_error
+
+            self._resolve_capture_rate()
+
+            # Mở sẵn input stream nếu bật warm stream
+            if self.config['audio'].get('warm_stream', False):
+                self._open_warm_stream()
             
             # Khởi tạo Groq STT
             print("[AI] Initializing Groq STT...")
@@ -283,7 +439,7 @@ class VoiceToTextApp:
             raise
     
     def _init_groq_stt(self):
-        """Khởi tạo Groq STT Service"""
+        """Khởi tạo Groq STT Service (hoặc STTRouter nếu cấu hình nhiều endpoint)"""
         stt_cfg = self.config.get('stt', {})
         
         try:
@@ -292,7 +448,27 @@ class VoiceToTextApp:
             api_key_env = stt_cfg.get('api_key_env', 'GROQ_API_KEY')
             api_key = stt_cfg.get('api_key', None)
             api_keys = stt_cfg.get('api_keys', None)
-            timeout = int(stt_cfg.get('timeout', 60))
+            hedge_cfg = stt_cfg.get('hedge', {})
+            hedge_percentile = hedge_cfg.get('percentile', 95) if hedge_cfg.get('enabled', False) else None
+
+            # Tùy chọn chung cho mọi endpoint
+            service_options = {
+                'timeout': int(stt_cfg.get('timeout', 60)),
+                'pool_size': int(stt_cfg.get('pool_size', 4)),
+                'key_rpm': stt_cfg.get('key_rpm', None),
+                'max_key_wait': float(stt_cfg.get('max_key_wait', 2.0)),
+                'max_network_retries': int(stt_cfg.get('max_network_retries', 1)),
+                'state_file': stt_cfg.get('key_state_file', 'key_state.json'),
+                'hedge_percentile': hedge_percentile,
+                'hedge_min_delay': hedge_cfg.get('min_delay_ms', 500) / 1000.0,
+                'hedge_max_workers': hedge_cfg.get('max_workers', None),
+                'adaptive_timeout': stt_cfg.get('adaptive_timeout', False)
+            }
+
+            endpoints = stt_cfg.get('endpoints') or []
+            if endpoints:
+                self.remote_stt = self._create_stt_router(endpoints, model, service_options)
+                return
             
             self.remote_stt = GroqSTTService(
                 api_base=api_base, 
@@ -300,7 +476,7 @@ class VoiceToTextApp:
                 api_key_env=api_key_env,
                 api_key=api_key,
                 api_keys=api_keys,
-                timeout=timeout
+                **service_options
             )
             
             print(f"[OK] Using Groq Whisper STT: {model}")
@@ -310,6 +486,40 @@ class VoiceToTextApp:
             self.logger.error(f"[ERROR] Groq STT init error: {e}")
             raise
     
+    def _create_stt_router(self, endpoints: list, default_model: str, service_options: dict) -> STTRouter:
+        """
+        Tạo STTRouter từ stt.endpoints: mỗi phần tử {name, api_base, model,
+        api_key_env, api_key, api_keys}. Endpoint không có key bị bỏ qua.
+        """
+        routes = []
+        for index, endpoint in enumerate(endpoints):
+            name = endpoint.get('name') or f"endpoint-{index + 1}"
+            try:
+                service = GroqSTTService(
+                    api_base=endpoint['api_base'],
+                    model=endpoint.get('model', default_model),
+                    api_key_env=endpoint.get('api_key_env', ''),
+                    api_key=endpoint.get('api_key'),
+                    api_keys=endpoint.get('api_keys'),
+                    **service_options
+                )
+            except (KeyError, ValueError) as e:
+                print(f"[WARNING] Skipping STT endpoint '{name}': {e}")
+                continue
+            routes.append((name, service))
+            print(f"[OK] STT endpoint '{name}': {service.api_base} ({service.model})")
+
+        routing_cfg = self.config.get('stt', {}).get('routing', {})
+        router = STTRouter(
+            routes,
+            alpha=routing_cfg.get('ewma_alpha', 0.3),
+            error_penalty=routing_cfg.get('error_penalty', 4.0),
+            error_half_life=routing_cfg.get('error_half_life', 60.0),
+            explore_after=routing_cfg.get('explore_after', 300.0)
+        )
+        self.logger.info(f"[OK] STT routing across {len(routes)} endpoint(s)")
+        return router
+
     def _setup_gui(self):
         """Thiết lập GUI - KHÔNG CẦN ROOT WINDOW"""
         try:
@@ -368,6 +578,13 @@ class VoiceToTextApp:
             except Exception as e:
                 print(f"[ERROR] Error showing GUI: {e}")
         
+        # Mở sẵn kết nối tới Groq trong lúc người dùng đang nói
+        if self.config.get('stt', {}).get('prewarm_connection', True) and self.remote_stt:
+            try:
+                self.remote_stt.prewarm()
+            except Exception as e:
+                self.logger.debug(f"Pre-warm error: {e}")
+
         # Start recording
         self._start_recording()
     
@@ -416,7 +633,8 @@ class VoiceToTextApp:
                     self._show_error_gui_safe(error)
                 elif action == "update_wave":
                     level = args[0] if args else 0
-                    self._update_wave_safe(level)
+                    features = args[1] if len(args) > 1 else None
+                    self._update_wave_safe(level, features)
 
         except queue.Empty:
             pass
@@ -464,7 +682,7 @@ class VoiceToTextApp:
         """Thread-safe version of show error GUI"""
         pass  # Implement if needed
 
-    def _update_wave_safe(self, level: float):
+    def _update_wave_safe(self, level: float, features: Optional[dict] = None):
         """Thread-safe version of update wave visualization - CỰC QUAN TRỌNG"""
         if hasattr(self, 'overlay') and self.overlay:
             try:
@@ -476,7 +694,7 @@ class VoiceToTextApp:
                     return
                 
                 # Cập nhật wave data - animation loop sẽ tự động vẽ lại
-                self.overlay.update_wave_data(level)
+                self.overlay.update_wave_data(level, features)
             except Exception as e:
                 # Chỉ in lỗi quan trọng
                 if "wave" in str(e).lower():
@@ -494,48 +712,75 @@ class VoiceToTextApp:
             print("[TIP] Please khởi động lại ứng dụng")
             return
 
+        # Backpressure: đã có quá nhiều lần ghi chờ nhận dạng / dán
+        if self.transcription_pool.is_full:
+            self.logger.warning("[QUEUE] Quá nhiều bản ghi đang chờ nhận dạng, bỏ qua lần ghi mới")
+            print(f"[QUEUE] Busy: {self.transcription_pool.pending} recordings pending - wait a moment")
+            if self.gui_enabled:
+                try:
+                    self.gui_queue.put(("show_error", "Đang xử lý bản ghi trước, thử lại sau"))
+                except Exception:
+                    pass
+            return
+
         try:
             audio_config = self.config['audio']
-
-            # Lấy input device index từ config (nếu có)
-            input_device_index = audio_config.get('input_device_index', None)
-            
-            stream_params = {
-                'format': pyaudio.paInt16,
-                'channels': audio_config['channels'],
-                'rate': audio_config['sample_rate'],
-                'input': True,
-                'frames_per_buffer': audio_config['chunk_size']
-            }
-            
-            # Chỉ định device nếu có trong config
-            if input_device_index is not None:
-                stream_params['input_device_index'] = input_device_index
-                print(f"[MIC] Using audio device index: {input_device_index}")
-            else:
-                print("[MIC] Using default audio device")
-                print("[TIP] Để chọn thiết bị cụ thể, chạy: python check_audio_devices.py")
-
-            self.stream = self.audio.open(**stream_params)
-            print("[DEBUG] Audio stream created successfully")
-
-            self.is_recording = True
-            print(f"[DEBUG] is_recording = {self.is_recording}")
-            
-            self.audio_data = []
-            print("[DEBUG] audio_data initialized")
-
-            # Reset audio energy tracking
-            self.total_audio_energy = 0
-            self.audio_samples_count = 0
-            print("[DEBUG] Audio energy tracking reset")
+            stream_params = self._build_stream_params()
+
+            # Bộ đệm mới cho lần ghi này (mảng chỉ được cấp phát ở reset())
+            buffer = self._create_capture_buffer()
+            buffer.reset()
+            ring = None
+            stream = None
+
+            # Warm stream: stream đã mở sẵn, chỉ đánh dấu điểm bắt đầu (gồm pre-roll)
+            if self.warm_stream is not None and not self.warm_stream.is_open:
+                self._open_warm_stream()
+            if self.warm_stream is not None and self.warm_stream.is_open:
+                self.capture_stats.reset()
+                preroll_seconds = audio_config.get('preroll_ms', 400) / 1000.0
+                ring = self.warm_stream.open_reader(preroll_seconds)
+                print(f"[MIC] Warm stream: recording starts with {preroll_seconds * 1000:.0f}ms pre-roll")
+            # Chế độ callback: PortAudio đẩy frame vào SPSC ring, không block
+            elif self.capture_mode == 'callback':
+                ring_seconds = audio_config.get('callback_buffer_seconds', 2.0)
+                ring = SPSCRingBuffer(
+                    int(ring_seconds * audio_config['sample_rate']) * audio_config['channels']
+                )
+                self.capture_stats.reset()
+                stream_params['stream_callback'] = functools.partial(self._audio_callback, ring)
+                print("[MIC] Capture mode: callback")
+
+            if self.warm_stream is None or not self.warm_stream.is_open:
+                stream = self.audio.open(**stream_params)
+                print("[DEBUG] Audio stream created successfully")
+
+            session = RecordingSession(
+                buffer, ring=ring, stream=stream,
+                enhancer=self._create_stream_enhancer(buffer.capacity),
+                # Timeline đặc trưng mới cho lần ghi này
+                timeline=FeatureTimeline(buffer.capacity // max(audio_config['chunk_size'], 1) + 1),
+                # VAD mới cho lần ghi này (luôn chạy để có ranh giới đoạn nói)
+                vad=VoiceActivityDetector.from_config(audio_config['sample_rate'], audio_config),
+                # Encode-as-you-record (chỉ khi audio ghi được upload nguyên trạng)
+                upload_encoder=self._create_streaming_encoder(),
+                # Cắt đoạn tại khoảng dừng và nhận dạng song song trong lúc ghi
+                segmented=self._create_segmented(),
+                # Nhận dạng thử khi người nói dừng lâu mà vẫn giữ hotkey
+                speculation=self._create_speculation()
+            )
+            print("[DEBUG] Recording session initialized")
 
             # Bắt đầu thread ghi âm
             print("[DEBUG] Creating recording thread...")
-            self.recording_thread = threading.Thread(target=self._recording_loop)
-            self.recording_thread.daemon = True
+            session.thread = threading.Thread(target=self._recording_loop, args=(session,))
+            session.thread.daemon = True
+            with self._stop_lock:
+                self.recording = session
+                self.is_recording = True
+            print(f"[DEBUG] is_recording = {self.is_recording}")
             print("[DEBUG] Starting recording thread...")
-            self.recording_thread.start()
+            session.thread.start()
             print("[DEBUG] Recording thread started")
 
             self.logger.info("[MIC] Bắt đầu ghi âm...")
@@ -547,46 +792,91 @@ class VoiceToTextApp:
             print(f"[ERROR] Lỗi bắt đầu ghi âm: {e}")
             import traceback
             traceback.print_exc()
-            self.is_recording = False
+            with self._stop_lock:
+                self.recording = None
+                self.is_recording = False
             # Ẩn GUI nếu có lỗi
             if self.gui_enabled:
                 self._hide_gui()
     
-    def _recording_loop(self):
-        """Vòng lặp ghi âm"""
+    def _build_stream_params(self) -> dict:
+        """Tạo tham số mở input stream từ config"""
+        audio_config = self.config['audio']
+
+        # Lấy input device index từ config (nếu có)
+        input_device_index = audio_config.get('input_device_index', None)
+
+        stream_params = {
+            'format': pyaudio.paInt16,
+            'channels': audio_config['channels'],
+            'rate': audio_config['sample_rate'],
+            'input': True,
+            'frames_per_buffer': audio_config['chunk_size']
+        }
+
+        # Chỉ định device nếu có trong config
+        if input_device_index is not None:
+            stream_params['input_device_index'] = input_device_index
+            print(f"[MIC] Using audio device index: {input_device_index}")
+        else:
+            print("[MIC] Using default audio device")
+            print("[TIP] Để chọn thiết bị cụ thể, chạy: python check_audio_devices.py")
+
+        return stream_params
+
+    def _open_warm_stream(self):
+        """Mở input stream luôn bật (warm) - lỗi thì quay về mở stream mỗi lần ghi"""
+        audio_config = self.config['audio']
+        try:
+            if self.warm_stream is None:
+                preroll_seconds = audio_config.get('preroll_ms', 400) / 1000.0
+                history_seconds = preroll_seconds + audio_config.get('callback_buffer_seconds', 2.0)
+                self.warm_stream = WarmInputStream(
+                    self.audio, self._build_stream_params(), history_seconds, self.capture_stats
+                )
+            self.warm_stream.open()
+            print(f"[MIC] Warm input stream opened (pre-roll {audio_config.get('preroll_ms', 400)}ms)")
+            self.logger.info("[MIC] Warm input stream opened")
+        except Exception as e:
+            print(f"[WARNING] Cannot open warm input stream: {e}")
+            self.logger.warning(f"[WARNING] Cannot open warm input stream: {e}")
+            self.warm_stream = None
+
+    def _recording_loop(self, session: RecordingSession):
+        """Vòng lặp ghi âm - chỉ dùng session của lần ghi này"""
         audio_config = self.config['audio']
-        silence_start = None
         recording_start = time.time()
         
-        while self.is_recording:
+        while self.recording is session:
             try:
                 # Kiểm tra stream hợp lệ
-                if not self.stream:
+                if not session.stream and session.ring is None:
                     self.logger.error("[ERROR] Stream đã được đóng hoặc chưa khởi tạo")
                     break
                     
-                data = self.stream.read(audio_config['chunk_size'], exception_on_overflow=False)
-                self.audio_data.append(data)
+                if session.ring is not None:
+                    # Callback mode: lấy frame từ SPSC ring, chờ ngắn nếu chưa có
+                    data = session.ring.pop(audio_config['chunk_size'] * audio_config['channels'])
+                    if len(data) == 0:
+                        time.sleep(0.005)
+                        continue
+                else:
+                    data = session.stream.read(audio_config['chunk_size'], exception_on_overflow=False)
                 
-                # Calculate audio level for visualization
-                audio_array = np.frombuffer(data, dtype=np.int16)
-                if len(audio_array) > 0:
+                # Ghi thẳng vào bộ đệm cấp phát trước + trích xuất đặc trưng 1 lần
+                features = self._store_chunk(session, data)
+                if features is not None:
                     # RMS (Root Mean Square) cho độ chính xác cao hơn
-                    volume = np.sqrt(np.mean(audio_array.astype(np.float32)**2))
+                    volume = features[RMS]
                     
                     # Normalize volume for visualization (0-1) - Tăng sensitivity
-                    # Sử dụng scale factor thấp hơn để wave nhạy hơn
-                    normalized_volume = min(volume / 500.0, 1.0)  # Giảm từ 1000 xuống 500
+                    normalized_volume = wave_level(volume)
                     self.current_audio_level = normalized_volume
 
-                    # Track total audio energy
-                    self.total_audio_energy += volume
-                    self.audio_samples_count += 1
-
                     # Send audio level to GUI - QUAN TRỌNG cho hiệu ứng wave
                     if self.gui_enabled:
                         try:
-                            self.gui_queue.put(("update_wave", normalized_volume))
+                            self.gui_queue.put(("update_wave", normalized_volume, features_to_dict(features)))
                             # Chỉ log khi có âm thanh đáng kể
                             if normalized_volume > 0.05:
                                 print(f"[WAVE] Level: {normalized_volume:.3f}")
@@ -602,21 +892,26 @@ class VoiceToTextApp:
                         except:
                             pass
 
-                # Voice activity detection (chỉ khi bật)
-                if audio_config.get('voice_activity_detection', False):
-                    if volume > audio_config['silence_threshold']:
-                        silence_start = None
-                    else:
-                        if silence_start is None:
-                            silence_start = time.time()
-                        elif time.time() - silence_start > audio_config['silence_duration']:
-                            # Chỉ dừng nếu đã ghi đủ thời gian tối thiểu
-                            if time.time() - recording_start >= audio_config.get('min_recording_time', 1.0):
-                                self.logger.info("🔇 Phát hiện im lặng, dừng ghi âm")
-                                break
+                # Khoảng dừng tự nhiên: gửi nhận dạng đoạn vừa xong trong lúc vẫn ghi
+                if session.segmented is not None:
+                    self._maybe_submit_segment(session)
+
+                # Dừng lâu mà vẫn giữ phím: gửi nhận dạng thử phần đã nói
+                if session.speculation is not None:
+                    self._maybe_speculate(session)
+
+                # Voice activity detection (chỉ khi bật) - thời gian tính theo sample đã ghi
+                vad = session.vad
+                if audio_config.get('voice_activity_detection', False) and vad is not None:
+                    if vad.trailing_silence > audio_config['silence_duration']:
+                        # Chỉ dừng nếu đã ghi đủ thời gian tối thiểu
+                        if session.buffer.duration >= audio_config.get('min_recording_time', 1.0):
+                            self.logger.info("🔇 Phát hiện im lặng, dừng ghi âm")
+                            break
                 
                 # Kiểm tra thời gian tối đa
-                if time.time() - recording_start > audio_config['max_recording_time']:
+                if (time.time() - recording_start > audio_config['max_recording_time']
+                        or session.buffer.is_full):
                     self.logger.info("⏰ Đạt thời gian ghi âm tối đa")
                     break
                     
@@ -625,49 +920,263 @@ class VoiceToTextApp:
                 break
         
         # Tự động dừng
-        if self.is_recording:
-            self.is_recording = False
-            if self.stream:
-                self.stream.stop_stream()
-                self.stream.close()
-                self.stream = None
+        if self._claim_stop(session) is not None:
+            session.close_stream()
+            self._drain_capture_ring(session)
             
-            # Xử lý audio (chỉ khi chưa được xử lý)
-            if self.audio_data:
-                audio_bytes = b''.join(self.audio_data)
-                self.audio_data = []  # Clear để tránh duplicate
-                threading.Thread(target=self._process_audio, args=(audio_bytes,), daemon=True).start()
+            # Xử lý audio (take() nhường bộ đệm nên không bị xử lý 2 lần)
+            self._hand_off_recording(session)
     
+    def _claim_stop(self, session: RecordingSession = None) -> Optional[RecordingSession]:
+        """
+        Chuyển sang trạng thái dừng đúng 1 lần (thả phím và tự dừng có thể xảy ra cùng lúc)
+
+        Args:
+            session: Chỉ dừng nếu đây vẫn là lần ghi đang chạy (None = lần ghi hiện tại)
+
+        Returns:
+            Session vừa dừng (None nếu đã được dừng ở nơi khác)
+        """
+        with self._stop_lock:
+            current = self.recording
+            if current is None or (session is not None and session is not current):
+                return None
+            self.recording = None
+            self.is_recording = False
+            return current
+
     def _stop_recording(self):
         """Stopping recording"""
-        if not self.is_recording:
+        session = self._claim_stop()
+        if session is None:
             return
 
-        self.is_recording = False
+        # Đợi thread ghi âm thoát (đọc xong chunk đang dở) trước khi đóng stream
+        # và lấy dữ liệu: stream, capture buffer và VAD luôn chỉ có 1 thread dùng
+        if session.thread and session.thread is not threading.current_thread():
+            session.thread.join(timeout=1.0)
+            if session.thread.is_alive():
+                self.logger.warning("[WARNING] Recording thread chưa thoát sau 1s")
 
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
-            self.stream = None
+        session.close_stream()
+
+        # Callback mode: lấy nốt dữ liệu còn trong ring (thread ghi âm đã thoát)
+        self._drain_capture_ring(session)
 
         self.logger.info("[STOP] Stopping recording")
         print("[STOP] Stopping recording - Processing...")
 
-        # Xử lý audio (lấy và clear data ngay để tránh duplicate)
-        if self.audio_data:
-            audio_bytes = b''.join(self.audio_data)
-            self.audio_data = []  # Clear ngay để tránh xử lý 2 lần!
-            threading.Thread(target=self._process_audio, args=(audio_bytes,), daemon=True).start()
+        # Xử lý audio - take() trả về view zero-copy và nhường bộ đệm ngay
+        # (không còn b''.join() trên đường từ lúc thả phím tới lúc upload)
+        self._hand_off_recording(session)
+
+    def _create_segmented(self) -> Optional[SegmentedTranscription]:
+        """SegmentedTranscription cho lần ghi mới (None nếu tắt)"""
+        segment_config = self.config.get('stt', {}).get('segmented', {})
+        if not segment_config.get('enabled', False) or self.remote_stt is None:
+            return None
+        audio_config = self.config['audio']
+        return SegmentedTranscription(
+            self._get_segment_executor(),
+            lambda audio, segments: self._transcribe_recording(audio, segments=segments),
+            audio_config['sample_rate'],
+            audio_config.get('channels', 1),
+            min_segment_seconds=segment_config.get('min_segment_seconds', 6.0),
+            min_pause_seconds=segment_config.get('min_pause_ms', 400) / 1000.0
+        )
+
+    def _get_segment_executor(self) -> ThreadPoolExecutor:
+        """Executor chạy các request nhận dạng trong lúc ghi (đoạn cắt / nhận dạng thử)"""
+        if self.segment_executor is None:
+            segment_config = self.config.get('stt', {}).get('segmented', {})
+            self.segment_executor = ThreadPoolExecutor(
+                max_workers=max(int(segment_config.get('max_parallel', 3)), 1),
+                thread_name_prefix='stt-segment'
+            )
+        return self.segment_executor
+
+    def _create_speculation(self) -> Optional[SpeculativeTranscription]:
+        """SpeculativeTranscription cho lần ghi mới (None nếu tắt)"""
+        speculative_config = self.config.get('stt', {}).get('speculative', {})
+        if not speculative_config.get('enabled', False) or self.remote_stt is None:
+            return None
+        audio_config = self.config['audio']
+        return SpeculativeTranscription(
+            self._get_segment_executor(),
+            lambda audio, segments: self._transcribe_recording(audio, segments=segments),
+            self.speculation_stats,
+            audio_config['sample_rate'],
+            audio_config.get('channels', 1),
+            min_pause_seconds=speculative_config.get('min_pause_ms', 700) / 1000.0
+        )
+
+    def _maybe_speculate(self, session: RecordingSession):
+        """Nếu VAD thấy khoảng dừng đủ dài sau tiếng nói mới thì gửi nhận dạng thử phần chưa gửi"""
+        speculation, vad = session.speculation, session.vad
+        start = session.segmented.cut_sample if session.segmented is not None else 0
+        if not speculation.should_start(vad, start):
+            return
+        end = vad.processed_samples
+        end -= end % speculation.channels
+        audio = session.buffer.copy(start, end)
+        if len(audio) == 0:
+            return
+        speculation.submit(audio, start, end, shift_segments(vad.segments(include_open=False), start, end))
+        print(f"[SPECULATE] Pause {vad.trailing_silence:.1f}s - sent {speculation.seconds:.1f}s early")
+
+    def _maybe_submit_segment(self, session: RecordingSession):
+        """Nếu VAD đang ở khoảng dừng đủ dài thì cắt và gửi đoạn đã xong"""
+        segmented, vad = session.segmented, session.vad
+        cut = segmented.plan_cut(vad)
+        if cut is None:
+            return
+        start = segmented.cut_sample
+        audio = session.buffer.copy(start, cut)
+        if len(audio) == 0:
+            return
+        segmented.submit(audio, cut, vad.segments(include_open=False))
+        seconds = len(audio) / float(self.config['audio']['sample_rate'] * self.config['audio'].get('channels', 1))
+        print(f"[SEGMENT] #{segmented.count}: {seconds:.1f}s sent while recording")
+
+    def _hand_off_recording(self, session: RecordingSession):
+        """Nhường audio + enhancer + timeline của lần ghi vừa xong cho thread xử lý"""
+        released_at = time.perf_counter()
+        audio_array = session.buffer.take()
+        enhancer, timeline, vad = session.enhancer, session.timeline, session.vad
+        upload_encoder, segmented, speculation = session.upload_encoder, session.segmented, session.speculation
+        self.last_feature_timeline = timeline
+        segments = None
+        if vad is not None:
+            segments = vad.finalize()
+            self.last_speech_segments = segments
+            self.logger.debug(f"[VAD] Speech segments: {segments}")
+        # Đoán trúng nếu không có tiếng nói mới sau lúc gửi nhận dạng thử
+        speculative = None
+        if speculation is not None:
+            if len(audio_array) > 0 and segments is not None:
+                speculative = speculation.take(segments, segmented.cut_sample if segmented is not None else 0)
+            else:
+                speculation.discard()
+        if len(audio_array) > 0:
+            job = TranscriptionJob(audio_array, enhancer, timeline, segments, upload_encoder,
+                                   segmented, speculative, released_at)
+            if self.transcription_pool.submit(job):
+                return
+            self.logger.error("[QUEUE] Hàng đợi nhận dạng đầy, bỏ bản ghi")
+            print("[ERROR] Transcription queue full - recording dropped")
+            if self.gui_enabled and self.root:
+                try:
+                    self.root.after(0, lambda: self._show_error_gui("Transcription queue full"))
+                except:
+                    pass
+        if segmented is not None:
+            segmented.cancel()
     
-    def _process_audio(self, audio_data: bytes):
-        """Xử lý audio và nhận dạng"""
+    def _audio_callback(self, ring, in_data, frame_count, time_info, status_flags):
+        """PortAudio stream_callback - chỉ đẩy frame vào ring của lần ghi, KHÔNG xử lý nặng ở đây"""
+        try:
+            audio_config = self.config['audio']
+            overflow = bool(status_flags & pyaudio.paInputOverflow)
+            dropped = 0
+            if in_data:
+                dropped = ring.push(np.frombuffer(in_data, dtype=np.int16)) // audio_config['channels']
+            self.capture_stats.record_callback(frame_count, audio_config['sample_rate'], overflow, dropped)
+        except Exception:
+            pass
+        return (None, pyaudio.paContinue)
+
+    def _drain_capture_ring(self, session: RecordingSession):
+        """Chuyển dữ liệu còn lại trong ring vào capture buffer và log thống kê xrun"""
+        ring, session.ring = session.ring, None
+        if ring is None:
+            return
+        remaining = ring.pop(ring.available())
+        if len(remaining) > 0:
+            self._store_chunk(session, remaining)
+
+        # Warm stream reader: số sample bị ghi đè do đọc không kịp
+        overrun = getattr(ring, 'dropped', 0)
+        if overrun:
+            self.capture_stats.dropped_frames += overrun // self.config['audio']['channels']
+
+        stats = self.capture_stats.to_dict()
+        self.logger.info(f"[STAT] Capture: {stats}")
+        if stats['overflows'] or stats['dropped_frames']:
+            print(f"[WARNING] Audio dropouts: {stats['overflows']} overflow(s), "
+                  f"{stats['dropped_frames']} dropped frame(s)")
+
+    def get_capture_stats(self) -> dict:
+        """Lấy thống kê capture (overflow, dropped frames, jitter) của lần ghi gần nhất"""
+        stats = self.capture_stats.to_dict()
+        stats['capture_mode'] = self.capture_mode
+        if self.warm_stream is not None:
+            stats['warm_stream'] = self.warm_stream.get_stats()
+        return stats
+
+    def _store_chunk(self, session: RecordingSession, data) -> Optional[np.ndarray]:
+        """
+        Ghi 1 chunk vào capture buffer của lần ghi, trích xuất đặc trưng và đưa
+        qua streaming enhancer (nếu bật)
+
+        Returns:
+            Dòng đặc trưng của chunk (None nếu chunk rỗng)
+        """
+        start_sample = session.buffer.samples
+        audio_array = session.buffer.write(data)
+        if len(audio_array) == 0:
+            return None
+
+        features = self.feature_extractor.extract(audio_array)
+        if session.timeline is not None:
+            session.timeline.append(features, start_sample)
+        if session.vad is not None:
+            session.vad.process(audio_array)
+        if session.upload_encoder is not None:
+            try:
+                session.upload_encoder.feed(audio_array)
+            except Exception as e:
+                self.logger.warning(f"Streaming encoder error, fallback to batch encode: {e}")
+                session.upload_encoder = None
+
+        if session.enhancer is not None:
+            try:
+                session.enhancer.process(audio_array)
+            except Exception as e:
+                self.logger.warning(f"Streaming enhancement error, fallback to batch: {e}")
+                session.enhancer = None
+        return features
+
+    def get_feature_trace(self) -> Optional[FeatureTimeline]:
+        """Timeline đặc trưng của lần ghi gần nhất (để phân tích chất lượng/hiệu năng)"""
+        return self.last_feature_timeline
+
+    def get_speech_segments(self) -> list:
+        """Các đoạn nói (start_sample, end_sample) do VAD phát hiện trong lần ghi gần nhất"""
+        return list(self.last_speech_segments)
+
+    def _process_audio(self, job: TranscriptionJob) -> Optional[str]:
+        """
+        Nhận dạng 1 lần ghi (chạy trên worker của transcription pool)
+
+        Returns:
+            Text cần dán (None nếu bỏ qua / lỗi); việc dán do _deliver_transcription
+            làm theo đúng thứ tự ghi
+        """
+        audio_array, segments = job.audio, job.segments
+        if job.segmented is not None and job.segmented.count == 0:
+            job.segmented = None
+        segmented = job.segmented
+        if job.queue_wait > 0.05:
+            print(f"[QUEUE] Job #{job.seq} waited {job.queue_wait * 1000:.0f}ms for a worker")
         try:
-            # Kiểm tra mức độ âm thanh trung bình
-            if self.audio_samples_count > 0:
-                avg_audio_energy = self.total_audio_energy / self.audio_samples_count
+            # Kiểm tra mức độ âm thanh trung bình (RMS trung bình các chunk từ timeline)
+            timeline = job.timeline
+            if timeline is not None and len(timeline) > 0:
+                self.logger.debug(f"[STAT] Features: {timeline.summary()}")
+                avg_audio_energy = timeline.mean('rms')
                 min_energy_threshold = 50  # Ngưỡng âm thanh tối thiểu
 
-                if avg_audio_energy < min_energy_threshold:
+                if avg_audio_energy < min_energy_threshold and segmented is None:
                     self.logger.info("🔇 Âm thanh quá nhỏ, bỏ qua nhận dạng")
                     print("🔇 Không phát hiện giọng nói rõ ràng")
                     # Ensure GUI is hidden
@@ -676,100 +1185,79 @@ class VoiceToTextApp:
                             self.gui_queue.put(("hide_gui",))
                         except:
                             pass
-                    return
+                    return None
 
                 self.logger.info(f"🎵 Mức âm thanh trung bình: {avg_audio_energy:.1f}")
 
             self.logger.info("[DEBUG] Đang nhận dạng giọng nói...")
             print("[DEBUG] Đang nhận dạng giọng nói...")
 
-            # Tạo file tạm
-            temp_fd, temp_path = tempfile.mkstemp(suffix='.wav')
-            
-            try:
-                # Chuyển đổi và xử lý audio data
-                audio_array = np.frombuffer(audio_data, dtype=np.int16)
-
-                # Kiểm tra độ dài audio tối thiểu
-                duration_seconds = len(audio_array) / self.config['audio']['sample_rate']
-                min_duration = self.config['audio'].get('min_recording_time', 1.0)  # Tối thiểu 1.0 seconds
-
-                if duration_seconds < min_duration:
-                    self.logger.info(f"🔇 Audio quá ngắn ({duration_seconds:.2f}s < {min_duration}s), bỏ qua nhận dạng")
-                    print(f"🔇 Record quá ngắn ({duration_seconds:.2f}s) - cần ít nhất {min_duration}s")
-                    print("[TIP] Thử nói lâu hơn để có kết quả chính xác hơn")
-                    # Ensure GUI is hidden
-                    if self.gui_enabled:
-                        try:
-                            self.gui_queue.put(("hide_gui",))
-                        except:
-                            pass
-                    return
+            # Kiểm tra độ dài audio tối thiểu
+            duration_seconds = len(audio_array) / self.config['audio']['sample_rate']
+            min_duration = self.config['audio'].get('min_recording_time', 1.0)  # Tối thiểu 1.0 seconds
 
-                # Cải thiện chất lượng audio
-                audio_array = self._enhance_audio(audio_array)
+            if duration_seconds < min_duration:
+                self.logger.info(f"🔇 Audio quá ngắn ({duration_seconds:.2f}s < {min_duration}s), bỏ qua nhận dạng")
+                print(f"🔇 Record quá ngắn ({duration_seconds:.2f}s) - cần ít nhất {min_duration}s")
+                print("[TIP] Thử nói lâu hơn để có kết quả chính xác hơn")
+                # Ensure GUI is hidden
+                if self.gui_enabled:
+                    try:
+                        self.gui_queue.put(("hide_gui",))
+                    except:
+                        pass
+                return None
 
-                with wave.open(temp_path, 'wb') as wav_file:
-                    wav_file.setnchannels(1)
-                    wav_file.setsampwidth(2)
-                    wav_file.setframerate(self.config['audio']['sample_rate'])
-                    wav_file.writeframes(audio_array.tobytes())
+            # Nhận dạng bằng Groq STT
+            language = self.config.get('stt', {}).get('language', 'vi')
+            try:
+                # Kết quả nhận dạng thử lúc người nói dừng (None nếu không trúng / lỗi)
+                speculative_text = None
+                if job.speculative is not None:
+                    speculative_text = self._speculative_result(job.speculative)
+                job.speculative_used = speculative_text is not None
+                if segmented is not None:
+                    # Các đoạn đầu đã gửi trong lúc ghi - chỉ còn phần đuôi
+                    recognized_text = self._transcribe_segmented(audio_array, segments, segmented,
+                                                                 speculative_text)
+                elif speculative_text is not None:
+                    recognized_text = speculative_text
+                else:
+                    recognized_text = self._transcribe_recording(audio_array, job.enhancer, segments,
+                                                                 job.upload_encoder)
                 
-                # Nhận dạng bằng Groq STT
-                try:
-                    stt_config = self.config.get('stt', {})
-                    language = stt_config.get('language', 'vi')
-                    print("[NET] Gọi Groq STT...")
-                    recognized_text = self.remote_stt.transcribe(temp_path, language=language)
-                    
-                    # Cập nhật quota info lên GUI
-                    if self.gui_enabled and self.overlay:
-                        try:
-                            quota_info = self.remote_stt.get_quota_info()
-                            self.root.after(0, lambda: self.overlay.update_quota_info(quota_info))
-                        except Exception as e:
-                            pass
-                            
-                except Exception as e:
-                    self.logger.error(f"[ERROR] Lỗi Groq STT: {e}")
-                    print(f"[ERROR] Lỗi Groq STT: {e}")
-                    # Ensure GUI is hidden
-                    if self.gui_enabled:
-                        try:
-                            self.gui_queue.put(("hide_gui",))
-                        except:
-                            pass
-                    return
-
-                # Post-processing cho tiếng Việt
-                recognized_text = self._post_process_vietnamese_text(recognized_text, language)
+                # Cập nhật quota info lên GUI
+                if self.gui_enabled and self.overlay:
+                    try:
+                        quota_info = self.remote_stt.get_quota_info()
+                        self.root.after(0, lambda: self.overlay.update_quota_info(quota_info))
+                    except Exception as e:
+                        pass
+                        
+            except Exception as e:
+                self.logger.error(f"[ERROR] Lỗi Groq STT: {e}")
+                print(f"[ERROR] Lỗi Groq STT: {e}")
+                # Ensure GUI is hidden
+                if self.gui_enabled:
+                    try:
+                        self.gui_queue.put(("hide_gui",))
+                    except:
+                        pass
+                return None
 
-                if recognized_text and self._is_meaningful_text(recognized_text):
-                    self.logger.info(f"[OK] Nhận dạng thành công: '{recognized_text}'")
-                    print(f"[OK] Result: '{recognized_text}'")
-                    print("[TEXT] Pasting text...")
+            # Post-processing cho tiếng Việt
+            recognized_text = self._post_process_vietnamese_text(recognized_text, language)
 
-                    if self.gui_enabled and self.root:
-                        try:
-                            self.root.after(0, lambda: self._show_result_gui(recognized_text))
-                        except:
-                            pass
+            if recognized_text and self._is_meaningful_text(recognized_text):
+                self.logger.info(f"[OK] Nhận dạng thành công: '{recognized_text}'")
+                print(f"[OK] Result: '{recognized_text}'")
+                return recognized_text
 
-                    self._paste_text(recognized_text)
-                else:
-                    self.logger.warning("[WARNING] Cannot recognize text")
-                    print("[WARNING] Cannot recognize text")
-                    if self.gui_enabled and self.root:
-                        try:
-                            self.root.after(0, lambda: self._show_error_gui("Cannot recognize text"))
-                        except:
-                            pass
-                
-            finally:
-                # Xóa file tạm
+            self.logger.warning("[WARNING] Cannot recognize text")
+            print("[WARNING] Cannot recognize text")
+            if self.gui_enabled and self.root:
                 try:
-                    os.close(temp_fd)
-                    os.unlink(temp_path)
+                    self.root.after(0, lambda: self._show_error_gui("Cannot recognize text"))
                 except:
                     pass
                     
@@ -782,6 +1270,265 @@ class VoiceToTextApp:
                 self.root.after(0, lambda: self._show_error_gui(error_msg))
         
         # Không cần ẩn GUI ở đây vì đã ẩn khi thả hotkey
+        return None
+
+    def _deliver_transcription(self, job: TranscriptionJob, recognized_text: Optional[str]):
+        """Dán kết quả của 1 lần ghi - transcription pool gọi tuần tự, đúng thứ tự ghi"""
+        if not recognized_text:
+            return
+        print(f"[TEXT] Pasting text (job #{job.seq})...")
+
+        if self.gui_enabled and self.root:
+            try:
+                self.root.after(0, lambda: self._show_result_gui(recognized_text))
+            except:
+                pass
+
+        self._paste_text(recognized_text)
+        self._record_release_latency(job.audio, job.released_at, job.segmented, job.speculative_used)
+
+    def _transcribe_recording(self, audio_array: np.ndarray, enhancer: Optional[StreamingEnhancer] = None,
+                              segments: Optional[list] = None,
+                              upload_encoder: Optional[UploadEncoder] = None) -> str:
+        """
+        Enhancement -> cắt khoảng lặng -> mono/resample -> mã hóa -> gọi STT
+
+        Args:
+            audio_array: Audio int16 (cả bản ghi, hoặc 1 đoạn cắt)
+            enhancer: Streaming enhancer đã xử lý đúng audio_array (None = batch)
+            segments: Các đoạn nói của VAD trên trục sample của audio_array
+            upload_encoder: Encoder đã nạp trong lúc ghi (None = mã hóa lúc này)
+
+        Returns:
+            Text thô từ STT
+        """
+        # Cải thiện chất lượng audio
+        audio_array = self._finalize_enhancement(audio_array, enhancer)
+
+        # Cắt khoảng lặng đầu/cuối + rút ngắn khoảng dừng dài (giảm byte và số giây bị tính phí)
+        audio_array = self._trim_silence(audio_array, segments)
+
+        # Mono + upload_sample_rate (Whisper tự resample về 16kHz, gửi dư chỉ tốn băng thông)
+        audio_array, upload_rate = self._prepare_upload_audio(audio_array)
+
+        # Mã hóa upload (FLAC/WAV) - dùng luôn encoder đã nạp trong lúc ghi nếu có.
+        # Body gửi thẳng từ bộ nhớ (WAV = header + view PCM), không qua file tạm
+        upload_encoder = self._finish_upload_encoding(audio_array, upload_rate, upload_encoder)
+
+        stt_config = self.config.get('stt', {})
+        # Thời gian tổng cho cả lần nhận dạng (kể cả gửi lại / đổi key)
+        deadline_seconds = stt_config.get('deadline_seconds') or stt_config.get('timeout', 60)
+        print("[NET] Gọi Groq STT...")
+        return self.remote_stt.transcribe_audio(
+            upload_encoder.parts(), language=stt_config.get('language', 'vi'),
+            filename=upload_encoder.filename, content_type=upload_encoder.content_type,
+            audio_seconds=upload_encoder.samples / float(upload_rate),
+            deadline=time.monotonic() + float(deadline_seconds)
+        )
+
+    def _transcribe_segmented(self, audio_array: np.ndarray, segments: Optional[list],
+                              segmented: SegmentedTranscription, tail_text: Optional[str] = None) -> str:
+        """
+        Nhận dạng phần đuôi từ điểm cắt cuối rồi ghép với text các đoạn đã gửi
+        trong lúc ghi (đúng thứ tự). Đoạn nào lỗi thì nhận dạng lại cả bản ghi.
+
+        Args:
+            tail_text: Text phần đuôi đã có từ nhận dạng thử (None = nhận dạng lúc này)
+        """
+        start = segmented.cut_sample
+        tail = audio_array[start:]
+        tail_segments = shift_segments(segments or [], start, len(audio_array))
+        if tail_text is None:
+            tail_text = ""
+            if segments is None or tail_segments:
+                tail_text = self._transcribe_recording(tail, segments=tail_segments or None)
+
+        try:
+            texts = segmented.results(timeout=self.config.get('stt', {}).get('timeout', 60))
+        except Exception as e:
+            print(f"[WARNING] Segment transcription failed ({e}), transcribing whole recording")
+            segmented.cancel()
+            return self._transcribe_recording(audio_array, segments=segments)
+
+        texts.append(tail_text)
+        print(f"[SEGMENT] Stitched {len(texts)} part(s) ({segmented.count} sent while recording)")
+        return " ".join(text.strip() for text in texts if text and text.strip())
+
+    def _speculative_result(self, future) -> Optional[str]:
+        """Text của lần nhận dạng thử đã trúng (None nếu lỗi -> nhận dạng lại như bình thường)"""
+        try:
+            text = future.result(timeout=self.config.get('stt', {}).get('timeout', 60))
+        except Exception as e:
+            print(f"[WARNING] Speculative transcription failed ({e}), transcribing again")
+            return None
+        print("[SPECULATE] Hit - using result transcribed during the pause")
+        return text
+
+    def get_transcription_pool_stats(self) -> dict:
+        """Số lần ghi đã nhận / từ chối / đã dán, đang chờ và thời gian chờ worker lâu nhất"""
+        return self.transcription_pool.get_stats()
+
+    def get_speculation_stats(self) -> dict:
+        """Số lần nhận dạng thử, tỉ lệ trúng và số giây audio đã gửi mà bị bỏ (quota tốn thêm)"""
+        return self.speculation_stats.to_dict()
+
+    def _record_release_latency(self, audio_array: np.ndarray, released_at: Optional[float],
+                                segmented: Optional[SegmentedTranscription], speculative: bool = False):
+        """Độ trễ thả phím -> dán theo độ dài clip"""
+        if released_at is None:
+            return
+        audio_config = self.config['audio']
+        clip_seconds = len(audio_array) / float(audio_config['sample_rate'] * audio_config.get('channels', 1))
+        latency = time.perf_counter() - released_at
+        self.release_latency.record(clip_seconds, latency)
+        parts = f", {segmented.count + 1} segments" if segmented is not None else ""
+        if speculative:
+            parts += ", speculative"
+        print(f"[LATENCY] Release -> paste {latency * 1000:.0f}ms for {clip_seconds:.1f}s clip{parts}")
+        self.logger.info(f"[LATENCY] release_to_paste_ms={latency * 1000:.0f} clip_s={clip_seconds:.1f}{parts}")
+
+    def get_release_latency_stats(self) -> dict:
+        """p50/p95/p99 độ trễ thả phím -> dán theo nhóm độ dài clip"""
+        return self.release_latency.to_dict()
+
+    def _finalize_enhancement(self, audio_array: np.ndarray,
+                              enhancer: Optional[StreamingEnhancer]) -> np.ndarray:
+        """Hoàn tất enhancement: dùng kết quả streaming nếu có, ngược lại chạy batch"""
+        if enhancer is not None and enhancer.samples == len(audio_array):
+            try:
+                started = time.perf_counter()
+                result = enhancer.finalize()
+                self.logger.debug(f"🎧 Streaming enhancement finalized in "
+                                  f"{(time.perf_counter() - started) * 1000:.1f}ms")
+                return result
+            except Exception as e:
+                self.logger.debug(f"Streaming enhancement unavailable, fallback to batch: {e}")
+        return self._enhance_audio(audio_array)
+
+    def _trim_silence(self, audio_array: np.ndarray, segments: Optional[list]) -> np.ndarray:
+        """
+        Cắt khoảng lặng theo ranh giới đoạn nói của VAD
+
+        Args:
+            audio_array: Audio int16 (đã enhancement, cùng trục sample với segments)
+            segments: Các đoạn nói [(start_sample, end_sample), ...]
+
+        Returns:
+            Audio đã rút gọn (giữ nguyên nếu tắt hoặc VAD không thấy đoạn nói nào)
+        """
+        trim_config = self.config['audio'].get('trim_silence', {})
+        if not trim_config.get('enabled', False) or not segments:
+            return audio_array
+
+        sample_rate = self.config['audio']['sample_rate']
+        trimmed, time_map = compact_silence(
+            audio_array, segments, sample_rate,
+            padding_ms=trim_config.get('padding_ms', 200),
+            max_pause_ms=trim_config.get('max_pause_ms', 600),
+            channels=self.config['audio'].get('channels', 1)
+        )
+        self.last_time_map = time_map
+
+        stats = time_map.to_dict()
+        with self.trim_stats_lock:
+            self.trim_stats['requests'] += 1
+            self.trim_stats['original_seconds'] += stats['original_seconds']
+            self.trim_stats['uploaded_seconds'] += stats['kept_seconds']
+            self.trim_stats['saved_seconds'] += stats['saved_seconds']
+        self.logger.info(f"[TRIM] {stats}")
+        if stats['saved_seconds'] > 0:
+            print(f"[TRIM] Saved {stats['saved_seconds']:.2f}s of {stats['original_seconds']:.2f}s "
+                  f"({len(trimmed) * 2 / 1024:.0f} KB upload)")
+        return trimmed
+
+    def _prepare_upload_audio(self, audio_array: np.ndarray):
+        """
+        Downmix về mono và resample về upload_sample_rate
+
+        Returns:
+            (audio int16, sample_rate)
+        """
+        audio_config = self.config['audio']
+        sample_rate = audio_config['sample_rate']
+        channels = audio_config.get('channels', 1)
+        if channels > 1:
+            frames = len(audio_array) // channels
+            audio_array = audio_array[:frames * channels].reshape(frames, channels).mean(axis=1)
+            audio_array = np.rint(audio_array).astype(np.int16)
+
+        upload_rate = audio_config.get('upload_sample_rate', 16000) or sample_rate
+        if upload_rate == sample_rate:
+            return audio_array, sample_rate
+
+        started = time.perf_counter()
+        resampled = resample(audio_array, sample_rate, upload_rate)
+        self.logger.debug(f"[AUDIO] Resampled {sample_rate}Hz -> {upload_rate}Hz "
+                          f"({len(audio_array) * 2 // 1024} KB -> {len(resampled) * 2 // 1024} KB) "
+                          f"in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return resampled, upload_rate
+
+    def _create_streaming_encoder(self) -> Optional[UploadEncoder]:
+        """
+        Tạo encoder nạp dần trong lúc ghi - chỉ khi audio ghi được upload nguyên
+        trạng (không enhancement, không cắt khoảng lặng, mono, đúng upload_sample_rate)
+
+        Các trường hợp khác (gồm cấu hình mặc định: enhancement bật, sample_rate
+        "native") thì audio chỉ cố định sau khi xử lý lúc thả phím, nên FLAC được
+        mã hóa lúc đó (~0.5ms mỗi giây audio, xem benchmarks/bench_upload.py).
+        """
+        audio_config = self.config['audio']
+        sample_rate = audio_config['sample_rate']
+        passthrough = (
+            not audio_config.get('audio_enhancement', {}).get('enabled', True)
+            and not audio_config.get('trim_silence', {}).get('enabled', False)
+            and audio_config.get('channels', 1) == 1
+            and (audio_config.get('upload_sample_rate', 16000) or sample_rate) == sample_rate
+        )
+        # WAV không cần nạp dần: body = header + view của capture buffer (zero-copy)
+        upload_format = audio_config.get('upload_format', 'wav')
+        if not passthrough or upload_format == 'wav':
+            return None
+        try:
+            return create_encoder(upload_format, sample_rate)
+        except Exception as e:
+            self.logger.warning(f"Cannot create streaming encoder: {e}")
+            return None
+
+    def _finish_upload_encoding(self, audio_array: np.ndarray, sample_rate: int,
+                                upload_encoder: Optional[UploadEncoder]) -> UploadEncoder:
+        """
+        Hoàn tất body upload
+
+        Args:
+            audio_array: Audio int16 mono sẽ upload
+            sample_rate: Tần số của audio_array
+            upload_encoder: Encoder đã nạp trong lúc ghi (None nếu không có)
+
+        Returns:
+            Encoder đã finish (body lấy qua parts(), tên file/content type đi kèm)
+        """
+        started = time.perf_counter()
+        if (upload_encoder is None or upload_encoder.samples != len(audio_array)
+                or upload_encoder.sample_rate != sample_rate):
+            upload_encoder = create_encoder(self.config['audio'].get('upload_format', 'wav'), sample_rate)
+            upload_encoder.feed(audio_array)
+        payload_bytes = sum(memoryview(part).nbytes for part in upload_encoder.parts())
+        self.logger.debug(f"[AUDIO] Upload {upload_encoder.name}: {payload_bytes // 1024} KB "
+                          f"(PCM {len(audio_array) * 2 // 1024} KB), finished in "
+                          f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return upload_encoder
+
+    def get_trim_stats(self) -> dict:
+        """Tổng số giây audio đã cắt bớt trước khi upload (từ lúc khởi động)"""
+        with self.trim_stats_lock:
+            stats = dict(self.trim_stats)
+        if stats['original_seconds'] > 0:
+            stats['saved_ratio'] = round(stats['saved_seconds'] / stats['original_seconds'], 3)
+        return stats
+
+    def get_time_map(self) -> Optional[SpeechTimeMap]:
+        """Ánh xạ thời gian audio đã upload -> bản ghi gốc của lần nhận dạng gần nhất"""
+        return self.last_time_map
 
     def _enhance_audio(self, audio_array: np.ndarray) -> np.ndarray:
         """Cải thiện chất lượng audio cho nhận dạng tốt hơn với các kỹ thuật nâng cao"""
@@ -790,93 +1537,21 @@ class VoiceToTextApp:
             if not audio_config.get('enabled', True):
                 return audio_array.astype(np.int16)
 
-            # Chuyển đổi sang float32 để xử lý chính xác hơn
-            if np.max(np.abs(audio_array)) == 0:
+            # Audio toàn số 0: không cần xử lý
+            if len(audio_array) == 0 or (audio_array.max() == 0 and audio_array.min() == 0):
                 return audio_array.astype(np.int16)
-                
-            audio_float = audio_array.astype(np.float32)
-            
-            # 1. Loại bỏ DC offset (dịch chuyển DC)
-            if audio_config.get('reduce_noise', True):
-                audio_float = audio_float - np.mean(audio_float)
-            
-            # 2. Chuẩn hóa âm lượng ban đầu
-            if audio_config.get('normalize_volume', True):
-                max_val = np.max(np.abs(audio_float))
-                if max_val > 0:
-                    audio_float = audio_float / max_val * 0.85  # Giữ lại headroom
-            
-            # 3. Lọc thông cao để loại bỏ tiếng ồn tần số thấp
-            if audio_config.get('apply_filter', True) and len(audio_float) > 2:
-                # High-pass filter đơn giản (RC filter)
-                alpha = 0.97  # Cut-off frequency khoảng 50Hz ở 16kHz
-                filtered = np.zeros_like(audio_float)
-                filtered[0] = audio_float[0]
-                for i in range(1, len(audio_float)):
-                    filtered[i] = alpha * (filtered[i-1] + audio_float[i] - audio_float[i-1])
-                audio_float = filtered
-            
-            # 4. Giảm tiếng ồn thông minh (Spectral Subtraction đơn giản)
-            if audio_config.get('reduce_noise', True) and len(audio_float) > 512:
-                # Ước lượng tiếng ồn từ 10% đầu của signal
-                noise_sample_length = min(len(audio_float) // 10, 1600)  # 0.1s ở 16kHz
-                noise_estimate = np.std(audio_float[:noise_sample_length])
-                
-                # Chỉ áp dụng nếu có tiếng ồn đáng kể
-                if noise_estimate > 0:
-                    # Soft thresholding
-                    threshold = noise_estimate * 2.0
-                    audio_float = np.where(
-                        np.abs(audio_float) > threshold,
-                        audio_float,
-                        audio_float * 0.3  # Giảm tiếng ồn xuống 30%
-                    )
-            
-            # 5. Tự động điều chỉnh khuếch đại thông minh
-            if audio_config.get('normalize_volume', True):
-                # Tính RMS (Root Mean Square) cho mức âm thanh trung bình
-                rms = np.sqrt(np.mean(audio_float**2))
-                if rms > 0:
-                    # Mục tiêu RMS tối ưu cho speech recognition
-                    target_rms = 0.25
-                    gain = target_rms / rms
-                    
-                    # Giới hạn gain để tránh clip và nhiễu quá mức
-                    gain = min(gain, 4.0)  # Tối đa 4x
-                    gain = max(gain, 0.1)  # Tối thiểu 0.1x
-                    
-                    audio_float = audio_float * gain
-            
-            # 6. Nén động (Dynamic Range Compression) để cân bằng âm thanh
-            if audio_config.get('enhance_speech', True):
-                # Soft limiter để giảm dynamic range quá lớn
-                threshold = 0.8
-                ratio = 0.5  # Compression ratio
-                
-                abs_audio = np.abs(audio_float)
-                over_threshold = abs_audio > threshold
-                
-                if np.any(over_threshold):
-                    # Áp dụng compression cho các sample vượt ngưỡng
-                    compressed = threshold + (abs_audio - threshold) * ratio
-                    audio_float = np.where(
-                        over_threshold,
-                        np.sign(audio_float) * compressed,
-                        audio_float
-                    )
-            
-            # 7. Chuẩn hóa cuối cùng và chuyển về int16
-            # Đảm bảo không bị clip
-            max_val = np.max(np.abs(audio_float))
-            if max_val > 0.95:
-                audio_float = audio_float / max_val * 0.95
-            
-            # Chuyển về int16 với giới hạn chính xác
-            audio_int16 = np.clip(audio_float * 32767, -32768, 32767).astype(np.int16)
-            
+
+            # Chuỗi xử lý tại chỗ: 1 buffer float32 + 1 buffer int16
+            started = time.perf_counter()
+            audio_int16 = EnhancementPipeline(audio_config).process(audio_array)
+
             # Kiểm tra chất lượng kết quả
-            final_rms = np.sqrt(np.mean((audio_int16.astype(np.float32) / 32767)**2))
-            self.logger.debug(f"🎧 Audio enhancement: RMS = {final_rms:.3f}, Max = {np.max(np.abs(audio_int16))}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                audio_seconds = len(audio_int16) / float(self.config['audio']['sample_rate'])
+                final_rms = np.sqrt(np.mean(np.square(audio_int16, dtype=np.float64))) / 32767
+                self.logger.debug(f"🎧 Audio enhancement: RMS = {final_rms:.3f}, "
+                                  f"{elapsed_ms / max(audio_seconds, 1e-6):.2f}ms per second of audio")
             
             return audio_int16
 
@@ -1223,20 +1898,44 @@ class VoiceToTextApp:
         self.is_running = False
         
         # Stopping recording
-        if self.is_recording:
-            self.is_recording = False
+        session = self._claim_stop()
         
         # Unhook hotkeys
         if self.hotkey_manager:
             self.hotkey_manager.unregister()
         
         # Dọn dẹp audio
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        if session is not None:
+            if session.thread and session.thread is not threading.current_thread():
+                session.thread.join(timeout=1.0)
+            session.close_stream()
+
+        if self.warm_stream is not None:
+            stats = self.warm_stream.get_stats()
+            print(f"[STAT] Warm stream idle cost: {stats['callback_cpu_percent']:.3f}% CPU "
+                  f"over {stats['uptime_s']:.0f}s")
+            self.logger.info(f"[STAT] Warm stream: {stats}")
+            try:
+                self.warm_stream.close()
+            except Exception as e:
+                print(f"[WARNING] Warm stream close error: {e}")
+            self.warm_stream = None
         
         if self.audio:
             self.audio.terminate()
+
+        if self.segment_executor is not None:
+            self.segment_executor.shutdown(wait=False)
+            self.segment_executor = None
+        self.logger.info(f"[STAT] Release -> paste latency: {self.get_release_latency_stats()}")
+        self.logger.info(f"[STAT] Speculation: {self.get_speculation_stats()}")
+        self.transcription_pool.shutdown(wait=False)
+        self.logger.info(f"[STAT] Transcription pool: {self.transcription_pool.get_stats()}")
+
+        # Đóng kết nối keep-alive tới Groq
+        if self.remote_stt:
+            self.logger.info(f"[STAT] Network: {self.remote_stt.get_network_stats()}")
+            self.remote_stt.close()
         
         # Dọn dẹp GUI
         if hasattr(self, 'overlay') and self.overlay:
@@ -0,0 +1,45 @@
+"""
+Recording Session - Trạng thái riêng của 1 lần ghi
+"""
+
+
+class RecordingSession:
+    """
+    Mọi thứ 1 lần ghi dùng: bộ đệm, ring / stream và các bộ xử lý theo chunk.
+
+    Thread ghi âm, các hàm xử lý chunk và job nhận dạng chỉ làm việc với
+    session của chính lần ghi đó, nên _start_recording của lần ghi sau (tạo
+    session mới) không thể ghi đè lên trạng thái mà thread cũ vẫn đang dùng.
+    """
+
+    def __init__(self, buffer, ring=None, stream=None, enhancer=None, timeline=None, vad=None,
+                 upload_encoder=None, segmented=None, speculation=None):
+        """
+        Args:
+            buffer: CaptureBuffer của lần ghi (đã reset)
+            ring: SPSC ring / warm stream reader (None = đọc thẳng từ stream)
+            stream: Input stream mở riêng cho lần ghi (None = warm stream)
+            enhancer: Streaming enhancer (None = batch / tắt)
+            timeline: FeatureTimeline
+            vad: VoiceActivityDetector
+            upload_encoder: Encoder nạp dần trong lúc ghi
+            segmented: SegmentedTranscription
+            speculation: SpeculativeTranscription
+        """
+        self.buffer = buffer
+        self.ring = ring
+        self.stream = stream
+        self.enhancer = enhancer
+        self.timeline = timeline
+        self.vad = vad
+        self.upload_encoder = upload_encoder
+        self.segmented = segmented
+        self.speculation = speculation
+        self.thread = None          # Thread ghi âm của lần ghi
+
+    def close_stream(self):
+        """Dừng và đóng input stream riêng của lần ghi (nếu có)"""
+        stream, self.stream = self.stream, None
+        if stream is not None:
+            stream.stop_stream()
+            stream.close()
@@ -0,0 +1,111 @@
+"""
+Segmented Transcription - Cắt bản ghi dài tại khoảng dừng và nhận dạng song song trong lúc vẫn ghi
+"""
+from concurrent.futures import wait
+from typing import Callable, Optional
+
+import numpy as np
+
+
+def shift_segments(segments: list, start: int, end: int) -> list:
+    """
+    Các đoạn nói nằm trong [start, end), đổi sang trục sample của đoạn cắt
+
+    Args:
+        segments: [(start_sample, end_sample), ...] trên cả bản ghi
+        start: Sample đầu của đoạn cắt
+        end: Sample cuối (không tính) của đoạn cắt
+    """
+    return [(max(s, start) - start, min(e, end) - start)
+            for s, e in segments if e > start and s < end]
+
+
+class SegmentedTranscription:
+    """
+    Các đoạn đã cắt của 1 lần ghi và future nhận dạng của chúng (đúng thứ tự).
+
+    Trong lúc người dùng vẫn giữ hotkey, mỗi khi VAD thấy khoảng dừng đủ dài và
+    phần chưa gửi đã đủ dài, đoạn đó được cắt ở giữa khoảng dừng và gửi nhận
+    dạng ngay (song song, trải trên các key). Lúc thả phím chỉ còn phần đuôi
+    từ cut_sample tới hết phải nhận dạng, rồi ghép text theo thứ tự.
+    """
+
+    def __init__(self, executor, transcribe: Callable, sample_rate: int, channels: int = 1,
+                 min_segment_seconds: float = 6.0, min_pause_seconds: float = 0.4):
+        """
+        Args:
+            executor: ThreadPoolExecutor chạy các request nhận dạng đoạn
+            transcribe: transcribe(audio, segments) -> text cho 1 đoạn
+            sample_rate: Tần số lấy mẫu của bản ghi
+            channels: Số kênh (sample xen kẽ)
+            min_segment_seconds: Chỉ cắt khi phần chưa gửi dài ít nhất chừng này
+            min_pause_seconds: Khoảng dừng tối thiểu để coi là chỗ ngắt tự nhiên
+        """
+        self.executor = executor
+        self.transcribe = transcribe
+        self.sample_rate = int(sample_rate)
+        self.channels = max(int(channels), 1)
+        self.min_segment_samples = int(min_segment_seconds * self.sample_rate) * self.channels
+        self.min_pause_seconds = min_pause_seconds
+        self.cut_sample = 0
+        self.futures = []
+        self.bounds = []
+
+    def plan_cut(self, vad) -> Optional[int]:
+        """
+        Vị trí cắt nếu đang ở giữa khoảng dừng đủ dài, có tiếng nói chưa gửi và
+        phần chưa gửi đủ dài
+
+        Args:
+            vad: VoiceActivityDetector của lần ghi (cùng trục sample với capture buffer)
+
+        Returns:
+            Sample cắt (giữa khoảng dừng), None nếu chưa nên cắt
+        """
+        if vad is None or vad.in_speech:
+            return None
+        pause = vad.trailing_silence
+        if pause < self.min_pause_seconds:
+            return None
+        cut = vad.processed_samples - int(pause * vad.sample_rate / 2) * self.channels
+        cut -= cut % self.channels
+        if cut - self.cut_sample < self.min_segment_samples:
+            return None
+        if not any(end > self.cut_sample for _, end in vad.segments(include_open=False)):
+            return None
+        return cut
+
+    def submit(self, audio: np.ndarray, end: int, segments: list):
+        """
+        Gửi nhận dạng đoạn [cut_sample, end)
+
+        Args:
+            audio: Bản sao audio của đoạn
+            end: Sample cuối (không tính) của đoạn trên cả bản ghi
+            segments: Các đoạn nói trên cả bản ghi
+        """
+        start, self.cut_sample = self.cut_sample, end
+        self.bounds.append((start, end))
+        self.futures.append(self.executor.submit(self.transcribe, audio, shift_segments(segments, start, end)))
+
+    @property
+    def count(self) -> int:
+        """Số đoạn đã gửi"""
+        return len(self.futures)
+
+    def results(self, timeout: float = None) -> list:
+        """
+        Text của các đoạn đã gửi theo thứ tự
+
+        Raises:
+            Exception: Lỗi của đoạn đầu tiên bị lỗi (hoặc TimeoutError)
+        """
+        done, pending = wait(self.futures, timeout=timeout)
+        if pending:
+            raise TimeoutError(f"{len(pending)} segment(s) chưa nhận dạng xong")
+        return [future.result() for future in self.futures]
+
+    def cancel(self):
+        """Hủy các đoạn chưa bắt đầu gửi"""
+        for future in self.futures:
+            future.cancel()
@@ -0,0 +1,132 @@
+"""
+Speculative Transcription - Gửi nhận dạng sớm khi người nói dừng lâu mà vẫn giữ hotkey
+"""
+import threading
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class SpeculationStats:
+    """Tỉ lệ trúng và quota tốn thêm của speculative transcription (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.speculations = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted_seconds = 0.0     # Số giây audio đã gửi nhưng kết quả bị bỏ
+
+    def record(self, outcome: str, seconds: float = 0.0):
+        """outcome: 'start', 'hit', hoặc 'miss' (seconds = audio đã gửi mà bị bỏ)"""
+        with self._lock:
+            if outcome == 'start':
+                self.speculations += 1
+            elif outcome == 'hit':
+                self.hits += 1
+            else:
+                self.misses += 1
+                self.wasted_seconds += seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            decided = self.hits + self.misses
+            return {
+                'speculations': self.speculations,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / decided, 3) if decided else None,
+                'wasted_seconds': round(self.wasted_seconds, 2)
+            }
+
+
+class SpeculativeTranscription:
+    """
+    Nhận dạng thử audio tới thời điểm người nói dừng (VAD thấy khoảng lặng dài)
+    trong lúc vẫn giữ hotkey. Thả phím mà không nói thêm -> dùng luôn kết quả
+    (trúng); nói tiếp -> bỏ kết quả cũ (trật), có thể đoán lại ở lần dừng sau.
+    """
+
+    def __init__(self, executor, transcribe: Callable, stats: SpeculationStats,
+                 sample_rate: int, channels: int = 1, min_pause_seconds: float = 0.7):
+        """
+        Args:
+            executor: ThreadPoolExecutor chạy request nhận dạng
+            transcribe: transcribe(audio, segments) -> text
+            stats: Thống kê dùng chung giữa các lần ghi
+            sample_rate: Tần số lấy mẫu của bản ghi
+            channels: Số kênh (sample xen kẽ)
+            min_pause_seconds: Khoảng dừng tối thiểu để đoán
+        """
+        self.executor = executor
+        self.transcribe = transcribe
+        self.stats = stats
+        self.sample_rate = int(sample_rate)
+        self.channels = max(int(channels), 1)
+        self.min_pause_seconds = min_pause_seconds
+        self.future = None
+        self.start = 0            # Sample đầu của audio đã đoán
+        self.speech_end = 0       # Sample cuối có tiếng nói lúc đoán
+        self.seconds = 0.0
+
+    def should_start(self, vad, start: int) -> bool:
+        """
+        Có nên đoán ngay: đang dừng đủ lâu và có tiếng nói mới kể từ start
+        (và kể từ lần đoán trước)
+
+        Args:
+            vad: VoiceActivityDetector của lần ghi
+            start: Sample đầu phần chưa được nhận dạng (sau điểm cắt đoạn cuối)
+        """
+        if vad is None or vad.in_speech or vad.trailing_silence < self.min_pause_seconds:
+            return False
+        speech_end = max((end for _, end in vad.segments(include_open=False)), default=0)
+        if speech_end <= start:
+            return False
+        return self.future is None or self.start != start or speech_end > self.speech_end
+
+    def submit(self, audio: np.ndarray, start: int, end: int, segments: list):
+        """
+        Gửi nhận dạng thử đoạn [start, end), bỏ lần đoán cũ nếu có
+
+        Args:
+            audio: Bản sao audio của đoạn
+            start: Sample đầu của đoạn trên cả bản ghi
+            end: Sample cuối (không tính) của đoạn
+            segments: Các đoạn nói trên trục sample của audio
+        """
+        self.discard()
+        self.start = start
+        self.speech_end = start + max((e for _, e in segments), default=0)
+        self.seconds = (end - start) / float(self.sample_rate * self.channels)
+        self.future = self.executor.submit(self.transcribe, audio, segments)
+        self.stats.record('start')
+
+    def take(self, segments: list, start: int):
+        """
+        Lúc thả phím: trả future nếu đoán trúng (không có tiếng nói sau lúc
+        đoán và vẫn cùng điểm bắt đầu), ngược lại bỏ lần đoán
+
+        Args:
+            segments: Các đoạn nói cuối cùng của cả bản ghi
+            start: Sample đầu phần chưa được nhận dạng
+
+        Returns:
+            Future text hoặc None
+        """
+        if self.future is None:
+            return None
+        speech_end = max((end for _, end in segments), default=0)
+        if start == self.start and speech_end <= self.speech_end:
+            future, self.future = self.future, None
+            self.stats.record('hit')
+            return future
+        self.discard()
+        return None
+
+    def discard(self):
+        """Bỏ lần đoán hiện tại (hủy nếu chưa gửi, nếu đã gửi thì tính là quota tốn thêm)"""
+        if self.future is None:
+            return
+        future, self.future = self.future, None
+        self.stats.record('miss', 0.0 if future.cancel() else self.seconds)
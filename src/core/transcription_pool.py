@@ -0,0 +1,166 @@
+"""
+Transcription Pool - Nhận dạng các lần ghi trên số worker cố định, dán kết quả đúng thứ tự ghi
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+
+class TranscriptionJob:
+    """
+    1 lần ghi (utterance) cần nhận dạng. Mọi dữ liệu của lần ghi nằm trong job
+    nên lần ghi sau không thể ghi đè lên job đang chạy.
+    """
+
+    def __init__(self, audio, enhancer=None, timeline=None, segments=None, upload_encoder=None,
+                 segmented=None, speculative=None, released_at: float = None):
+        """
+        Args:
+            audio: Audio int16 của cả lần ghi
+            enhancer: Streaming enhancer đã xử lý audio (None = batch)
+            timeline: FeatureTimeline của lần ghi
+            segments: Các đoạn nói VAD [(start, end), ...]
+            upload_encoder: Encoder đã nạp trong lúc ghi
+            segmented: SegmentedTranscription của lần ghi
+            speculative: Future nhận dạng thử đã trúng
+            released_at: time.perf_counter() lúc thả phím
+        """
+        self.seq = None               # Thứ tự ghi, do pool gán
+        self.audio = audio
+        self.enhancer = enhancer
+        self.timeline = timeline
+        self.segments = segments
+        self.upload_encoder = upload_encoder
+        self.segmented = segmented
+        self.speculative = speculative
+        self.released_at = released_at
+        self.speculative_used = False  # Kết quả lấy từ nhận dạng thử
+        self.queued_at = None         # time.perf_counter() lúc vào hàng đợi
+        self.started_at = None        # time.perf_counter() lúc worker bắt đầu
+
+    @property
+    def queue_wait(self) -> float:
+        """Số giây job chờ worker rảnh"""
+        if self.queued_at is None or self.started_at is None:
+            return 0.0
+        return self.started_at - self.queued_at
+
+
+class TranscriptionPool:
+    """
+    Worker pool cố định cho các lần ghi liên tiếp:
+
+    - worker(job) chạy song song trên tối đa max_workers thread, trả về kết
+      quả (hoặc None nếu không có gì để dán)
+    - deliver(job, result) được gọi tuần tự, đúng thứ tự ghi (job sau xong
+      trước vẫn chờ job trước được giao)
+    - Backpressure: tối đa max_pending job chưa giao; submit() chờ chỗ trống
+      tối đa submit_timeout giây rồi từ chối
+    """
+
+    def __init__(self, worker: Callable, deliver: Callable, max_workers: int = 2,
+                 max_pending: int = 4, submit_timeout: float = 2.0):
+        """
+        Args:
+            worker: worker(job) -> kết quả
+            deliver: deliver(job, kết quả) - gọi theo thứ tự ghi
+            max_workers: Số job nhận dạng cùng lúc
+            max_pending: Số job tối đa đang chờ / chạy / chờ giao
+            submit_timeout: Thời gian chờ tối đa khi hàng đợi đầy
+        """
+        self.worker = worker
+        self.deliver = deliver
+        self.max_pending = max(int(max_pending), 1)
+        self.submit_timeout = submit_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(int(max_workers), 1),
+                                            thread_name_prefix='stt-job')
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._deliver_lock = threading.Lock()
+        self._done = {}               # seq -> (job, kết quả) chờ tới lượt giao
+        self._next_seq = 0
+        self._pending = 0
+        self.stats = {'submitted': 0, 'rejected': 0, 'delivered': 0, 'failed': 0, 'max_queue_wait': 0.0}
+
+    @property
+    def pending(self) -> int:
+        """Số job chưa giao"""
+        with self._lock:
+            return self._pending
+
+    @property
+    def is_full(self) -> bool:
+        return self.pending >= self.max_pending
+
+    def submit(self, job: TranscriptionJob) -> bool:
+        """
+        Đưa job vào hàng đợi (gán thứ tự ghi)
+
+        Returns:
+            False nếu hàng đợi vẫn đầy sau submit_timeout (job bị từ chối)
+        """
+        if not self._slots.acquire(timeout=self.submit_timeout):
+            with self._lock:
+                self.stats['rejected'] += 1
+            return False
+        with self._lock:
+            job.seq = next(self._seq)
+            job.queued_at = time.perf_counter()
+            self._pending += 1
+            self.stats['submitted'] += 1
+        try:
+            self._executor.submit(self._run, job)
+        except RuntimeError:
+            # Pool đã đóng: vẫn hoàn tất job để không chặn các job sau
+            self._complete(job, None)
+        return True
+
+    def _run(self, job: TranscriptionJob):
+        job.started_at = time.perf_counter()
+        result = None
+        try:
+            result = self.worker(job)
+        except Exception as e:
+            print(f"[ERROR] Transcription job #{job.seq} failed: {e}")
+            with self._lock:
+                self.stats['failed'] += 1
+        self._complete(job, result)
+
+    def _complete(self, job: TranscriptionJob, result):
+        with self._lock:
+            self._done[job.seq] = (job, result)
+            self.stats['max_queue_wait'] = max(self.stats['max_queue_wait'], job.queue_wait)
+        self._flush()
+
+    def _flush(self):
+        """Giao các job đã xong theo đúng thứ tự, dừng ở job đầu tiên chưa xong"""
+        with self._deliver_lock:
+            while True:
+                with self._lock:
+                    entry = self._done.pop(self._next_seq, None)
+                    if entry is None:
+                        return
+                    self._next_seq += 1
+                try:
+                    self.deliver(*entry)
+                except Exception as e:
+                    print(f"[ERROR] Delivering transcription job #{entry[0].seq} failed: {e}")
+                finally:
+                    with self._lock:
+                        self._pending -= 1
+                        self.stats['delivered'] += 1
+                    self._slots.release()
+
+    def get_stats(self) -> dict:
+        """Số job đã nhận / từ chối / giao / lỗi, đang chờ và thời gian chờ worker lâu nhất"""
+        with self._lock:
+            stats = dict(self.stats, pending=self._pending)
+        stats['max_queue_wait'] = round(stats['max_queue_wait'], 3)
+        return stats
+
+    def shutdown(self, wait: bool = False):
+        """Dừng nhận job mới"""
+        self._executor.shutdown(wait=wait)
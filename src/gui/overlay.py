@@ -28,6 +28,7 @@ class ModernVoiceOverlay:
         self.wave_data = [0] * 120
         self.wave_smoothing = 0.2  # Giảm để phản ứng nhanh hơn
         self.current_mic_level = 0
+        self.is_clipping = False  # Chunk mới nhất bị clip (từ feature timeline)
         
         # Wave bars
         self.wave_bars = []
@@ -266,9 +267,18 @@ class ModernVoiceOverlay:
         except:
             pass
     
-    def update_wave_data(self, level: float):
-        """Cập nhật wave data"""
+    def update_wave_data(self, level: float, features: dict = None):
+        """
+        Cập nhật wave data
+
+        Args:
+            level: Level 0-1 (RMS đã chuẩn hóa)
+            features: Đặc trưng của chunk (rms, peak, clipped, zcr, band_*) - tùy chọn
+        """
         try:
+            if features is not None:
+                self.is_clipping = features.get('clipped', 0) > 0
+
             if hasattr(self, 'wave_data'):
                 # Smoothing
                 if len(self.wave_data) > 0:
@@ -392,8 +402,8 @@ class ModernVoiceOverlay:
             center_y = height // 2
             max_height = center_y - 5  # Margin nhỏ hơn để wave to hơn
             
-            # Màu đen cho tất cả bars
-            color = "#000000"  # Đen
+            # Màu đen cho tất cả bars, đỏ khi micro bị clip
+            color = "#dc2626" if self.is_clipping else "#000000"
             
             # VẼ TẤT CẢ bars để đều 2 bên
             for i, (bar_up, bar_down, x, bar_width) in enumerate(self.wave_bars):
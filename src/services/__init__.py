@@ -2,6 +2,12 @@
 Services package - Business logic services
 """
 from .groq_stt_service import GroqSTTService
+from .async_groq_stt_service import AsyncGroqSTTService
+from .key_scheduler import KeyScheduler
+from .key_state_store import KeyStateStore
+from .latency import LatencyTracker, LatencyHistogram
+from .stt_router import STTRouter
 from .text_corrector import VietnameseTextCorrector
 
-__all__ = ['GroqSTTService', 'VietnameseTextCorrector']
+__all__ = ['GroqSTTService', 'AsyncGroqSTTService', 'KeyScheduler', 'KeyStateStore',
+           'LatencyTracker', 'LatencyHistogram', 'STTRouter', 'VietnameseTextCorrector']
@@ -0,0 +1,211 @@
+"""
+Async Groq STT Service - Client asyncio chạy nhiều lần nhận dạng song song trên 1 event loop
+"""
+import asyncio
+import time
+
+try:
+    import aiohttp
+except Exception:
+    aiohttp = None
+
+from .groq_stt_service import DeadlineExceeded, GroqSTTService
+from .key_scheduler import HALF_OPEN
+from .multipart import MultipartBody, as_buffer_parts
+
+
+async def _iterate_body(body: MultipartBody):
+    """Async iterable các buffer của body (aiohttp gửi lần lượt, không ghép)"""
+    for part in body:
+        yield part
+
+
+class AsyncGroqSTTService:
+    """
+    Phiên bản asyncio của GroqSTTService (aiohttp).
+
+    Dùng chung trạng thái key với service đồng bộ được truyền vào (danh sách
+    key, KeyScheduler + circuit breaker, quota) và cùng logic xoay key khi gặp
+    429/401, gửi lại khi lỗi mạng / 5xx, nên client sync và async có thể chạy
+    cạnh nhau. Mọi coroutine phải chạy
+    trên cùng 1 event loop (ClientSession gắn với loop tạo ra nó).
+
+    Hủy task (task.cancel()) hủy luôn request đang gửi; CancelledError không
+    bị nuốt và không làm xoay key. Độ trễ, số lần timeout (thích ứng / cố định
+    / hết deadline) được ghi vào thống kê của service như client đồng bộ.
+    """
+
+    def __init__(self, service: GroqSTTService, max_concurrency: int = 8):
+        """
+        Args:
+            service: GroqSTTService dùng chung key/quota
+            max_concurrency: Số request đồng thời tối đa (cũng là giới hạn kết nối)
+        """
+        self.service = service
+        self.max_concurrency = max(int(max_concurrency), 1)
+        self._session = None
+        self._semaphore = None
+
+    async def _get_session(self):
+        """ClientSession keep-alive (tạo lười trong event loop đang chạy)"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    async def _acquire_key(self, tried_indices: set, deadline: float = None):
+        """
+        Như GroqSTTService._acquire_key nhưng chờ bằng asyncio.sleep (không chặn
+        loop); không chờ quá deadline
+        """
+        service = self.service
+        key_index = service.scheduler.acquire(exclude=tried_indices)
+        if key_index is None:
+            wait = service.scheduler.next_available_in(exclude=tried_indices)
+            if wait is not None and deadline is not None and time.monotonic() + wait >= deadline:
+                wait = None
+            if wait is not None and wait <= service.max_key_wait:
+                await asyncio.sleep(wait)
+                key_index = service.scheduler.acquire(exclude=tried_indices)
+        if key_index is not None:
+            if service.scheduler.key_state(key_index) == HALF_OPEN:
+                print(f"[BREAKER] API key #{key_index + 1} half-open, sending probe request")
+        return key_index
+
+    async def transcribe_audio(self, audio, language: str = "vi", filename: str = "audio.wav",
+                               content_type: str = "audio/wav", timeout: float = None,
+                               audio_seconds: float = None, deadline: float = None) -> str:
+        """
+        Nhận dạng audio trong bộ nhớ
+
+        Args:
+            audio: Nguồn audio như GroqSTTService.transcribe_audio
+            language: Mã ngôn ngữ
+            filename: Tên file gửi lên API
+            content_type: MIME type của audio
+            timeout: Timeout tổng mỗi lần gửi (mặc định = timeout thích ứng / cố định của service)
+            audio_seconds: Độ dài audio (cho timeout thích ứng)
+            deadline: Mốc time.monotonic() phải xong, kể cả gửi lại / đổi key
+
+        Returns:
+            Văn bản nhận dạng được
+
+        Raises:
+            DeadlineExceeded: Nếu hết deadline trước khi có kết quả
+        """
+        if aiohttp is None:
+            raise ImportError("Thiếu thư viện 'aiohttp'. Please cài: pip install aiohttp")
+
+        service = self.service
+        url = f"{service.api_base}/audio/transcriptions"
+        data = {"model": service.model, "language": language, "response_format": "json"}
+        parts = as_buffer_parts(audio)
+        session = await self._get_session()
+
+        # Track các key đã thử để không thử lại
+        tried_indices = set()
+        last_error = None
+        network_errors = 0
+
+        async with self._semaphore:
+            while len(tried_indices) < len(service.api_keys):
+                can_retry = (network_errors < service.max_network_retries
+                             or len(tried_indices) + 1 < len(service.api_keys))
+                (connect, read), adaptive = service._request_timeout(audio_seconds, deadline, can_retry)
+
+                key_index = await self._acquire_key(tried_indices, deadline)
+                if key_index is None:
+                    raise service._no_key_error(tried_indices)
+                tried_indices.add(key_index)
+
+                # Deadline là trần của cả lần gửi (sock_read chỉ giới hạn từng lần đọc)
+                total = max(deadline - time.monotonic(), 0.001) if deadline is not None else None
+                if timeout:
+                    adaptive = False
+                    client_timeout = aiohttp.ClientTimeout(total=min(timeout, total or timeout))
+                else:
+                    client_timeout = aiohttp.ClientTimeout(total=total, sock_connect=connect, sock_read=read)
+
+                body = MultipartBody(data, "file", filename, content_type, parts)
+                headers = {
+                    "Authorization": f"Bearer {service.api_keys[key_index]}",
+                    "Content-Type": body.content_type,
+                    "Content-Length": str(len(body))
+                }
+                try:
+                    started = time.perf_counter()
+                    async with session.post(url, data=_iterate_body(body), headers=headers,
+                                            timeout=client_timeout) as resp:
+                        received = service._quota_ticket()
+                        service.scheduler.update_from_headers(key_index, resp.headers)
+
+                        # 429 / 401 - cùng logic xoay key với client đồng bộ
+                        if service._should_rotate(resp.status, tried_indices, key_index, resp.headers):
+                            continue
+                        resp.raise_for_status()
+                        payload = await resp.json(content_type=None)
+                        service.scheduler.record_success(key_index)
+                        elapsed = time.perf_counter() - started
+                        service.latency.record(elapsed)
+                        if audio_seconds is not None:
+                            service.latency_by_duration.record(audio_seconds, elapsed)
+                        return service._handle_success(resp.headers, payload, tried_indices,
+                                                       key_index, received)
+
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = e
+
+                    if isinstance(e, asyncio.TimeoutError):
+                        with service._hedge_lock:
+                            service.timeout_stats['adaptive_timeouts' if adaptive else 'fixed_timeouts'] += 1
+                        print(f"[TIMEOUT] API key #{key_index + 1}: no response within "
+                              f"{client_timeout.total or read:.1f}s ({'adaptive' if adaptive else 'fixed'})")
+
+                    # 4xx khác - gửi lại cũng vô ích
+                    status = getattr(e, 'status', None)
+                    if status is not None and status < 500:
+                        raise Exception(f"Groq API error: {e!r}")
+
+                    # Network/timeout/5xx - gửi lại, không đổ lỗi cho key
+                    network_errors += 1
+                    delay = service._transport_retry_delay(key_index, e, tried_indices, network_errors)
+                    if delay is not None:
+                        if deadline is not None and time.monotonic() + delay >= deadline:
+                            with service._hedge_lock:
+                                service.timeout_stats['deadline_exceeded'] += 1
+                            raise DeadlineExceeded("Hết thời gian nhận dạng (deadline)") from e
+                        await asyncio.sleep(delay)
+                        continue
+
+                    raise Exception(f"Connection error Groq API: {e!r}")
+
+                finally:
+                    service.scheduler.release(key_index)
+                    service._schedule_persist()
+
+        if last_error:
+            raise last_error
+
+        raise Exception(f"Không thể nhận dạng giọng nói sau khi thử {len(service.api_keys)} API keys")
+
+    async def transcribe_many(self, sources: list, language: str = "vi", filename: str = "audio.wav",
+                              content_type: str = "audio/wav", timeout: float = None,
+                              deadline: float = None) -> list:
+        """
+        Nhận dạng nhiều audio đồng thời (tối đa max_concurrency request cùng lúc),
+        deadline (mốc time.monotonic()) chung cho cả nhóm
+
+        Returns:
+            Danh sách kết quả theo đúng thứ tự sources; phần tử lỗi là Exception
+        """
+        tasks = [self.transcribe_audio(source, language=language, filename=filename,
+                                       content_type=content_type, timeout=timeout, deadline=deadline)
+                 for source in sources]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self):
+        """Đóng ClientSession"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
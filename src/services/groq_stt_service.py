@@ -1,7 +1,12 @@
 """
 Groq STT Service - Speech to text using Groq Whisper API
 """
+import itertools
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Set
 
 try:
@@ -9,23 +14,91 @@ try:
 except Exception:
     requests = None
 
+from .multipart import MultipartBody, as_buffer_parts
+from .http_pool import ConnectTimer, create_session
+from .key_scheduler import KeyScheduler, HALF_OPEN, QUARANTINE_TTL_SECONDS
+from .key_state_store import KeyStateStore, key_id
+from .latency import LatencyTracker, LatencyHistogram
+
+# Backoff giữa các lần gửi lại khi lỗi mạng / 5xx: 0.5, 1, 2... giây
+NETWORK_BACKOFF_SECONDS = 0.5
+
+# Hedging: số mẫu độ trễ tối thiểu trước khi dùng percentile (trước đó dùng
+# HEDGE_INITIAL_DELAY_SECONDS)
+HEDGE_MIN_SAMPLES = 10
+HEDGE_INITIAL_DELAY_SECONDS = 3.0
+
+
+# Timeout thích ứng: read = p99 của nhóm độ dài audio x hệ số + lề, trong
+# khoảng [ADAPTIVE_MIN_READ_SECONDS, timeout]. Chưa đủ mẫu thì ước lượng theo
+# độ dài audio: ADAPTIVE_BASE_READ_SECONDS + 1 giây mỗi giây audio
+ADAPTIVE_MIN_SAMPLES = 5
+ADAPTIVE_READ_MULTIPLIER = 2.0
+ADAPTIVE_READ_MARGIN_SECONDS = 1.0
+ADAPTIVE_MIN_READ_SECONDS = 3.0
+ADAPTIVE_BASE_READ_SECONDS = 5.0
+# Connect = p99 thời gian mở kết nối x 3, trong khoảng [1, 5] giây
+ADAPTIVE_CONNECT_RANGE = (1.0, 5.0)
+
+# Có deadline và còn lượt gửi lại (mạng / key khác): 1 lần gửi dùng tối đa
+# phần này của thời gian còn lại, phần còn lại để dành cho lần gửi sau
+DEADLINE_ATTEMPT_SHARE = 0.5
+
+
+class DeadlineExceeded(Exception):
+    """Hết thời gian tổng cho 1 lần nhận dạng"""
+
+
+class RequestCancelled(Exception):
+    """Request thua trong hedging đã bị hủy"""
+
+
+class _KeyClaims:
+    """
+    Key đang có request bay của 1 lần nhận dạng hedged. Mỗi request hedge có
+    tried_indices riêng; key đang được request kia dùng luôn bị loại trừ nên 2
+    request không bao giờ cùng gửi trên 1 key (kể cả khi gửi lại sau lỗi mạng)
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.keys = set()
+
 
 class GroqSTTService:
     """Dịch vụ STT dùng Groq Whisper (OpenAI-compatible API) với hỗ trợ nhiều API keys"""
 
     def __init__(self, api_base: str, model: str = "whisper-large-v3", api_key_env: str = "GROQ_API_KEY", 
-                 api_key: str = None, api_keys: list = None, timeout: int = 60):
+                 api_key: str = None, api_keys: list = None, timeout: int = 60, pool_size: int = 4,
+                 key_rpm: float = None, max_key_wait: float = 2.0, max_network_retries: int = 1,
+                 state_file: str = None, hedge_percentile: float = None, hedge_min_delay: float = 0.5,
+                 adaptive_timeout: bool = False, hedge_max_workers: int = None):
+        self.logger = logging.getLogger(__name__)
         self.api_base = api_base.rstrip('/')
         self.model = model
         self.api_key_env = api_key_env
         self.timeout = timeout
+
+        # HTTP keep-alive: mỗi API key 1 Session (pool kết nối riêng), tránh
+        # DNS + TCP + TLS handshake cho mỗi lần nhận dạng
+        self.pool_size = pool_size
+        self.connect_timer = ConnectTimer()
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+        self._last_activity = 0.0
+        self.last_timing = {}
         
-        # Quota tracking
-        self.current_quota_info = {
+        # Quota tracking: snapshot bất biến (key gần nhất + quota của key đó).
+        # Đọc không cần lock (chỉ đọc 1 tham chiếu); ghi = thay cả snapshot trong
+        # _quota_lock, phản hồi đến sau nhưng nhận trước (seq nhỏ hơn) không đè lên
+        self._quota_lock = threading.Lock()
+        self._quota_seq = itertools.count(1)  # next() atomic (GIL), không cần lock
+        self._quota = {
             'remaining': None,  # Sẽ được update từ API response
             'limit': None,
             'reset': None,
-            'key_index': 0
+            'key_index': 0,
+            'seq': 0
         }
         
         # Fake quota để test UI (sẽ bị override bởi real data nếu API trả về)
@@ -60,38 +133,163 @@ class GroqSTTService:
                 f"     Example: \"api_keys\": [\"gsk_...\", \"gsk_...\"]"
             )
         
-        # Index của key hiện tại
-        self.current_key_index = 0
+        # Chọn key theo quota còn lại thay vì chờ 429 rồi mới xoay vòng
+        self.scheduler = KeyScheduler(len(self.api_keys), rpm=key_rpm)
+        self.max_key_wait = max_key_wait
+
+        # Lỗi mạng / 5xx không phải lỗi của key: gửi lại (không xoay key, không mở breaker)
+        self.max_network_retries = max(int(max_network_retries), 0)
+
+        # Lưu quota / breaker của từng key ra file: khởi động lại không gửi
+        # vào key đã biết hết quota (mỗi sáng tray app khởi động lại)
+        self.key_ids = [key_id(key) for key in self.api_keys]
+        self.state_store = KeyStateStore(state_file) if state_file else None
+        self._persist_timer = None
+        self._persist_lock = threading.Lock()
+        self._load_key_state()
+
+        # Độ trễ request thành công gần đây (p50/p95/p99) và hedging: nếu quá
+        # percentile hedge_percentile chưa có phản hồi thì gửi thêm trên key khác
+        self.latency = LatencyTracker()
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'skipped_busy': 0}
+        self._hedge_lock = threading.Lock()
+        self._hedge_executor = None
+        # Số thread gửi request khi hedging: mặc định = số kết nối keep-alive của
+        # mọi key (pool_size x số key), ít nhất 2 (1 request + 1 hedge)
+        self.hedge_max_workers = max(int(hedge_max_workers or pool_size * len(self.api_keys)), 2)
+        self._hedge_active = 0
+
+        # Timeout thích ứng theo histogram độ trễ (nhóm theo độ dài audio)
+        # thay vì 1 hằng số cho mọi request; timeout giữ vai trò trần
+        self.adaptive_timeout = adaptive_timeout
+        self.latency_by_duration = LatencyHistogram()
+        self.connect_latency = LatencyTracker()
+        self.timeout_stats = {'adaptive_timeouts': 0, 'fixed_timeouts': 0, 'deadline_exceeded': 0}
         
         print(f"[OK] Loaded {len(self.api_keys)} API key(s)")
         if len(self.api_keys) > 1:
             print(f"   -> Supports auto-rotation when quota exceeded")
     
+    @property
+    def current_key_index(self) -> int:
+        """Index của key có phản hồi thành công gần nhất"""
+        return self._quota['key_index']
+
+    @property
+    def current_quota_info(self) -> dict:
+        """Bản sao snapshot quota hiện tại (remaining / limit / reset / key_index)"""
+        return dict(self._quota)
+
+    def _quota_ticket(self) -> int:
+        """Số thứ tự lấy ngay khi nhận phản hồi - quyết định snapshot nào mới hơn"""
+        return next(self._quota_seq)
+
+    def _publish_quota(self, key_index: int, quota: dict, seq: int) -> bool:
+        """
+        Thay snapshot quota (atomic) nếu phản hồi mới hơn snapshot hiện tại
+
+        Args:
+            key_index: Key của phản hồi
+            quota: {'remaining', 'limit', 'reset'} đọc từ phản hồi (thiếu = None)
+            seq: Số thứ tự từ _quota_ticket()
+
+        Returns:
+            True nếu snapshot đã được thay
+        """
+        with self._quota_lock:
+            if seq <= self._quota['seq']:
+                return False
+            self._quota = {
+                'remaining': quota.get('remaining'),
+                'limit': quota.get('limit'),
+                'reset': quota.get('reset'),
+                'key_index': key_index,
+                'seq': seq
+            }
+            return True
+
     def get_quota_info(self) -> dict:
         """Lấy thông tin quota hiện tại"""
+        quota = self._quota  # 1 snapshot nhất quán, không lock
         # Nếu dùng fake quota cho test
-        if self.use_fake_quota and self.current_quota_info.get('remaining') is None:
+        if self.use_fake_quota and quota['remaining'] is None:
             return {
                 'remaining': 480,  # Fake data
                 'limit': 500,
                 'reset': None,
-                'key_index': self.current_key_index + 1,
+                'key_index': quota['key_index'] + 1,
                 'total_keys': len(self.api_keys)
             }
         
         return {
-            'remaining': self.current_quota_info.get('remaining'),
-            'limit': self.current_quota_info.get('limit'),
-            'reset': self.current_quota_info.get('reset'),
-            'key_index': self.current_key_index + 1,
-            'total_keys': len(self.api_keys)
+            'remaining': quota['remaining'],
+            'limit': quota['limit'],
+            'reset': quota['reset'],
+            'key_index': quota['key_index'] + 1,
+            'total_keys': len(self.api_keys),
+            'keys': self.scheduler.snapshot()
         }
     
-    def _update_quota_from_headers(self, headers: dict):
-        """Cập nhật thông tin quota từ response headers"""
+    def _load_key_state(self):
+        """Nạp trạng thái key đã lưu (nếu có) và chọn key khởi đầu theo đó"""
+        if self.state_store is None:
+            return
         try:
-            # Debug: In ra tất cả headers để xem
-            print(f"[DEBUG] Response headers: {dict(headers)}")
+            restored = self.scheduler.restore_state(self.key_ids, self.state_store.load())
+        except Exception as e:
+            print(f"[WARNING] Không nạp được key state: {e}")
+            return
+        if not restored:
+            return
+        best = self.scheduler.peek()
+        if best is not None:
+            state = self.scheduler.snapshot()[best]
+            self._publish_quota(best, {'remaining': state['remaining_requests'],
+                                       'limit': state['limit_requests']}, self._quota_ticket())
+        print(f"[OK] Restored state of {restored} API key(s) from {self.state_store.path}")
+        quarantined = [i + 1 for i, state in enumerate(self.scheduler.snapshot()) if state['invalid']]
+        if quarantined:
+            print(f"[WARNING] API key(s) #{', #'.join(map(str, quarantined))} still quarantined after a 401 "
+                  f"(up to {QUARANTINE_TTL_SECONDS / 3600:g}h); delete {self.state_store.path} to retry them")
+
+    def _schedule_persist(self, delay: float = 1.0):
+        """Ghi key state ở nền, gộp các thay đổi gần nhau thành 1 lần ghi"""
+        if self.state_store is None:
+            return
+        with self._persist_lock:
+            if self._persist_timer is not None:
+                return
+            self._persist_timer = threading.Timer(delay, self.persist_key_state)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def persist_key_state(self):
+        """Ghi ngay trạng thái key ra file (gộp với instance khác đang chạy)"""
+        if self.state_store is None:
+            return
+        with self._persist_lock:
+            self._persist_timer = None
+        try:
+            merged = self.state_store.save(self.scheduler.export_state(self.key_ids))
+            # Nhận luôn trạng thái mới hơn do instance khác ghi
+            self.scheduler.restore_state(self.key_ids, merged)
+        except Exception as e:
+            print(f"[WARNING] Không lưu được key state: {e}")
+
+    def _update_quota_from_headers(self, headers: dict, key_index: int, seq: int):
+        """
+        Cập nhật thông tin quota từ response headers
+
+        Args:
+            headers: Header phản hồi thành công
+            key_index: Key đã gửi request
+            seq: Số thứ tự lấy lúc nhận phản hồi (_quota_ticket)
+        """
+        quota = {'remaining': None, 'limit': None, 'reset': None}
+        try:
+            self.logger.debug(f"[QUOTA] Response headers: {dict(headers)}")
             
             # Groq API có thể dùng các tên headers khác nhau
             # Thử các biến thể có thể
@@ -104,8 +302,8 @@ class GroqSTTService:
             
             for variant in header_variants:
                 if variant in headers:
-                    self.current_quota_info['remaining'] = int(headers.get(variant, 0))
-                    print(f"[DEBUG] Found remaining in header: {variant} = {self.current_quota_info['remaining']}")
+                    quota['remaining'] = int(headers.get(variant, 0))
+                    self.logger.debug(f"[QUOTA] Found remaining in header: {variant} = {quota['remaining']}")
                     break
             
             limit_variants = [
@@ -117,31 +315,240 @@ class GroqSTTService:
             
             for variant in limit_variants:
                 if variant in headers:
-                    self.current_quota_info['limit'] = int(headers.get(variant, 0))
-                    print(f"[DEBUG] Found limit in header: {variant} = {self.current_quota_info['limit']}")
+                    quota['limit'] = int(headers.get(variant, 0))
+                    self.logger.debug(f"[QUOTA] Found limit in header: {variant} = {quota['limit']}")
                     break
             
             if 'x-ratelimit-reset-requests' in headers:
-                self.current_quota_info['reset'] = headers.get('x-ratelimit-reset-requests')
-            
-            self.current_quota_info['key_index'] = self.current_key_index
+                quota['reset'] = headers.get('x-ratelimit-reset-requests')
             
             # Nếu không tìm thấy quota info, log warning
-            if self.current_quota_info['remaining'] is None:
+            if quota['remaining'] is None:
                 print(f"[WARNING] Không tìm thấy quota info trong response headers")
                 print(f"[INFO] Headers available: {list(headers.keys())}")
             
         except Exception as e:
             print(f"[ERROR] Lỗi parse quota headers: {e}")
-            pass
 
-    def _get_current_key(self) -> str:
-        """Lấy API key hiện tại"""
-        return self.api_keys[self.current_key_index]
+        self._publish_quota(key_index, quota, seq)
+
+    def _record_timing(self, before: tuple, total_seconds: float):
+        """Tách thời gian request thành connect và upload + chờ phản hồi"""
+        self._last_activity = time.time()
+        after = self.connect_timer.snapshot()
+        new_connection = after[0] > before[0]
+        connect_seconds = after[1] - before[1] if new_connection else 0.0
+        if new_connection:
+            self.connect_latency.record(connect_seconds)
+        self.last_timing = {
+            'new_connection': new_connection,
+            'connect_ms': round(connect_seconds * 1000, 1),
+            'transfer_ms': round((total_seconds - connect_seconds) * 1000, 1),
+            'total_ms': round(total_seconds * 1000, 1)
+        }
+        print(f"[NET] connect {self.last_timing['connect_ms']:.0f}ms "
+              f"({'new' if new_connection else 'reused'}), upload + response "
+              f"{self.last_timing['transfer_ms']:.0f}ms")
+
+    def _get_session(self, key_index: int):
+        """Session keep-alive của API key (tạo khi dùng lần đầu)"""
+        with self._sessions_lock:
+            session = self._sessions.get(key_index)
+            if session is None:
+                session = create_session(self.connect_timer, self.pool_size)
+                session.headers["Authorization"] = f"Bearer {self.api_keys[key_index]}"
+                self._sessions[key_index] = session
+            return session
+
+    def prewarm(self, min_interval: float = 15.0) -> bool:
+        """
+        Mở sẵn kết nối tới API (chạy nền) để lúc upload không còn phải handshake.
+        Gọi khi bắt đầu ghi âm - kết nối được thiết lập trong lúc người dùng nói.
+
+        Args:
+            min_interval: Bỏ qua nếu vừa có request trong khoảng này (kết nối còn sống)
+
+        Returns:
+            True nếu đã khởi động pre-warm
+        """
+        if requests is None or time.time() - self._last_activity < min_interval:
+            return False
+        self._last_activity = time.time()
+        # Key sẽ được chọn cho request tới (không giữ chỗ)
+        key_index = self.scheduler.peek()
+        if key_index is None:
+            key_index = self.current_key_index
+        threading.Thread(target=self._prewarm_connection, args=(key_index,),
+                         daemon=True).start()
+        return True
+
+    def _prewarm_connection(self, key_index: int):
+        """Gửi HEAD nhẹ để kết nối được mở và trả về pool"""
+        try:
+            before = self.connect_timer.snapshot()
+            started = time.perf_counter()
+            resp = self._get_session(key_index).head(f"{self.api_base}/models", timeout=min(self.timeout, 10))
+            resp.close()
+            after = self.connect_timer.snapshot()
+            if after[0] > before[0]:
+                print(f"[NET] Connection pre-warmed: connect {(after[1] - before[1]) * 1000:.0f}ms, "
+                      f"total {(time.perf_counter() - started) * 1000:.0f}ms")
+        except Exception as e:
+            print(f"[WARNING] Pre-warm connection failed: {str(e)[:80]}")
+
+    def get_network_stats(self) -> dict:
+        """Thống kê mạng: số kết nối mới, thời gian connect, timing của request gần nhất"""
+        stats = self.connect_timer.to_dict()
+        stats['last_request'] = dict(self.last_timing)
+        stats['latency'] = self.get_latency_stats()
+        return stats
+
+    def get_latency_stats(self) -> dict:
+        """
+        p50 / p95 / p99 độ trễ request (tổng và theo độ dài audio), tỉ lệ hedge
+        và số lần timeout (thích ứng / cố định / hết deadline)
+        """
+        stats = self.latency.to_dict()
+        stats['by_duration'] = self.latency_by_duration.to_dict()
+        with self._hedge_lock:
+            hedge = dict(self.hedge_stats)
+            stats['timeouts'] = dict(self.timeout_stats)
+        hedge['hedge_rate'] = round(hedge['hedged'] / hedge['requests'], 3) if hedge['requests'] else 0.0
+        stats['hedge'] = hedge
+        return stats
+
+    def _request_timeout(self, audio_seconds: float = None, deadline: float = None,
+                         can_retry: bool = False):
+        """
+        (connect, read) timeout cho 1 lần gửi
+
+        Args:
+            audio_seconds: Độ dài audio (chọn nhóm trong histogram)
+            deadline: Mốc time.monotonic() phải xong cả lần nhận dạng
+            can_retry: Còn lượt gửi lại sau lần này (giữ lại thời gian cho lần đó)
+
+        Returns:
+            ((connect, read), adaptive) - adaptive = True nếu read ngắn hơn timeout cố định
+
+        Raises:
+            DeadlineExceeded: Nếu deadline đã qua
+        """
+        connect, read = float(self.timeout), float(self.timeout)
+        if self.adaptive_timeout:
+            low, high = ADAPTIVE_CONNECT_RANGE
+            connect_p99 = self.connect_latency.percentile(99, min_samples=3)
+            connect = min(max(connect_p99 * 3.0, low), high) if connect_p99 is not None else high
+            if audio_seconds is not None:
+                p99 = self.latency_by_duration.percentile(audio_seconds, 99, min_samples=ADAPTIVE_MIN_SAMPLES)
+                if p99 is not None:
+                    read = p99 * ADAPTIVE_READ_MULTIPLIER + ADAPTIVE_READ_MARGIN_SECONDS
+                else:
+                    read = ADAPTIVE_BASE_READ_SECONDS + audio_seconds
+                read = min(max(read, ADAPTIVE_MIN_READ_SECONDS), float(self.timeout))
+        adaptive = read < self.timeout
+
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._hedge_lock:
+                    self.timeout_stats['deadline_exceeded'] += 1
+                raise DeadlineExceeded("Hết thời gian nhận dạng (deadline)")
+            budget = remaining * DEADLINE_ATTEMPT_SHARE if can_retry else remaining
+            connect, read = min(connect, budget), min(read, budget)
+        return (connect, read), adaptive
+
+    def close(self):
+        """Lưu key state và đóng mọi Session (giải phóng kết nối keep-alive)"""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+            self._hedge_executor = None
+        with self._persist_lock:
+            timer, self._persist_timer = self._persist_timer, None
+        if timer is not None:
+            timer.cancel()
+        self.persist_key_state()
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
     
+    def _acquire_key(self, tried_indices: set, claims: _KeyClaims = None):
+        """
+        Giữ chỗ key còn nhiều quota nhất chưa thử (gọi scheduler.release() khi xong).
+        Nếu mọi key đang tạm hết quota nhưng sắp reset (<= max_key_wait) thì chờ.
+
+        Args:
+            tried_indices: Các key request này đã thử
+            claims: Key đang được request hedge khác dùng (None = không hedge)
+
+        Returns:
+            Index của key, hoặc None nếu không còn key dùng được
+        """
+        def acquire():
+            if claims is None:
+                return self.scheduler.acquire(exclude=tried_indices)
+            with claims.lock:
+                index = self.scheduler.acquire(exclude=tried_indices | claims.keys)
+                if index is not None:
+                    claims.keys.add(index)
+                return index
+
+        key_index = acquire()
+        if key_index is None:
+            exclude = tried_indices | claims.keys if claims is not None else tried_indices
+            wait = self.scheduler.next_available_in(exclude=exclude)
+            if wait is not None and wait <= self.max_key_wait:
+                print(f"[WAIT] All API keys busy, waiting {wait:.1f}s for quota reset")
+                time.sleep(wait)
+                key_index = acquire()
+        if key_index is not None:
+            if self.scheduler.key_state(key_index) == HALF_OPEN:
+                print(f"[BREAKER] API key #{key_index + 1} half-open, sending probe request")
+        return key_index
+
+    def _transport_retry_delay(self, key_index: int, error, tried_indices: set, attempt: int):
+        """
+        Lỗi mạng / timeout / 5xx: lỗi đường truyền chứ không phải của key, nên không
+        mở breaker và không đánh dấu key đã thử - chỉ gửi lại sau backoff.
+
+        Args:
+            key_index: Key vừa gửi
+            error: Lỗi gặp phải
+            tried_indices: Các key đã thử (key_index được bỏ ra)
+            attempt: Số lần lỗi đường truyền trong lần nhận dạng này (từ 1)
+
+        Returns:
+            Số giây chờ trước khi gửi lại, None nếu đã hết lượt
+        """
+        tried_indices.discard(key_index)
+        if attempt > self.max_network_retries:
+            return None
+        delay = NETWORK_BACKOFF_SECONDS * 2 ** (attempt - 1)
+        print(f"[WARNING] Network/server error ({str(error)[:50]}), retry {attempt}/{self.max_network_retries} "
+              f"in {delay:.1f}s")
+        return delay
+
+    def _no_key_error(self, tried_indices: set) -> Exception:
+        """Lỗi khi không còn key nào gửi được (không tốn round trip)"""
+        wait = self.scheduler.next_available_in(exclude=tried_indices)
+        if wait is None and not tried_indices:
+            return Exception(
+                f"Tất cả {len(self.api_keys)} API keys đều invalid!\n"
+                f"[TIP] Please kiểm tra lại keys tại: https://console.groq.com/keys"
+            )
+        hint = f" (reset sau ~{wait:.0f}s)" if wait else ""
+        return Exception(
+            f"Tất cả {len(self.api_keys)} API keys đều hết quota{hint}!\n"
+            f"[TIP] Please đợi hoặc thêm thêm API keys to config.json"
+        )
+
     def _rotate_key(self, tried_indices: set) -> bool:
         """
-        Switching to API key tiếp theo chưa thử.
+        Kiểm tra còn API key chưa thử và đang dùng được (theo scheduler).
         Args:
             tried_indices: Set các index đã thử
         Returns:
@@ -150,111 +557,353 @@ class GroqSTTService:
         if len(self.api_keys) <= 1:
             return False  # Chỉ có 1 key, không thể rotate
         
-        # Thử tìm key tiếp theo chưa được thử
-        for _ in range(len(self.api_keys)):
-            self.current_key_index = (self.current_key_index + 1) % len(self.api_keys)
-            
-            # Nếu tìm thấy key chưa thử
-            if self.current_key_index not in tried_indices:
-                key_preview = self._get_current_key()[:20] + "..."
-                print(f"[ROTATE] Switching to API key #{self.current_key_index + 1}/{len(self.api_keys)} ({key_preview})")
-                return True
+        next_index = self.scheduler.peek(exclude=tried_indices)
+        if next_index is not None:
+            key_preview = self.api_keys[next_index][:20] + "..."
+            print(f"[ROTATE] Switching to API key #{next_index + 1}/{len(self.api_keys)} ({key_preview})")
+            return True
         
-        # Tried all tất cả keys
+        # Tried all tất cả keys (hoặc các key còn lại đang hết quota)
         print(f"[WARNING] Tried all {len(self.api_keys)} API keys")
         return False
 
-    def transcribe(self, wav_path: str, language: str = "vi") -> str:
+    def _should_rotate(self, status_code: int, tried_indices: set, key_index: int = None,
+                       headers=None) -> bool:
+        """
+        Xử lý 429 (hết quota) và 401 (key invalid) - dùng chung cho client sync và async
+
+        Args:
+            status_code: HTTP status của phản hồi
+            tried_indices: Các key đã thử trong lần nhận dạng này
+            key_index: Key đã gửi request (mặc định key hiện tại)
+            headers: Header phản hồi (retry-after / x-ratelimit-reset-* cho 429)
+
+        Returns:
+            True nếu đã chuyển sang key khác và cần gửi lại, False nếu không phải 429/401
+
+        Raises:
+            Exception: Nếu mọi key đều đã thử
+        """
+        if key_index is None:
+            key_index = self.current_key_index
+
+        # Kiểm tra lỗi quota (429 - Too Many Requests)
+        if status_code == 429:
+            backoff = self.scheduler.mark_rate_limited(key_index, headers)
+            print(f"[WARNING] API key #{key_index + 1} out of quota (429), breaker open for {backoff:.1f}s")
+            
+            # Thử rotate sang key khác chưa thử
+            if self._rotate_key(tried_indices):
+                return True  # Thử lại với key mới
+            raise Exception(
+                f"Tất cả {len(self.api_keys)} API keys đều hết quota!\n"
+                f"[TIP] Please đợi hoặc thêm thêm API keys to config.json"
+            )
+        
+        # Kiểm tra lỗi 401 trước raise_for_status
+        if status_code == 401:
+            if self.state_store is not None:
+                scope = (f"for {QUARANTINE_TTL_SECONDS / 3600:g}h, also after restart "
+                         f"(delete {self.state_store.path} to retry sooner)")
+            else:
+                scope = "for this session"
+            print(f"[WARNING] API key #{key_index + 1} invalid (401), quarantined {scope}")
+            self.scheduler.mark_invalid(key_index)
+            
+            # Thử rotate sang key khác chưa thử
+            if self._rotate_key(tried_indices):
+                return True
+            raise Exception(
+                f"Tất cả {len(self.api_keys)} API keys đều invalid!\n"
+                f"[TIP] Please kiểm tra lại keys tại: https://console.groq.com/keys"
+            )
+        return False
+
+    def _handle_success(self, headers, payload: dict, tried_indices: set, key_index: int,
+                        seq: int = None) -> str:
+        """
+        Cập nhật quota từ headers và lấy text từ phản hồi thành công
+
+        Args:
+            key_index: Key đã gửi request thành công
+            seq: Số thứ tự lấy lúc nhận phản hồi (None = lấy lúc này)
+        """
+        # Cập nhật quota info từ headers
+        self._update_quota_from_headers(headers, key_index, seq if seq is not None else self._quota_ticket())
+        
+        # Parse response
+        text = payload.get("text")
+        if not text:
+            raise ValueError("Phản hồi Groq không có trường 'text'")
+        
+        # Thành công - Log quota info (của đúng key vừa dùng, không phải của request khác)
+        state = self.scheduler.snapshot()[key_index]
+        if len(tried_indices) > 1:
+            print(f"[OK] Recognition successful with API key #{key_index + 1} (đã thử {len(tried_indices)} keys)")
+        
+        if state['remaining_requests'] is not None:
+            print(f"[STAT] Quota remaining: {state['remaining_requests']}/{state['limit_requests']} requests")
+        
+        return text
+
+    def transcribe(self, wav_path: str, language: str = "vi", filename: str = "audio.wav",
+                   content_type: str = "audio/wav") -> str:
+        """
+        Nhận dạng file audio trên đĩa (wrapper của transcribe_audio)
+
+        Args:
+            wav_path: Đường dẫn file audio (WAV hoặc FLAC...)
+            language: Mã ngôn ngữ
+            filename: Tên file gửi lên API (phần mở rộng cho biết định dạng)
+            content_type: MIME type của file
+
+        Returns:
+            Văn bản nhận dạng được
+        """
+        with open(wav_path, "rb") as f:
+            return self.transcribe_audio(f, language=language, filename=filename, content_type=content_type)
+
+    def transcribe_audio(self, audio, language: str = "vi", filename: str = "audio.wav",
+                         content_type: str = "audio/wav", audio_seconds: float = None,
+                         deadline: float = None) -> str:
+        """
+        Nhận dạng audio trong bộ nhớ (không cần file tạm)
+
+        Args:
+            audio: bytes / memoryview / mảng NumPy, BytesIO, hoặc iterable các chunk
+                   bytes-like (vd. [wav_header, view của capture buffer])
+            language: Mã ngôn ngữ
+            filename: Tên file gửi lên API (phần mở rộng cho biết định dạng)
+            content_type: MIME type của audio
+            audio_seconds: Độ dài audio (cho timeout thích ứng)
+            deadline: Mốc time.monotonic() phải xong, kể cả gửi lại / đổi key
+
+        Returns:
+            Văn bản nhận dạng được
+        """
         if requests is None:
             raise ImportError("Thiếu thư viện 'requests'. Please cài: pip install requests")
 
-        url = f"{self.api_base}/audio/transcriptions"
         data = {"model": self.model, "language": language, "response_format": "json"}
+        parts = as_buffer_parts(audio)
+
+        request = {'audio_seconds': audio_seconds, 'deadline': deadline}
+        if self.hedge_percentile and len(self.api_keys) > 1:
+            return self._transcribe_hedged(parts, data, filename, content_type, request)
+        return self._transcribe_parts(parts, data, filename, content_type, set(), request=request)
+
+    def _hedge_delay(self, audio_seconds: float = None) -> float:
+        """
+        Thời gian chờ trước khi hedge: percentile độ trễ gần đây của nhóm độ dài
+        audio (hoặc của mọi request nếu nhóm chưa đủ mẫu), >= hedge_min_delay
+        """
+        delay = None
+        if audio_seconds is not None:
+            delay = self.latency_by_duration.percentile(audio_seconds, self.hedge_percentile,
+                                                        min_samples=HEDGE_MIN_SAMPLES)
+        if delay is None:
+            delay = self.latency.percentile(self.hedge_percentile, min_samples=HEDGE_MIN_SAMPLES)
+        if delay is None:
+            delay = HEDGE_INITIAL_DELAY_SECONDS
+        return max(delay, self.hedge_min_delay)
+
+    def _transcribe_hedged(self, parts: list, data: dict, filename: str, content_type: str,
+                           request: dict) -> str:
+        """
+        Gửi trên 1 key; nếu quá _hedge_delay() chưa có phản hồi thì gửi cùng audio
+        trên 1 key khỏe khác, lấy kết quả về trước và hủy request còn lại.
+
+        Mỗi request có tried_indices riêng và loại trừ key request kia đang dùng
+        (_KeyClaims) nên không bao giờ cùng gửi trên 1 key. Request thua bị hủy
+        ngay nếu còn đang upload, nếu đã upload xong thì phản hồi của nó bị bỏ
+        qua khi về tới.
+
+        Khi tải cao (nhiều lần nhận dạng hơn hedge_max_workers): thời gian chờ
+        hedge chỉ tính từ lúc request được gửi (không tính lúc xếp hàng trong
+        executor), và không hedge khi mọi thread đều bận - request hedge chỉ
+        xếp hàng thêm và làm các request khác chậm theo.
+        """
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=self.hedge_max_workers,
+                                                          thread_name_prefix='stt-hedge')
+            executor = self._hedge_executor
+            self.hedge_stats['requests'] += 1
+
+        claims = _KeyClaims()
+        cancels = {}
+
+        def run(cancel_event, started):
+            with self._hedge_lock:
+                self._hedge_active += 1
+            started.set()
+            try:
+                return self._transcribe_parts(parts, data, filename, content_type,
+                                              set(), cancel_event, request, claims)
+            finally:
+                with self._hedge_lock:
+                    self._hedge_active -= 1
+
+        def submit(started=None):
+            cancel_event = threading.Event()
+            future = executor.submit(run, cancel_event, started or threading.Event())
+            cancels[future] = cancel_event
+            return future
+
+        started = threading.Event()
+        primary = submit(started)
+        delay = self._hedge_delay(request['audio_seconds'])
+        while not started.wait(delay) and not primary.done():
+            pass  # Còn xếp hàng trong executor
+        done, _ = wait([primary], timeout=delay)
+        with claims.lock:
+            busy = set(claims.keys)
+        if primary in done or self.scheduler.peek(exclude=busy) is None:
+            return primary.result()
+        with self._hedge_lock:
+            saturated = self._hedge_active >= self.hedge_max_workers
+            if saturated:
+                self.hedge_stats['skipped_busy'] += 1
+        if saturated:
+            return primary.result()
+
+        # Phản hồi chậm hơn percentile - gửi thêm trên key khác
+        with self._hedge_lock:
+            self.hedge_stats['hedged'] += 1
+        print(f"[HEDGE] No response after {delay:.2f}s, sending hedge request on another key")
+        hedge = submit()
+
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    text = future.result()
+                except Exception as e:
+                    if first_error is None or future is primary:
+                        first_error = e
+                    continue
+                # Thắng: hủy request còn lại
+                for other in pending:
+                    cancels[other].set()
+                if future is hedge:
+                    with self._hedge_lock:
+                        self.hedge_stats['hedge_wins'] += 1
+                    print("[HEDGE] Hedge request answered first")
+                return text
+        raise first_error
+
+    def _transcribe_parts(self, parts: list, data: dict, filename: str, content_type: str,
+                          tried_indices: set, cancel_event: threading.Event = None,
+                          request: dict = None, claims: _KeyClaims = None) -> str:
+        """
+        Gửi request, chọn / xoay key theo scheduler cho tới khi thành công
+
+        Args:
+            parts: Buffer của file audio (xem as_buffer_parts)
+            data: Các trường form (model, language...)
+            filename: Tên file gửi lên API
+            content_type: MIME type của audio
+            tried_indices: Các key request này đã thử
+            cancel_event: Khi được set, hủy request (RequestCancelled)
+            request: {'audio_seconds', 'deadline'} của lần nhận dạng (timeout thích ứng)
+            claims: Key đang được request hedge khác dùng (None = không hedge)
+
+        Returns:
+            Văn bản nhận dạng được
+        """
+        url = f"{self.api_base}/audio/transcriptions"
+        request = request or {}
+        audio_seconds = request.get('audio_seconds')
 
         # Track các key đã thử để không thử lại
-        tried_indices = set()
         last_error = None
+        network_errors = 0
         
         while len(tried_indices) < len(self.api_keys):
+            if cancel_event is not None and cancel_event.is_set():
+                raise RequestCancelled()
+            can_retry = (network_errors < self.max_network_retries
+                         or len(tried_indices) + 1 < len(self.api_keys))
+            timeout, adaptive = self._request_timeout(audio_seconds, request.get('deadline'), can_retry)
+
+            # Key còn nhiều quota nhất chưa thử; không gửi vào key đã biết hết quota
+            key_index = self._acquire_key(tried_indices, claims)
+            if key_index is None:
+                raise self._no_key_error(tried_indices)
+
             try:
-                # Đánh dấu key hiện tại đã được thử
-                tried_indices.add(self.current_key_index)
-                
-                current_key = self._get_current_key()
-                key_preview = current_key[:20] + "..."
+                # Đánh dấu key đã được thử
+                tried_indices.add(key_index)
                 
                 if len(tried_indices) == 1:
-                    print(f"[NET] Calling Groq STT with API key #{self.current_key_index + 1}/{len(self.api_keys)}...")
-                
-                headers = {"Authorization": f"Bearer {current_key}"}
+                    print(f"[NET] Calling Groq STT with API key #{key_index + 1}/{len(self.api_keys)}...")
                 
-                with open(wav_path, "rb") as f:
-                    files = {"file": ("audio.wav", f, "audio/wav")}
-                    resp = requests.post(url, headers=headers, data=data, files=files, timeout=self.timeout)
-                
-                # Kiểm tra lỗi quota (429 - Too Many Requests)
-                if resp.status_code == 429:
-                    print(f"[WARNING] API key #{self.current_key_index + 1} out of quota (429)")
-                    
-                    # Thử rotate sang key khác chưa thử
-                    if self._rotate_key(tried_indices):
-                        continue  # Thử lại với key mới
-                    else:
-                        raise Exception(
-                            f"Tất cả {len(self.api_keys)} API keys đều hết quota!\n"
-                            f"[TIP] Please đợi hoặc thêm thêm API keys to config.json"
-                        )
+                # Body multipart đọc dần từ các buffer có sẵn (tạo mới mỗi lần thử key)
+                body = MultipartBody(data, "file", filename, content_type, parts, cancel_event)
+                headers = {"Content-Type": body.content_type}
+
+                # Session keep-alive của key; đo riêng thời gian mở kết nối (nếu phải mở mới)
+                session = self._get_session(key_index)
+                before = self.connect_timer.snapshot()
+                started = time.perf_counter()
+                resp = session.post(url, headers=headers, data=body, timeout=timeout)
+                received = self._quota_ticket()
+                elapsed = time.perf_counter() - started
+                self._record_timing(before, elapsed)
+                self.scheduler.update_from_headers(key_index, resp.headers)
+                if cancel_event is not None and cancel_event.is_set():
+                    resp.close()
+                    raise RequestCancelled()
                 
-                # Kiểm tra lỗi 401 trước raise_for_status
-                if resp.status_code == 401:
-                    print(f"[WARNING] API key #{self.current_key_index + 1} invalid (401)")
-                    
-                    # Thử rotate sang key khác chưa thử
-                    if self._rotate_key(tried_indices):
-                        continue
-                    else:
-                        raise Exception(
-                            f"Tất cả {len(self.api_keys)} API keys đều invalid!\n"
-                            f"[TIP] Please kiểm tra lại keys tại: https://console.groq.com/keys"
-                        )
+                # 429 (hết quota) / 401 (key invalid) - thử key khác
+                if self._should_rotate(resp.status_code, tried_indices, key_index, resp.headers):
+                    continue
                 
                 # Kiểm tra lỗi khác
                 resp.raise_for_status()
+                self.scheduler.record_success(key_index)
+                self.latency.record(elapsed)
+                if audio_seconds is not None:
+                    self.latency_by_duration.record(audio_seconds, elapsed)
                 
-                # Cập nhật quota info từ headers
-                self._update_quota_from_headers(resp.headers)
-                
-                # Parse response
-                payload = resp.json()
-                text = payload.get("text")
-                if not text:
-                    raise ValueError("Phản hồi Groq không có trường 'text'")
-                
-                # Thành công - Log quota info
-                quota_info = self.get_quota_info()
-                if len(tried_indices) > 1:
-                    print(f"[OK] Recognition successful with API key #{self.current_key_index + 1} (đã thử {len(tried_indices)} keys)")
-                
-                if quota_info['remaining'] is not None:
-                    print(f"[STAT] Quota remaining: {quota_info['remaining']}/{quota_info['limit']} requests")
-                
-                return text
+                return self._handle_success(resp.headers, resp.json(), tried_indices, key_index, received)
                 
             except requests.exceptions.RequestException as e:
                 last_error = e
+
+                # Request thua trong hedging bị hủy giữa lúc upload
+                if cancel_event is not None and cancel_event.is_set():
+                    raise RequestCancelled()
+
+                if isinstance(e, requests.exceptions.Timeout):
+                    with self._hedge_lock:
+                        self.timeout_stats['adaptive_timeouts' if adaptive else 'fixed_timeouts'] += 1
+                    print(f"[TIMEOUT] API key #{key_index + 1}: no response within "
+                          f"{timeout[1]:.1f}s ({'adaptive' if adaptive else 'fixed'})")
                 
-                # Network/timeout errors - thử key khác
-                if len(tried_indices) < len(self.api_keys):
-                    print(f"[WARNING] Connection error với API key #{self.current_key_index + 1}: {str(e)[:50]}")
-                    if self._rotate_key(tried_indices):
-                        continue
+                # 4xx khác (audio hỏng, request sai...) - gửi lại cũng vô ích
+                status = e.response.status_code if e.response is not None else None
+                if status is not None and status < 500:
+                    raise Exception(f"Groq API error: {e}")
                 
-                # Tried all keys hoặc lỗi nghiêm trọng
-                raise Exception(f"Connection error Groq API: {e}")
+                # Network/timeout/5xx - gửi lại, không đổ lỗi cho key
+                network_errors += 1
+                delay = self._transport_retry_delay(key_index, e, tried_indices, network_errors)
+                if delay is not None:
+                    time.sleep(delay)
+                    continue
                 
-            except Exception as e:
-                # Lỗi khác (parse JSON, file không tồn tại...) - không retry
-                raise
+                # Hết lượt gửi lại
+                raise Exception(f"Connection error Groq API: {e}")
+
+            finally:
+                self.scheduler.release(key_index)
+                if claims is not None:
+                    with claims.lock:
+                        claims.keys.discard(key_index)
+                self._schedule_persist()
         
         # Nếu đã thử hết mà vẫn lỗi
         if last_error:
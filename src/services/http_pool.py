@@ -0,0 +1,96 @@
+"""
+HTTP Pool - Session keep-alive có đo riêng thời gian kết nối (DNS + TCP + TLS)
+"""
+import threading
+import time
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+except Exception:
+    requests = None
+    HTTPAdapter = object
+
+
+class ConnectTimer:
+    """Thống kê các lần mở kết nối mới (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.last_seconds = None
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            self.last_seconds = seconds
+
+    def snapshot(self):
+        """(số kết nối đã mở, tổng thời gian kết nối)"""
+        with self._lock:
+            return self.count, self.total_seconds
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'connections': self.count,
+                'connect_ms_total': round(self.total_seconds * 1000, 1),
+                'connect_ms_last': round(self.last_seconds * 1000, 1) if self.last_seconds is not None else None
+            }
+
+
+def _timed_pool_classes(timer: ConnectTimer) -> dict:
+    """Pool class cho http/https có connection đo thời gian connect() vào timer"""
+
+    class TimedHTTPConnection(HTTPConnection):
+        def connect(self):
+            started = time.perf_counter()
+            super().connect()
+            timer.record(time.perf_counter() - started)
+
+    class TimedHTTPSConnection(HTTPSConnection):
+        def connect(self):
+            started = time.perf_counter()
+            super().connect()
+            timer.record(time.perf_counter() - started)
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    return {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter giữ kết nối keep-alive trong pool và ghi lại thời gian mở kết nối mới"""
+
+    def __init__(self, timer: ConnectTimer, **kwargs):
+        self.timer = timer
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _timed_pool_classes(self.timer)
+
+
+def create_session(timer: ConnectTimer, pool_size: int = 4) -> 'requests.Session':
+    """
+    Tạo Session keep-alive dùng TimedHTTPAdapter cho cả http và https
+
+    Args:
+        timer: Nơi ghi thời gian kết nối
+        pool_size: Số kết nối tối đa giữ lại mỗi host
+    """
+    if requests is None:
+        raise ImportError("Thiếu thư viện 'requests'. Please cài: pip install requests")
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(timer, pool_connections=1, pool_maxsize=max(int(pool_size), 1))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
@@ -0,0 +1,392 @@
+"""
+Key Scheduler - Chọn API key theo quota còn lại (x-ratelimit-*), token bucket
+và circuit breaker từng key (closed / open / half-open)
+"""
+import re
+import threading
+import time
+
+# Quota mặc định khi chưa nhận được header nào (coi như còn nhiều)
+UNKNOWN_REMAINING = 1 << 30
+
+# Backoff mũ sau mỗi 429 liên tiếp của 1 key: 1, 2, 4... tối đa 5 phút
+# (không bao giờ ngắn hơn retry-after / x-ratelimit-reset-* của server)
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 300.0
+
+# Key half-open đang có request thăm dò: request khác chờ kết quả
+PROBE_WAIT_SECONDS = 1.0
+
+# Key bị 401 được cách ly tới hết phiên; có file state thì sau khi khởi động
+# lại vẫn cách ly tới khi đủ chừng này kể từ lúc bị 401 (xóa file state để
+# thử lại sớm hơn; key mới / đã đổi có hash khác nên không bị ảnh hưởng)
+QUARANTINE_TTL_SECONDS = 24 * 3600.0
+
+# Trạng thái circuit breaker
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+QUARANTINED = 'quarantined'
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+
+def parse_reset(value) -> float:
+    """
+    Đổi giá trị reset của Groq ("2m59.56s", "7.66s", "120ms", "30") sang giây
+
+    Returns:
+        Số giây (None nếu không parse được)
+    """
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    scale = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def _header_int(headers, name: str):
+    value = headers.get(name)
+    try:
+        return int(float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class KeyState:
+    """Trạng thái quota của 1 API key"""
+
+    def __init__(self, index: int, rpm: float = None):
+        self.index = index
+        self.remaining_requests = None
+        self.limit_requests = None
+        self.requests_reset_at = 0.0
+        self.remaining_tokens = None
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0     # Breaker open: không gửi trước thời điểm này
+        self.failures = 0            # Số 429 liên tiếp (0 = breaker closed)
+        self.invalid = False         # 401: cách ly key tới hết phiên
+        self.invalid_at = 0.0        # Epoch lúc bị cách ly (để hết hạn khi nạp lại)
+        self.updated = 0.0           # Epoch lần cuối trạng thái thay đổi (gộp file state)
+        self.in_flight = 0
+        self.reported_remaining = None  # Quota còn lại theo header mới nhất đáng tin
+        self.overlapped = False         # Có >= 2 request cùng bay kể từ lúc key rảnh
+        self.last_used = 0.0
+        self.sent = 0
+        self.rate_limited = 0
+
+        # Token bucket cục bộ (giới hạn RPM phía client, tùy chọn)
+        self.rpm = float(rpm) if rpm else None
+        self.bucket = self.rpm if self.rpm else 0.0
+        self.bucket_time = None      # Mốc đồng hồ của lần refill đầu tiên
+
+    def refill(self, now: float):
+        if self.bucket_time is None:
+            self.bucket_time = now
+        if self.rpm:
+            self.bucket = min(self.rpm, self.bucket + (now - self.bucket_time) * self.rpm / 60.0)
+            self.bucket_time = now
+
+    def state(self, now: float) -> str:
+        """Trạng thái breaker: closed / open / half_open / quarantined"""
+        if self.invalid:
+            return QUARANTINED
+        if self.blocked_until > now:
+            return OPEN
+        if self.failures:
+            return HALF_OPEN
+        return CLOSED
+
+    def available_at(self, now: float) -> float:
+        """Thời điểm sớm nhất key có thể nhận request (now nếu dùng được ngay)"""
+        ready = max(now, self.blocked_until)
+        if self.failures and self.in_flight and self.blocked_until <= now:
+            # Half-open: chỉ cho 1 request thăm dò
+            ready = max(ready, now + PROBE_WAIT_SECONDS)
+        if self.remaining_requests is not None and self.remaining_requests <= 0:
+            ready = max(ready, self.requests_reset_at)
+        if self.remaining_tokens is not None and self.remaining_tokens <= 0:
+            ready = max(ready, self.tokens_reset_at)
+        if self.rpm and self.bucket < 1.0:
+            ready = max(ready, now + (1.0 - self.bucket) * 60.0 / self.rpm)
+        return ready
+
+    def headroom(self) -> float:
+        """Số request còn gửi được ước lượng (trừ request đang bay)"""
+        remaining = self.remaining_requests if self.remaining_requests is not None else UNKNOWN_REMAINING
+        if self.rpm:
+            remaining = min(remaining, self.bucket)
+        return remaining - self.in_flight
+
+    def export(self, now: float, wall: float) -> dict:
+        """Trạng thái để lưu file (mốc thời gian đổi sang epoch)"""
+        def to_wall(deadline):
+            return round(wall + deadline - now, 3) if deadline > now else 0.0
+        return {
+            'remaining_requests': self.remaining_requests,
+            'limit_requests': self.limit_requests,
+            'requests_reset_at': to_wall(self.requests_reset_at),
+            'remaining_tokens': self.remaining_tokens,
+            'tokens_reset_at': to_wall(self.tokens_reset_at),
+            'blocked_until': to_wall(self.blocked_until),
+            'failures': self.failures,
+            'invalid': self.invalid,
+            'invalid_at': self.invalid_at,
+            'updated': self.updated
+        }
+
+    def restore(self, entry: dict, now: float, wall: float):
+        """Nạp trạng thái đã lưu; bỏ qua quota / khóa đã quá hạn reset"""
+        def to_monotonic(deadline):
+            return now + deadline - wall if deadline and deadline > wall else 0.0
+        self.updated = float(entry.get('updated') or 0.0)
+        self.limit_requests = entry.get('limit_requests')
+        self.requests_reset_at = to_monotonic(entry.get('requests_reset_at'))
+        if self.requests_reset_at:
+            self.remaining_requests = entry.get('remaining_requests')
+        self.tokens_reset_at = to_monotonic(entry.get('tokens_reset_at'))
+        if self.tokens_reset_at:
+            self.remaining_tokens = entry.get('remaining_tokens')
+        self.blocked_until = to_monotonic(entry.get('blocked_until'))
+        self.failures = int(entry.get('failures') or 0)
+        invalid_at = float(entry.get('invalid_at') or 0.0)
+        if entry.get('invalid') and wall - invalid_at < QUARANTINE_TTL_SECONDS:
+            self.invalid = True
+            self.invalid_at = invalid_at
+
+    def to_dict(self, now: float) -> dict:
+        return {
+            'key_index': self.index + 1,
+            'state': self.state(now),
+            'remaining_requests': self.remaining_requests,
+            'limit_requests': self.limit_requests,
+            'remaining_tokens': self.remaining_tokens,
+            'blocked_for_s': round(max(self.blocked_until - now, 0.0), 1),
+            'failures': self.failures,
+            'invalid': self.invalid,
+            'in_flight': self.in_flight,
+            'sent': self.sent,
+            'rate_limited': self.rate_limited
+        }
+
+
+class KeyScheduler:
+    """
+    Phân phối request lên nhiều API key (thread-safe):
+      - Cập nhật remaining/reset của từng key từ header x-ratelimit-* mỗi phản hồi
+      - Chọn key còn nhiều quota nhất (trừ request đang bay), hòa thì chọn key
+        lâu chưa dùng nhất -> trải đều tải
+      - Không gửi vào key đã biết hết quota / vừa bị 429 cho tới lúc reset,
+        thay vì chờ 429 rồi mới xoay vòng
+      - Token bucket RPM cục bộ (tùy chọn) để không vượt giới hạn mỗi phút
+      - Circuit breaker mỗi key: 429 mở breaker với backoff mũ (tôn trọng
+        retry-after / reset), hết hạn thì half-open cho 1 request thăm dò,
+        thành công thì đóng lại; 401 cách ly key tới hết phiên (và tới
+        QUARANTINE_TTL_SECONDS nếu trạng thái được nạp lại từ file)
+    """
+
+    def __init__(self, key_count: int, rpm: float = None):
+        """
+        Args:
+            key_count: Số API key
+            rpm: Giới hạn request/phút mỗi key phía client (None = không giới hạn)
+        """
+        self._lock = threading.Lock()
+        self.keys = [KeyState(i, rpm) for i in range(key_count)]
+
+    def acquire(self, exclude: set = None, now: float = None):
+        """
+        Chọn key tốt nhất hiện dùng được và giữ chỗ (gọi release() khi xong)
+
+        Args:
+            exclude: Các key không được chọn (đã thử trong lần nhận dạng này)
+
+        Returns:
+            Index của key, hoặc None nếu không key nào dùng được ngay
+        """
+        now = time.monotonic() if now is None else now
+        exclude = exclude or set()
+        with self._lock:
+            best = None
+            for state in self.keys:
+                if state.invalid or state.index in exclude:
+                    continue
+                state.refill(now)
+                if state.available_at(now) > now:
+                    continue
+                if best is None or (state.headroom(), -state.last_used) > (best.headroom(), -best.last_used):
+                    best = state
+            if best is None:
+                return None
+            best.in_flight += 1
+            best.overlapped = best.overlapped or best.in_flight > 1
+            best.sent += 1
+            best.last_used = now
+            if best.rpm:
+                best.bucket -= 1.0
+            if best.remaining_requests is not None:
+                best.remaining_requests -= 1  # Ước lượng tới khi có header mới
+            return best.index
+
+    def peek(self, exclude: set = None, now: float = None):
+        """Key sẽ được chọn (không giữ chỗ), None nếu không có"""
+        now = time.monotonic() if now is None else now
+        exclude = exclude or set()
+        with self._lock:
+            candidates = []
+            for state in self.keys:
+                if state.invalid or state.index in exclude:
+                    continue
+                state.refill(now)
+                if state.available_at(now) <= now:
+                    candidates.append(state)
+            if not candidates:
+                return None
+            return max(candidates, key=lambda s: (s.headroom(), -s.last_used)).index
+
+    def next_available_in(self, exclude: set = None, now: float = None):
+        """Số giây tới khi có key dùng được (None nếu mọi key đều invalid/bị loại)"""
+        now = time.monotonic() if now is None else now
+        exclude = exclude or set()
+        with self._lock:
+            times = []
+            for state in self.keys:
+                if state.invalid or state.index in exclude:
+                    continue
+                state.refill(now)
+                times.append(state.available_at(now))
+            return max(min(times) - now, 0.0) if times else None
+
+    def release(self, index: int):
+        """Kết thúc request trên key"""
+        with self._lock:
+            state = self.keys[index]
+            state.in_flight = max(state.in_flight - 1, 0)
+            if not state.in_flight:
+                state.overlapped = False
+
+    def update_from_headers(self, index: int, headers, now: float = None):
+        """Cập nhật quota từ header x-ratelimit-* của phản hồi"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            state = self.keys[index]
+            state.updated = time.time()
+            remaining = _header_int(headers, 'x-ratelimit-remaining-requests')
+            if remaining is not None:
+                # Nhiều caller cùng lúc: phản hồi có thể đến không theo thứ tự server
+                # xử lý. Chỉ tin header tăng quota khi request này không chồng lấn
+                # request nào khác trên key (không thể là phản hồi cũ); ước lượng
+                # trừ thêm các request đang bay mà header có thể chưa tính
+                others = max(state.in_flight - 1, 0)
+                if (state.reported_remaining is None or not state.overlapped
+                        or remaining < state.reported_remaining):
+                    state.reported_remaining = remaining
+                state.remaining_requests = state.reported_remaining - others
+            limit = _header_int(headers, 'x-ratelimit-limit-requests')
+            if limit is not None:
+                state.limit_requests = limit
+            reset = parse_reset(headers.get('x-ratelimit-reset-requests'))
+            if reset is not None:
+                state.requests_reset_at = now + reset
+
+            tokens = _header_int(headers, 'x-ratelimit-remaining-tokens')
+            if tokens is not None:
+                state.remaining_tokens = tokens
+            reset = parse_reset(headers.get('x-ratelimit-reset-tokens'))
+            if reset is not None:
+                state.tokens_reset_at = now + reset
+
+    def record_success(self, index: int):
+        """Phản hồi thành công: đóng breaker của key"""
+        with self._lock:
+            state = self.keys[index]
+            if state.failures or state.blocked_until:
+                state.updated = time.time()
+            state.failures = 0
+            state.blocked_until = 0.0
+
+    def mark_rate_limited(self, index: int, headers=None, now: float = None) -> float:
+        """
+        429: mở breaker của key với backoff mũ theo số lần 429 liên tiếp,
+        không ngắn hơn retry-after / x-ratelimit-reset-* của server
+
+        Returns:
+            Số giây key bị khóa
+        """
+        now = time.monotonic() if now is None else now
+        hint = None
+        if headers is not None:
+            for name in ('retry-after', 'x-ratelimit-reset-requests', 'x-ratelimit-reset-tokens'):
+                hint = parse_reset(headers.get(name))
+                if hint is not None:
+                    break
+        with self._lock:
+            state = self.keys[index]
+            state.rate_limited += 1
+            state.failures += 1
+            state.updated = time.time()
+            wait = min(BACKOFF_BASE_SECONDS * 2 ** (state.failures - 1), BACKOFF_MAX_SECONDS)
+            if hint is not None:
+                wait = max(wait, hint)
+            state.blocked_until = now + wait
+            return wait
+
+    def mark_invalid(self, index: int):
+        """
+        401: cách ly key tới hết phiên (không tốn thêm request nào); export_state
+        giữ mốc invalid_at để lần chạy sau còn cách ly tới QUARANTINE_TTL_SECONDS
+        """
+        with self._lock:
+            state = self.keys[index]
+            state.invalid = True
+            state.invalid_at = state.updated = time.time()
+
+    def key_state(self, index: int, now: float = None) -> str:
+        """Trạng thái breaker hiện tại của key"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return self.keys[index].state(now)
+
+    def export_state(self, key_ids: list) -> dict:
+        """
+        Trạng thái mọi key để lưu file
+
+        Args:
+            key_ids: Định danh từng key (cùng thứ tự với danh sách key)
+
+        Returns:
+            {key_id: trạng thái}
+        """
+        now, wall = time.monotonic(), time.time()
+        with self._lock:
+            return {kid: state.export(now, wall) for kid, state in zip(key_ids, self.keys)}
+
+    def restore_state(self, key_ids: list, entries: dict) -> int:
+        """
+        Nạp trạng thái đã lưu (key đổi thứ tự vẫn khớp nhờ key_id)
+
+        Returns:
+            Số key được nạp lại
+        """
+        now, wall = time.monotonic(), time.time()
+        restored = 0
+        with self._lock:
+            for kid, state in zip(key_ids, self.keys):
+                entry = entries.get(kid)
+                if isinstance(entry, dict) and entry.get('updated', 0) > state.updated:
+                    state.restore(entry, now, wall)
+                    restored += 1
+        return restored
+
+    def snapshot(self) -> list:
+        """Trạng thái từng key (để hiển thị / log)"""
+        now = time.monotonic()
+        with self._lock:
+            return [state.to_dict(now) for state in self.keys]
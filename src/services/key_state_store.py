@@ -0,0 +1,142 @@
+"""
+Key State Store - Lưu quota / breaker của từng API key ra file để dùng lại sau khi khởi động lại
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+try:
+    import msvcrt
+except Exception:
+    msvcrt = None
+
+try:
+    import fcntl
+except Exception:
+    fcntl = None
+
+
+STATE_VERSION = 1
+
+# Chờ tối đa khi instance khác đang giữ lock file
+LOCK_TIMEOUT_SECONDS = 2.0
+
+
+def key_id(api_key: str) -> str:
+    """Định danh key trong file state (hash, không lưu key thật)"""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+
+@contextlib.contextmanager
+def _file_lock(lock_path: str, timeout: float = LOCK_TIMEOUT_SECONDS):
+    """
+    Lock độc quyền giữa các process (msvcrt trên Windows, fcntl trên POSIX)
+    trên file .lock cạnh file state
+
+    Raises:
+        TimeoutError: Nếu không lấy được lock trong timeout
+    """
+    handle = open(lock_path, 'a+b')
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if msvcrt is not None:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+                elif fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Không lấy được lock {lock_path}")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if msvcrt is not None:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+            elif fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+    finally:
+        handle.close()
+
+
+class KeyStateStore:
+    """
+    File JSON nhỏ chứa trạng thái từng key {key_id: {...}}.
+
+    - Ghi atomic: ghi file tạm cùng thư mục rồi os.replace (không bao giờ để
+      lại file ghi dở)
+    - An toàn khi chạy 2 instance: đọc - gộp - ghi trong cùng 1 lock file;
+      khi gộp, mỗi key giữ bản ghi có 'updated' mới hơn
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Đường dẫn file state (vd. "key_state.json")
+        """
+        self.path = os.path.abspath(path)
+        self.lock_path = self.path + '.lock'
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"[WARNING] Key state file không đọc được, bỏ qua: {e}")
+            return {}
+        if not isinstance(data, dict) or data.get('version') != STATE_VERSION:
+            return {}
+        keys = data.get('keys')
+        return keys if isinstance(keys, dict) else {}
+
+    def _write(self, keys: dict):
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix='.key_state_', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': STATE_VERSION, 'keys': keys}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+    def load(self) -> dict:
+        """
+        Đọc trạng thái đã lưu
+
+        Returns:
+            {key_id: trạng thái} (rỗng nếu chưa có file / file hỏng)
+        """
+        with _file_lock(self.lock_path):
+            return self._read()
+
+    def save(self, keys: dict) -> dict:
+        """
+        Gộp trạng thái mới với file hiện tại (bản ghi mới hơn thắng) rồi ghi atomic
+
+        Args:
+            keys: {key_id: trạng thái có trường 'updated' (epoch giây)}
+
+        Returns:
+            Trạng thái sau khi gộp
+        """
+        with _file_lock(self.lock_path):
+            merged = self._read()
+            for kid, entry in keys.items():
+                current = merged.get(kid)
+                if current is None or entry.get('updated', 0) >= current.get('updated', 0):
+                    merged[kid] = entry
+            self._write(merged)
+            return merged
@@ -0,0 +1,103 @@
+"""
+Latency Tracker - Thống kê độ trễ các request gần nhất (p50 / p95 / p99)
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class LatencyTracker:
+    """Cửa sổ trượt các độ trễ gần nhất (thread-safe)"""
+
+    def __init__(self, window: int = 200):
+        """
+        Args:
+            window: Số mẫu gần nhất được giữ lại
+        """
+        self._lock = threading.Lock()
+        self._samples = deque(maxlen=max(int(window), 1))
+
+    def record(self, seconds: float):
+        """Ghi 1 độ trễ (giây)"""
+        with self._lock:
+            self._samples.append(float(seconds))
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, p: float, min_samples: int = 1):
+        """
+        Percentile p (0-100) của các mẫu hiện có
+
+        Returns:
+            Số giây, None nếu chưa đủ min_samples mẫu
+        """
+        with self._lock:
+            if len(self._samples) < max(min_samples, 1):
+                return None
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        return float(np.percentile(samples, p))
+
+    def to_dict(self) -> dict:
+        """Số mẫu và p50 / p95 / p99 (ms)"""
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        if samples.size == 0:
+            return {'samples': 0, 'p50_ms': None, 'p95_ms': None, 'p99_ms': None}
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+        return {
+            'samples': int(samples.size),
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1)
+        }
+
+
+# Cận trên (giây audio) của các nhóm độ dài; nhóm cuối là >= cận lớn nhất
+DURATION_BUCKETS = (2.0, 5.0, 10.0, 20.0, 40.0)
+
+
+class LatencyHistogram:
+    """
+    Độ trễ theo nhóm độ dài audio: clip 2 giây và 30 giây có độ trễ khác hẳn
+    nhau nên mỗi nhóm giữ cửa sổ trượt riêng
+    """
+
+    def __init__(self, bounds: tuple = DURATION_BUCKETS, window: int = 100):
+        """
+        Args:
+            bounds: Cận trên từng nhóm (giây audio, tăng dần)
+            window: Số mẫu giữ lại mỗi nhóm
+        """
+        self.bounds = tuple(bounds)
+        self.buckets = [LatencyTracker(window) for _ in range(len(self.bounds) + 1)]
+
+    def bucket_index(self, audio_seconds: float) -> int:
+        for index, bound in enumerate(self.bounds):
+            if audio_seconds < bound:
+                return index
+        return len(self.bounds)
+
+    def label(self, index: int) -> str:
+        """Tên nhóm, vd. <2s, 2-5s, >=40s"""
+        if index == 0:
+            return f"<{self.bounds[0]:g}s"
+        if index == len(self.bounds):
+            return f">={self.bounds[-1]:g}s"
+        return f"{self.bounds[index - 1]:g}-{self.bounds[index]:g}s"
+
+    def record(self, audio_seconds: float, seconds: float):
+        """Ghi độ trễ của request có audio dài audio_seconds"""
+        self.buckets[self.bucket_index(audio_seconds)].record(seconds)
+
+    def percentile(self, audio_seconds: float, p: float, min_samples: int = 1):
+        """Percentile p của nhóm chứa audio_seconds (None nếu nhóm chưa đủ mẫu)"""
+        return self.buckets[self.bucket_index(audio_seconds)].percentile(p, min_samples)
+
+    def to_dict(self) -> dict:
+        """{nhóm: p50/p95/p99} cho các nhóm đã có mẫu"""
+        return {self.label(index): tracker.to_dict()
+                for index, tracker in enumerate(self.buckets) if tracker.count}
@@ -0,0 +1,96 @@
+"""
+Multipart Body - Body multipart/form-data đọc dần từ các buffer có sẵn (không ghép PCM)
+"""
+import uuid
+
+
+def as_buffer_parts(source) -> list:
+    """
+    Chuẩn hóa nguồn audio thành danh sách buffer (memoryview byte, không copy)
+
+    Args:
+        source: bytes / bytearray / memoryview / mảng NumPy, file-like (BytesIO, file),
+                hoặc iterable các chunk bytes-like
+
+    Returns:
+        Danh sách memoryview 1 chiều kiểu byte
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)) or hasattr(source, '__array_interface__'):
+        return [memoryview(source).cast('B')]
+    if hasattr(source, 'getbuffer'):
+        return [source.getbuffer().cast('B')]
+    if hasattr(source, 'read'):
+        return [memoryview(source.read()).cast('B')]
+    # Iterable các chunk: giữ tham chiếu để có thể gửi lại khi đổi API key
+    return [memoryview(chunk).cast('B') for chunk in source]
+
+
+class MultipartBody:
+    """
+    Body multipart/form-data gồm các trường text và 1 file, file lấy từ danh
+    sách buffer có sẵn (vd. WAV header + view của capture buffer).
+
+    Là file-like có __len__ nên requests gửi với Content-Length và đọc dần
+    từng block - không ghép cả file vào một bytes lớn.
+    """
+
+    def __init__(self, fields: dict, file_field: str, filename: str, content_type: str, parts: list,
+                 cancel_event=None):
+        """
+        Args:
+            fields: Các trường text {tên: giá trị}
+            file_field: Tên trường file (vd. "file")
+            filename: Tên file gửi lên
+            content_type: MIME type của file
+            parts: Danh sách buffer của nội dung file (xem as_buffer_parts)
+            cancel_event: threading.Event - khi được set, read() báo lỗi để hủy upload đang gửi
+        """
+        self.cancel_event = cancel_event
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+
+        head = []
+        for name, value in fields.items():
+            head.append(f"--{self.boundary}\r\n"
+                        f"Content-Disposition: form-data; name=\"{name}\"\r\n\r\n"
+                        f"{value}\r\n")
+        head.append(f"--{self.boundary}\r\n"
+                    f"Content-Disposition: form-data; name=\"{file_field}\"; filename=\"{filename}\"\r\n"
+                    f"Content-Type: {content_type}\r\n\r\n")
+        tail = f"\r\n--{self.boundary}--\r\n"
+
+        self._parts = [memoryview(''.join(head).encode('utf-8'))]
+        self._parts.extend(memoryview(part).cast('B') for part in parts)
+        self._parts.append(memoryview(tail.encode('utf-8')))
+        self._length = sum(part.nbytes for part in self._parts)
+        self.rewind()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self):
+        """Duyệt các buffer (cho client nhận iterable, vd. aiohttp)"""
+        return iter(self._parts)
+
+    def rewind(self):
+        """Đọc lại từ đầu (gửi lại với API key khác)"""
+        self._index = 0
+        self._offset = 0
+
+    def read(self, size: int = -1) -> bytes:
+        """Đọc tối đa size byte (chỉ copy block được đọc)"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise IOError("Upload cancelled")
+        if size is None or size < 0:
+            size = self._length
+        out = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            piece = part[self._offset:self._offset + size]
+            out.append(piece)
+            size -= piece.nbytes
+            self._offset += piece.nbytes
+            if self._offset >= part.nbytes:
+                self._index += 1
+                self._offset = 0
+        return b''.join(out)
@@ -0,0 +1,203 @@
+"""
+STT Router - Định tuyến giữa nhiều endpoint /audio/transcriptions (OpenAI-compatible)
+theo điểm EWMA độ trễ + tỉ lệ lỗi, tự chuyển endpoint khi lỗi
+"""
+import threading
+import time
+
+from .groq_stt_service import GroqSTTService, DeadlineExceeded
+from .multipart import as_buffer_parts
+
+
+class EndpointStats:
+    """Điểm EWMA của 1 endpoint"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.ewma_latency = None      # Giây, None = chưa có request thành công
+        self.ewma_error = 0.0         # 0..1
+        self.last_error = 0.0         # time.monotonic() lần lỗi gần nhất
+        self.last_used = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def error_rate(self, now: float, half_life: float) -> float:
+        """EWMA lỗi, giảm dần theo thời gian kể từ lần lỗi cuối (để endpoint hồi phục)"""
+        if not self.ewma_error:
+            return 0.0
+        return self.ewma_error * 0.5 ** ((now - self.last_error) / half_life)
+
+    def score(self, now: float, error_penalty: float, half_life: float, prior: float = 0.0) -> float:
+        """
+        Càng thấp càng tốt; endpoint chưa từng được dùng = 0 (được thử trước)
+
+        Args:
+            prior: Độ trễ giả định cho endpoint chỉ toàn lỗi (chưa có request
+                   thành công), để nó xếp sau endpoint khỏe thay vì = 0
+        """
+        if not self.requests:
+            return 0.0
+        latency = self.ewma_latency if self.ewma_latency is not None else prior
+        return latency * (1.0 + error_penalty * self.error_rate(now, half_life))
+
+
+class STTRouter:
+    """
+    Nhiều endpoint STT, mỗi endpoint là 1 GroqSTTService (api_base, keys, model
+    riêng). Mỗi lần nhận dạng chọn endpoint có điểm tốt nhất:
+
+        score = EWMA độ trễ x (1 + error_penalty x EWMA lỗi)
+
+    Lỗi (hết key, mạng, 5xx...) thì chuyển ngay sang endpoint kế tiếp theo điểm.
+    Endpoint lâu không được dùng (explore_after) được thử lại 1 lần để cập nhật
+    số liệu. Cùng interface với GroqSTTService nên app dùng thay thế trực tiếp.
+    """
+
+    def __init__(self, endpoints: list, alpha: float = 0.3, error_penalty: float = 4.0,
+                 error_half_life: float = 60.0, explore_after: float = 300.0):
+        """
+        Args:
+            endpoints: Danh sách (tên, GroqSTTService)
+            alpha: Trọng số mẫu mới trong EWMA
+            error_penalty: Mức phạt tỉ lệ lỗi trong điểm
+            error_half_life: Sau chừng này giây không lỗi, EWMA lỗi giảm một nửa
+            explore_after: Thử lại endpoint không được dùng trong chừng này giây (None = tắt)
+        """
+        if not endpoints:
+            raise ValueError("STTRouter cần ít nhất 1 endpoint")
+        self.names = [name for name, _ in endpoints]
+        self.services = [service for _, service in endpoints]
+        self.stats = [EndpointStats(name) for name in self.names]
+        self.alpha = alpha
+        self.error_penalty = error_penalty
+        self.error_half_life = error_half_life
+        self.explore_after = explore_after
+        self.current_index = 0
+        self._lock = threading.Lock()
+
+    def _latency_prior(self, index: int) -> float:
+        """Độ trễ giả định của endpoint chưa có request thành công: EWMA chậm nhất đã biết, hoặc timeout"""
+        known = [stats.ewma_latency for stats in self.stats if stats.ewma_latency is not None]
+        return max(known) if known else float(self.services[index].timeout)
+
+    def _ranked(self) -> list:
+        """Thứ tự endpoint để thử (tốt nhất trước)"""
+        now = time.monotonic()
+        with self._lock:
+            scores = [stats.score(now, self.error_penalty, self.error_half_life, self._latency_prior(i))
+                      for i, stats in enumerate(self.stats)]
+            order = sorted(range(len(self.services)), key=lambda i: scores[i])
+            if self.explore_after and len(order) > 1:
+                stale = [i for i in order[1:]
+                         if self.stats[i].requests and now - self.stats[i].last_used > self.explore_after]
+                if stale:
+                    order.remove(stale[0])
+                    order.insert(0, stale[0])
+        return order
+
+    def _record(self, index: int, latency: float = None):
+        """Cập nhật EWMA sau 1 lần gửi (latency None = lỗi)"""
+        now = time.monotonic()
+        with self._lock:
+            stats = self.stats[index]
+            stats.requests += 1
+            stats.last_used = now
+            error = 1.0 if latency is None else 0.0
+            stats.ewma_error = stats.error_rate(now, self.error_half_life) * (1 - self.alpha) + error * self.alpha
+            if latency is None:
+                stats.errors += 1
+                stats.last_error = now
+            elif stats.ewma_latency is None:
+                stats.ewma_latency = latency
+            else:
+                stats.ewma_latency = stats.ewma_latency * (1 - self.alpha) + latency * self.alpha
+
+    def transcribe_audio(self, audio, language: str = "vi", filename: str = "audio.wav",
+                         content_type: str = "audio/wav", audio_seconds: float = None,
+                         deadline: float = None) -> str:
+        """
+        Nhận dạng trên endpoint tốt nhất, lỗi thì chuyển endpoint
+
+        Args: như GroqSTTService.transcribe_audio
+
+        Returns:
+            Văn bản nhận dạng được
+        """
+        parts = as_buffer_parts(audio)  # Dùng lại được khi chuyển endpoint
+        last_error = None
+        order = self._ranked()
+        for attempt, index in enumerate(order):
+            if attempt:
+                print(f"[ROUTE] Failover to endpoint '{self.names[index]}'")
+            # Mỗi endpoint chỉ được 1 phần thời gian còn lại, để endpoint treo
+            # không ăn hết deadline của các endpoint sau
+            endpoint_deadline = deadline
+            if deadline is not None:
+                now = time.monotonic()
+                if now >= deadline:
+                    raise DeadlineExceeded("Hết thời gian nhận dạng (deadline)")
+                endpoint_deadline = min(deadline, now + (deadline - now) / (len(order) - attempt))
+            started = time.perf_counter()
+            try:
+                text = self.services[index].transcribe_audio(
+                    parts, language=language, filename=filename, content_type=content_type,
+                    audio_seconds=audio_seconds, deadline=endpoint_deadline
+                )
+            except DeadlineExceeded as e:
+                self._record(index)
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+                last_error = e
+                print(f"[WARNING] Endpoint '{self.names[index]}' used up its share of the deadline")
+                continue
+            except Exception as e:
+                self._record(index)
+                last_error = e
+                print(f"[WARNING] Endpoint '{self.names[index]}' failed: {str(e)[:80]}")
+                continue
+            self._record(index, time.perf_counter() - started)
+            self.current_index = index
+            return text
+        raise last_error
+
+    def transcribe(self, wav_path: str, language: str = "vi", filename: str = "audio.wav",
+                   content_type: str = "audio/wav") -> str:
+        """Nhận dạng file audio trên đĩa"""
+        with open(wav_path, "rb") as f:
+            return self.transcribe_audio(f, language=language, filename=filename, content_type=content_type)
+
+    def prewarm(self, min_interval: float = 15.0) -> bool:
+        """Mở sẵn kết nối tới endpoint sẽ được chọn"""
+        return self.services[self._ranked()[0]].prewarm(min_interval)
+
+    def get_quota_info(self) -> dict:
+        """Quota của endpoint dùng gần nhất"""
+        info = self.services[self.current_index].get_quota_info()
+        info['endpoint'] = self.names[self.current_index]
+        return info
+
+    def get_endpoint_stats(self) -> list:
+        """Độ trễ EWMA / tỉ lệ lỗi / điểm của từng endpoint"""
+        now = time.monotonic()
+        with self._lock:
+            return [{
+                'endpoint': stats.name,
+                'ewma_latency_ms': round(stats.ewma_latency * 1000, 1) if stats.ewma_latency is not None else None,
+                'error_rate': round(stats.error_rate(now, self.error_half_life), 3),
+                'score': round(stats.score(now, self.error_penalty, self.error_half_life,
+                                           self._latency_prior(index)), 4),
+                'requests': stats.requests,
+                'errors': stats.errors
+            } for index, stats in enumerate(self.stats)]
+
+    def get_network_stats(self) -> dict:
+        """Thống kê định tuyến + thống kê mạng của từng endpoint"""
+        routing = self.get_endpoint_stats()
+        for entry, service in zip(routing, self.services):
+            entry['network'] = service.get_network_stats()
+        return {'endpoints': routing}
+
+    def close(self):
+        """Đóng mọi endpoint"""
+        for service in self.services:
+            service.close()
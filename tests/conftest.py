@@ -0,0 +1,26 @@
+"""
+Fixtures dùng chung cho test
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from stubs import StubServer  # noqa: E402
+
+
+@pytest.fixture
+def stub_server():
+    """stub_server(respond) -> StubServer đang chạy (tự đóng khi test xong)"""
+    servers = []
+
+    def start(respond):
+        server = StubServer(respond)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
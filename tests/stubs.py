@@ -0,0 +1,75 @@
+"""
+Server HTTP cục bộ đóng vai endpoint /audio/transcriptions (OpenAI-compatible) cho test
+"""
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class StubServer:
+    """
+    Server OpenAI-compatible giả lập chạy trên 127.0.0.1 (cổng ngẫu nhiên).
+
+    respond(key) -> (status, headers, payload) quyết định phản hồi cho từng
+    request theo API key (có thể sleep để giả lập endpoint chậm / treo).
+    Mọi request POST được ghi lại vào calls (key, thời điểm nhận).
+    """
+
+    def __init__(self, respond):
+        self.respond = respond
+        self.calls = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                key = self.headers.get('Authorization', '').replace('Bearer ', '')
+                with server.lock:
+                    server.calls.append(key)
+                try:
+                    status, headers, payload = server.respond(key)
+                except Exception:
+                    status, headers, payload = 500, {}, {'error': 'stub failure'}
+                body = json.dumps(payload).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    for name, value in headers.items():
+                        self.send_header(name, str(value))
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # Client đã bỏ (timeout / hủy)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.block_on_close = False
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def count(self, key: str = None) -> int:
+        with self.lock:
+            return len(self.calls) if key is None else self.calls.count(key)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def ok(text: str = "xin chào", remaining: int = 100, limit: int = 100):
+    """Phản hồi 200 kèm header quota"""
+    return 200, {'x-ratelimit-remaining-requests': remaining,
+                 'x-ratelimit-limit-requests': limit,
+                 'x-ratelimit-reset-requests': '60s'}, {'text': text}
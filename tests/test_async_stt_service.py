@@ -0,0 +1,189 @@
+"""
+AsyncGroqSTTService trên server giả lập: giới hạn số request đồng thời, hủy
+task không làm xoay key, 429/401 xoay key qua KeyScheduler dùng chung với
+client đồng bộ, deadline và thống kê timeout / độ trễ
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.services import AsyncGroqSTTService, GroqSTTService
+from src.services.groq_stt_service import DeadlineExceeded
+from src.services.key_scheduler import OPEN, QUARANTINED
+from stubs import ok
+
+
+def create_service(server, keys, **kwargs):
+    return GroqSTTService(server.url, api_key_env='VTT_TEST_UNSET_KEY', api_keys=keys, **kwargs)
+
+
+class InFlight:
+    """respond() chậm, ghi lại số request server đang xử lý cùng lúc nhiều nhất"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __call__(self, key):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(self.delay)
+        with self.lock:
+            self.current -= 1
+        return ok(key)
+
+
+def test_concurrency_is_capped_at_max_concurrency(stub_server):
+    respond = InFlight(0.2)
+    service = create_service(stub_server(respond), ['a', 'b'])
+    client = AsyncGroqSTTService(service, max_concurrency=3)
+
+    async def run():
+        try:
+            return await client.transcribe_many([b'\0' * 64] * 9)
+        finally:
+            await client.close()
+
+    try:
+        started = time.perf_counter()
+        texts = asyncio.run(run())
+        elapsed = time.perf_counter() - started
+    finally:
+        service.close()
+
+    assert all(text in ('a', 'b') for text in texts)
+    assert respond.peak == 3
+    assert 0.55 < elapsed < 1.5  # 9 request / 3 song song x 0.2s
+    assert service.latency.count == 9
+    assert all(state['in_flight'] == 0 for state in service.scheduler.snapshot())
+
+
+def test_cancelled_task_does_not_rotate_or_block_the_key(stub_server):
+    def respond(key):
+        time.sleep(1.0 if server.count() == 1 else 0.0)
+        return ok(key)
+
+    server = stub_server(respond)
+    service = create_service(server, ['a', 'b'])
+    client = AsyncGroqSTTService(service)
+
+    async def run():
+        try:
+            task = asyncio.create_task(client.transcribe_audio(b'\0' * 64))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await client.transcribe_audio(b'\0' * 64)
+        finally:
+            await client.close()
+
+    try:
+        started = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - started
+        first = server.calls[0]
+    finally:
+        service.close()
+
+    assert elapsed < 0.9  # Không chờ request bị hủy
+    assert server.count() == 2
+    states = service.scheduler.snapshot()
+    assert all(state['in_flight'] == 0 for state in states)
+    assert service.scheduler.key_state(['a', 'b'].index(first)) not in (OPEN, QUARANTINED)
+    assert service.timeout_stats == {'adaptive_timeouts': 0, 'fixed_timeouts': 0, 'deadline_exceeded': 0}
+
+
+def test_429_and_401_rotate_through_the_shared_scheduler(stub_server):
+    def respond(key):
+        if key == 'limited':
+            return 429, {'retry-after': '60'}, {'error': 'rate limited'}
+        if key == 'revoked':
+            return 401, {}, {'error': 'invalid api key'}
+        return ok(key)
+
+    server = stub_server(respond)
+    service = create_service(server, ['limited', 'revoked', 'good'])
+    client = AsyncGroqSTTService(service)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(client.transcribe_audio(b'\0' * 64) for _ in range(2)))
+        finally:
+            await client.close()
+
+    try:
+        assert asyncio.run(run()) == ['good', 'good']
+        # Client đồng bộ thấy ngay trạng thái key async vừa ghi
+        assert service.scheduler.key_state(0) == OPEN
+        assert service.scheduler.key_state(1) == QUARANTINED
+        assert service.transcribe_audio(b'\0' * 64) == 'good'
+    finally:
+        service.close()
+
+    # 2 request song song có thể cùng chạm key hỏng trước khi biết kết quả,
+    # sau đó không gửi thêm vào key đó nữa
+    assert server.count('limited') <= 2 and server.count('revoked') <= 2
+    assert server.count('good') == 3
+
+
+def test_deadline_stops_retries_and_is_counted(stub_server):
+    def respond(key):
+        time.sleep(2.0)
+        return ok(key)
+
+    service = create_service(stub_server(respond), ['a'], timeout=60, max_network_retries=2)
+    client = AsyncGroqSTTService(service)
+
+    async def run(deadline):
+        try:
+            return await client.transcribe_audio(b'\0' * 64, deadline=deadline)
+        finally:
+            await client.close()
+
+    try:
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            asyncio.run(run(started + 0.6))
+        elapsed = time.monotonic() - started
+        timeouts = service.get_latency_stats()['timeouts']
+    finally:
+        service.close()
+
+    assert elapsed < 1.0
+    assert timeouts['fixed_timeouts'] >= 1
+    assert timeouts['deadline_exceeded'] == 1
+    assert service.latency.count == 0
+
+
+def test_slow_key_then_fast_key_finishes_within_deadline(stub_server):
+    def respond(key):
+        if key == 'slow':
+            time.sleep(5)
+        return ok(key)
+
+    server = stub_server(respond)
+    service = create_service(server, ['slow', 'fast'], timeout=60, max_network_retries=1)
+    client = AsyncGroqSTTService(service)
+
+    async def run(deadline):
+        try:
+            return await client.transcribe_audio(b'\0' * 64, audio_seconds=2.0, deadline=deadline)
+        finally:
+            await client.close()
+
+    try:
+        started = time.monotonic()
+        assert asyncio.run(run(started + 3.0)) == 'fast'
+        assert time.monotonic() - started < 3.0
+    finally:
+        service.close()
+
+    assert server.count('slow') == 1
+    assert service.get_latency_stats()['timeouts']['fixed_timeouts'] == 1
+    assert service.latency_by_duration.percentile(2.0, 50) is not None
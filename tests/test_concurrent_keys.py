@@ -0,0 +1,170 @@
+"""
+Nhiều thread gọi transcribe_audio cùng lúc trên 1 GroqSTTService: không key
+nào bị gửi quá quota, snapshot quota không bị phản hồi cũ đè (seq tăng dần),
+số request hedge có giới hạn khi tải vượt số thread của executor hedge
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.services import GroqSTTService
+from stubs import ok
+
+# Quota mỗi key (limit khác nhau để nhận ra key trong snapshot)
+BUDGETS = {'a': 40, 'b': 41}
+KEYS = ['limited', 'a', 'b']
+THREADS = 16
+LOAD = 300
+
+
+class QuotaServer:
+    """Key 'limited' luôn 429; key khác 200 tới hết quota rồi 429"""
+
+    def __init__(self, stub_server):
+        self.used = {key: 0 for key in BUDGETS}
+        self.over_budget = []
+        self.lock = threading.Lock()
+        self.server = stub_server(self.respond)
+
+    def respond(self, key):
+        if key == 'limited':
+            return 429, {'retry-after': '60'}, {'error': 'rate limited'}
+        with self.lock:
+            if self.used[key] >= BUDGETS[key]:
+                self.over_budget.append(key)
+                return 429, {'x-ratelimit-remaining-requests': 0, 'x-ratelimit-reset-requests': '60s'}, {}
+            self.used[key] += 1
+            remaining = BUDGETS[key] - self.used[key]
+        return 200, {'x-ratelimit-remaining-requests': remaining,
+                     'x-ratelimit-limit-requests': BUDGETS[key],
+                     'x-ratelimit-reset-requests': '60s'}, {'text': key}
+
+
+class QuotaReader(threading.Thread):
+    """Đọc snapshot quota liên tục trong lúc các thread khác gửi request"""
+
+    def __init__(self, service):
+        super().__init__(daemon=True)
+        self.service = service
+        self.errors = []
+        self.stop = threading.Event()
+
+    def run(self):
+        last = 0
+        while not self.stop.is_set():
+            quota = self.service.current_quota_info
+            if quota['seq'] < last:
+                self.errors.append(f"seq {quota['seq']} after {last}")
+            last = quota['seq']
+            if quota['limit'] is not None:
+                key = KEYS[quota['key_index']]
+                if quota['limit'] != BUDGETS.get(key) or quota['remaining'] > quota['limit']:
+                    self.errors.append(f"torn snapshot {quota}")
+
+    def finish(self) -> list:
+        self.stop.set()
+        self.join()
+        return self.errors
+
+
+def run_concurrently(service, requests: int):
+    """Gửi requests lần nhận dạng trên THREADS thread -> (kết quả, exception)"""
+    def call(_):
+        try:
+            return service.transcribe_audio(b'\0' * 64), None
+        except Exception as e:
+            return None, e
+
+    with ThreadPoolExecutor(THREADS) as executor:
+        outcomes = list(executor.map(call, range(requests)))
+    return [text for text, _ in outcomes if text], [error for _, error in outcomes if error]
+
+
+def make_service(server):
+    return GroqSTTService(server.url, api_key_env='VTT_TEST_UNSET_KEY', api_keys=KEYS,
+                          timeout=10, pool_size=THREADS)
+
+
+def test_concurrent_callers_within_budget(stub_server):
+    quota_server = QuotaServer(stub_server)
+    service = make_service(quota_server.server)
+    reader = QuotaReader(service)
+    reader.start()
+    try:
+        # Lần đầu key 'limited' bị 429 (khóa 60s), chuyển sang key khác
+        assert service.transcribe_audio(b'\0' * 64) in BUDGETS
+        results, errors = run_concurrently(service, 60)
+    finally:
+        reader_errors = reader.finish()
+        service.close()
+
+    assert errors == []
+    assert reader_errors == []
+    assert quota_server.over_budget == []
+    assert quota_server.server.count('limited') == 1
+    assert sorted(set(results)) == ['a', 'b']
+    assert sum(quota_server.used.values()) == 61
+    assert all(state['in_flight'] == 0 for state in service.scheduler.snapshot())
+
+
+def test_concurrent_callers_never_exceed_key_budget(stub_server):
+    quota_server = QuotaServer(stub_server)
+    service = make_service(quota_server.server)
+    reader = QuotaReader(service)
+    reader.start()
+    try:
+        assert service.transcribe_audio(b'\0' * 64) in BUDGETS
+        # Nhiều request hơn tổng quota: phần thừa bị từ chối phía client
+        results, errors = run_concurrently(service, 120)
+    finally:
+        reader_errors = reader.finish()
+        service.close()
+
+    assert reader_errors == []
+    assert quota_server.over_budget == []
+    assert quota_server.server.count('limited') == 1
+    for key, budget in BUDGETS.items():
+        assert quota_server.server.count(key) == quota_server.used[key] <= budget
+    assert len(results) + 1 == sum(quota_server.used.values())
+    assert len(results) + len(errors) == 120
+    assert all('hết quota' in str(error) for error in errors)
+    assert all(state['in_flight'] == 0 for state in service.scheduler.snapshot())
+
+
+@pytest.mark.parametrize('max_workers, expected_workers', [(None, 16), (64, 64)])
+def test_hedges_stay_bounded_under_hundreds_of_requests(stub_server, max_workers, expected_workers):
+    keys = ['h0', 'h1', 'h2', 'h3']
+    lock = threading.Lock()
+    seen = [0]
+
+    def respond(key):
+        # ~4% request chậm (đáng hedge), còn lại nhanh
+        with lock:
+            seen[0] += 1
+            slow = seen[0] % 25 == 0
+        time.sleep(0.4 if slow else 0.02)
+        return ok(key, remaining=10000, limit=10000)
+
+    server = stub_server(respond)
+    service = GroqSTTService(server.url, api_key_env='VTT_TEST_UNSET_KEY', api_keys=keys, timeout=10,
+                             hedge_percentile=95, hedge_min_delay=0.15, hedge_max_workers=max_workers)
+    try:
+        for _ in range(12):
+            service.transcribe_audio(b'\0' * 64)
+        with ThreadPoolExecutor(48) as callers:
+            outcomes = list(callers.map(lambda _: service.transcribe_audio(b'\0' * 64), range(LOAD)))
+        hedge = service.get_latency_stats()['hedge']
+        workers = service._hedge_executor._max_workers
+    finally:
+        service.close()
+
+    # Mặc định = pool_size (4) x 4 key. Thời gian xếp hàng trong executor không
+    # tính vào thời gian chờ hedge, nên chỉ request chậm thật (~1/25) được hedge
+    # (hoặc bị bỏ qua khi mọi thread đều bận) thay vì gần như mọi request
+    assert workers == expected_workers
+    assert len(outcomes) == LOAD and set(outcomes) <= set(keys)
+    assert hedge['requests'] == LOAD + 12
+    assert hedge['hedged'] + hedge['skipped_busy'] <= LOAD // 10
+    assert server.count() <= LOAD + 12 + hedge['hedged']
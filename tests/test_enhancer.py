@@ -0,0 +1,56 @@
+"""
+StreamingEnhancer (xử lý theo chunk trong lúc ghi) so với đường batch
+EnhancementPipeline.process() trên cùng fixture, sai số tính theo LSB int16
+"""
+import numpy as np
+import pytest
+
+from src.audio import EnhancementPipeline, StreamingEnhancer
+
+SR = 16000
+CHUNKS = [1024, 2048, 3000, 4096]  # chunk_size thường dùng (+ 1 cỡ không phải lũy thừa 2)
+
+
+def voiced(seconds: float, f0: float) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+    return 4000 * x / np.abs(x).max()
+
+
+def take(seed: int) -> np.ndarray:
+    """Bản ghi giả lập: im lặng đầu, 2 câu nói, nhiễu nền + DC offset của micro"""
+    rng = np.random.default_rng(seed)
+    x = np.concatenate([np.zeros(int(0.3 * SR)), voiced(1.0, 140), np.zeros(int(0.4 * SR)),
+                        voiced(0.8, 180), np.zeros(int(0.5 * SR))])
+    x += rng.normal(0, 150, len(x)) + 300
+    return np.clip(np.rint(x), -32768, 32767).astype(np.int16)
+
+
+def diff_lsb(config: dict, audio: np.ndarray, chunk: int) -> np.ndarray:
+    expected = EnhancementPipeline(config).process(audio)
+    enhancer = StreamingEnhancer(config, len(audio))
+    for start in range(0, len(audio), chunk):
+        enhancer.process(audio[start:start + chunk])
+    return np.abs(enhancer.finalize().astype(np.int32) - expected)
+
+
+@pytest.mark.parametrize('chunk', CHUNKS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_spectral_matches_batch(seed, chunk):
+    # DC trừ theo trung bình chạy thay vì trung bình cả clip -> lệch nhỏ
+    assert diff_lsb({}, take(seed), chunk).max() <= 48
+
+
+@pytest.mark.parametrize('chunk', CHUNKS)
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_gate_matches_batch(seed, chunk):
+    diff = diff_lsb({'noise_reduction_method': 'gate'}, take(seed), chunk)
+    # Noise gate là ngưỡng cứng: sample nằm sát ngưỡng có thể bị gate ở 1 đường
+    # mà không ở đường kia (lệch ~0.7 * ngưỡng) - chỉ cho phép vài sample như vậy
+    assert np.count_nonzero(diff > 48) <= 10
+    assert np.percentile(diff, 99.9) <= 48
+
+
+@pytest.mark.parametrize('chunk', CHUNKS)
+def test_without_noise_reduction_matches_batch(chunk):
+    assert diff_lsb({'reduce_noise': False}, take(0), chunk).max() <= 1
@@ -0,0 +1,85 @@
+"""
+IIR vector hóa (cumsum theo block + carry) so với vòng lặp scalar từng sample,
+gồm cả tín hiệu vượt qua ranh giới block và lọc streaming theo chunk
+"""
+import numpy as np
+import pytest
+
+from src.audio.filters import (RCHighPassFilter, _block_size_for, first_order_recursive,
+                               highpass_rc)
+
+
+def reference_recursive(u, alpha):
+    """y[n] = alpha * y[n-1] + u[n], y[-1] = 0"""
+    y = np.empty(len(u))
+    state = 0.0
+    for i, value in enumerate(u):
+        state = alpha * state + float(value)
+        y[i] = state
+    return y
+
+
+def reference_highpass(x, alpha):
+    """y[0] = x[0], y[i] = alpha * (y[i-1] + x[i] - x[i-1])"""
+    y = np.empty(len(x))
+    y[0] = x[0]
+    for i in range(1, len(x)):
+        y[i] = alpha * (y[i - 1] + float(x[i]) - float(x[i - 1]))
+    return y
+
+
+def assert_close(actual, expected, rtol):
+    scale = max(float(np.max(np.abs(expected))), 1.0)
+    assert np.max(np.abs(actual - expected)) <= rtol * scale
+
+
+def lengths_around_blocks(alpha):
+    block = _block_size_for(abs(alpha))
+    return sorted({1, 2, block - 1, block, block + 1, 2 * block, 3 * block + 7})
+
+
+@pytest.mark.parametrize('alpha', [0.5, 0.97, 0.999, 0.9999, -0.9])
+def test_block_recursion_matches_scalar_reference(alpha):
+    rng = np.random.default_rng(0)
+    for n in lengths_around_blocks(alpha):
+        u = rng.normal(0, 1000, n)
+        assert_close(first_order_recursive(u, alpha), reference_recursive(u, alpha), 1e-9)
+
+
+@pytest.mark.parametrize('alpha', [0.97, 0.9999])
+def test_step_and_impulse_carry_across_blocks(alpha):
+    block = _block_size_for(alpha)
+    n = 4 * block + 3
+    # Bước nhảy / xung ngay trước ranh giới block: carry phải lan qua nhiều block
+    for position in (block - 1, block, 2 * block + 1):
+        step = np.zeros(n)
+        step[position:] = 1.0
+        impulse = np.zeros(n)
+        impulse[position] = 1.0
+        for u in (step, impulse):
+            assert_close(first_order_recursive(u, alpha), reference_recursive(u, alpha), 1e-9)
+
+
+@pytest.mark.parametrize('alpha', [0.97, 0.995])
+def test_highpass_matches_scalar_reference(alpha):
+    rng = np.random.default_rng(1)
+    t = np.arange(3 * _block_size_for(alpha) + 11) / 16000.0
+    x = 8000 * np.sin(2 * np.pi * 220 * t) + 3000 + rng.normal(0, 500, len(t))
+    assert_close(highpass_rc(x, alpha), reference_highpass(x, alpha), 1e-6)
+
+
+def test_streaming_highpass_matches_whole_clip():
+    rng = np.random.default_rng(2)
+    x = rng.normal(0, 3000, 20000) + 1500
+    expected = reference_highpass(x, 0.97)
+
+    # Chunk đủ loại độ dài: 1 sample, nhỏ hơn / bằng / lớn hơn 1 block
+    block = _block_size_for(0.97)
+    sizes = [1, 7, block - 1, block, block + 1, 2048, 1]
+    highpass = RCHighPassFilter(0.97)
+    pieces, start = [], 0
+    while start < len(x):
+        size = sizes[len(pieces) % len(sizes)]
+        pieces.append(highpass.process(x[start:start + size]))
+        start += size
+    assert_close(np.concatenate(pieces), expected, 1e-6)
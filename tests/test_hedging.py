@@ -0,0 +1,122 @@
+"""
+Hedging: request chậm được gửi thêm trên key khác, 2 request của 1 lần nhận
+dạng không bao giờ cùng bay trên 1 key (kể cả khi gửi lại sau lỗi mạng / 5xx)
+"""
+import threading
+import time
+
+from src.services import GroqSTTService
+from src.services.groq_stt_service import _KeyClaims
+from stubs import ok
+
+# Key 'a' báo còn nhiều quota hơn nên scheduler luôn ưu tiên nó
+REMAINING = {'a': 100, 'b': 10}
+
+
+class HedgeServer:
+    """Đếm số request đang xử lý trên từng key (và mức cao nhất)"""
+
+    def __init__(self, stub_server, handle):
+        self.handle = handle
+        self.active = {key: 0 for key in REMAINING}
+        self.peak = {key: 0 for key in REMAINING}
+        self.lock = threading.Lock()
+        self.hedging = False
+        self.server = stub_server(self.respond)
+
+    def respond(self, key):
+        with self.lock:
+            self.active[key] += 1
+            self.peak[key] = max(self.peak[key], self.active[key])
+        try:
+            if self.hedging:
+                return self.handle(key)
+            return ok(key, remaining=REMAINING[key])
+        finally:
+            with self.lock:
+                self.active[key] -= 1
+
+
+def make_service(server, **kwargs):
+    options = dict(api_key_env='VTT_TEST_UNSET_KEY', api_keys=['a', 'b'], timeout=10,
+                   hedge_percentile=95, hedge_min_delay=0.2)
+    options.update(kwargs)
+    return GroqSTTService(server.url, **options)
+
+
+def warm_up(service, hedge_server):
+    """Đủ mẫu độ trễ để hedge theo percentile (~ vài ms -> hedge_min_delay)"""
+    for _ in range(12):
+        service.transcribe_audio(b'\0' * 64)
+    hedge_server.hedging = True
+    hedge_server.peak = {key: 0 for key in REMAINING}
+    return hedge_server.server.count()
+
+
+def test_slow_request_is_hedged_on_another_key(stub_server):
+    def handle(key):
+        if key == 'a':
+            time.sleep(1.5)
+        return ok(key, remaining=REMAINING[key])
+
+    hedge_server = HedgeServer(stub_server, handle)
+    service = make_service(hedge_server.server)
+    try:
+        before = warm_up(service, hedge_server)
+        started = time.monotonic()
+        assert service.transcribe_audio(b'\0' * 64) == 'b'
+        assert time.monotonic() - started < 1.0
+        assert hedge_server.server.calls[before:] == ['a', 'b']
+        assert service.hedge_stats['hedged'] == 1
+        assert service.hedge_stats['hedge_wins'] == 1
+    finally:
+        service.close()
+
+
+def test_hedged_requests_never_share_a_key_after_transport_retry(stub_server):
+    # Lần gửi đầu trên mỗi key đều chờ nhau rồi cùng trả 503: 2 request gửi lại
+    # cùng lúc, cả 2 đều muốn key 'a' (nhiều quota hơn)
+    both_arrived = threading.Barrier(2, timeout=5)
+    failed = set()
+    lock = threading.Lock()
+
+    def handle(key):
+        with lock:
+            first = key not in failed
+            failed.add(key)
+        if first:
+            both_arrived.wait()
+            return 503, {}, {'error': 'overloaded'}
+        time.sleep(0.3)
+        return ok(key, remaining=REMAINING[key])
+
+    hedge_server = HedgeServer(stub_server, handle)
+    service = make_service(hedge_server.server, max_network_retries=1)
+    try:
+        before = warm_up(service, hedge_server)
+        assert service.transcribe_audio(b'\0' * 64) in REMAINING
+        time.sleep(0.5)  # Request thua đã upload xong vẫn chạy tới khi server trả lời
+        calls = hedge_server.server.calls[before:]
+        assert sorted(calls[:2]) == ['a', 'b']
+        assert sorted(calls[2:]) == ['a', 'b']
+        assert hedge_server.peak == {'a': 1, 'b': 1}
+    finally:
+        service.close()
+
+
+def test_claimed_key_is_excluded_even_with_more_quota(stub_server):
+    server = stub_server(lambda key: ok(key, remaining=REMAINING[key]))
+    service = make_service(server)
+    try:
+        service.scheduler.update_from_headers(0, {'x-ratelimit-remaining-requests': '100'})
+        service.scheduler.update_from_headers(1, {'x-ratelimit-remaining-requests': '10'})
+        claims = _KeyClaims()
+        assert service._acquire_key(set(), claims) == 0
+        # Request hedge (tried_indices riêng, rỗng) không được lấy key đang bay
+        assert service._acquire_key(set(), claims) == 1
+        assert service._acquire_key(set(), claims) is None
+        assert claims.keys == {0, 1}
+        for index in (0, 1):
+            service.scheduler.release(index)
+    finally:
+        service.close()
@@ -0,0 +1,127 @@
+"""
+KeyScheduler với đồng hồ giả (now=): circuit breaker closed -> open ->
+half-open -> closed, cách ly key 401, token bucket RPM, quota theo header
+"""
+import pytest
+
+from src.services.key_scheduler import (CLOSED, HALF_OPEN, OPEN, QUARANTINED,
+                                        KeyScheduler, parse_reset)
+
+T0 = 1000.0
+
+
+def test_breaker_closed_open_half_open_closed():
+    scheduler = KeyScheduler(2)
+    assert scheduler.key_state(0, now=T0) == CLOSED
+
+    # 429 có retry-after: key 0 mở breaker, request tiếp theo đi key 1
+    assert scheduler.acquire(now=T0) == 0
+    assert scheduler.mark_rate_limited(0, {'retry-after': '5'}, now=T0) == 5.0
+    scheduler.release(0)
+    assert scheduler.key_state(0, now=T0 + 1) == OPEN
+    assert scheduler.acquire(now=T0 + 1) == 1
+    scheduler.release(1)
+    assert scheduler.acquire(exclude={1}, now=T0 + 1) is None
+    assert scheduler.next_available_in(exclude={1}, now=T0 + 1) == 4.0
+
+    # Hết hạn khóa: half-open, chỉ 1 request thăm dò được đi
+    assert scheduler.key_state(0, now=T0 + 5) == HALF_OPEN
+    assert scheduler.acquire(exclude={1}, now=T0 + 5) == 0
+    assert scheduler.acquire(exclude={1}, now=T0 + 5.1) is None
+
+    # Thăm dò lại bị 429: backoff mũ (lần 2 = 2s) rồi half-open lần nữa
+    assert scheduler.mark_rate_limited(0, now=T0 + 5.2) == 2.0
+    scheduler.release(0)
+    assert scheduler.key_state(0, now=T0 + 6) == OPEN
+    assert scheduler.key_state(0, now=T0 + 7.2) == HALF_OPEN
+
+    # Thăm dò thành công: breaker đóng, key nhận request bình thường
+    assert scheduler.acquire(exclude={1}, now=T0 + 7.2) == 0
+    scheduler.record_success(0)
+    scheduler.release(0)
+    assert scheduler.key_state(0, now=T0 + 7.3) == CLOSED
+    assert scheduler.acquire(exclude={1}, now=T0 + 7.3) == 0
+    assert scheduler.acquire(exclude={1}, now=T0 + 7.3) == 0
+
+
+def test_backoff_doubles_and_is_capped():
+    scheduler = KeyScheduler(1)
+    waits = [scheduler.mark_rate_limited(0, now=T0) for _ in range(12)]
+    assert waits[:4] == [1.0, 2.0, 4.0, 8.0]
+    assert waits[-1] == 300.0
+    # Server yêu cầu chờ lâu hơn backoff thì tôn trọng server
+    scheduler.record_success(0)
+    assert scheduler.mark_rate_limited(0, {'x-ratelimit-reset-requests': '2m30s'}, now=T0) == 150.0
+
+
+def test_invalid_key_is_quarantined():
+    scheduler = KeyScheduler(2)
+    assert scheduler.acquire(now=T0) == 0
+    scheduler.mark_invalid(0)
+    scheduler.release(0)
+    assert scheduler.key_state(0, now=T0) == QUARANTINED
+    # Không bao giờ được chọn lại, kể cả rất lâu sau
+    for step in range(5):
+        now = T0 + step * 3600.0
+        assert scheduler.acquire(now=now) == 1
+        scheduler.release(1)
+    assert scheduler.key_state(0, now=T0 + 86400.0) == QUARANTINED
+    assert scheduler.peek(exclude={1}, now=T0) is None
+    assert scheduler.next_available_in(exclude={1}, now=T0) is None
+
+
+def test_token_bucket_refills_at_rpm():
+    scheduler = KeyScheduler(1, rpm=60)
+    for _ in range(60):
+        assert scheduler.acquire(now=T0) == 0
+        scheduler.release(0)
+    assert scheduler.acquire(now=T0) is None
+    assert scheduler.next_available_in(now=T0) == 1.0
+
+    # 60 rpm = 1 token mỗi giây
+    assert scheduler.acquire(now=T0 + 0.5) is None
+    assert scheduler.acquire(now=T0 + 1.0) == 0
+    scheduler.release(0)
+    assert scheduler.acquire(now=T0 + 1.0) is None
+    for _ in range(3):
+        assert scheduler.acquire(now=T0 + 4.0) == 0
+        scheduler.release(0)
+    assert scheduler.acquire(now=T0 + 4.0) is None
+
+    # Bucket không đầy quá rpm dù để rảnh lâu
+    granted = 0
+    while scheduler.acquire(now=T0 + 3600.0) is not None:
+        scheduler.release(0)
+        granted += 1
+    assert granted == 60
+
+
+def test_headers_steer_to_key_with_most_quota():
+    scheduler = KeyScheduler(2)
+    headers = {'x-ratelimit-remaining-requests': '0', 'x-ratelimit-limit-requests': '100',
+               'x-ratelimit-reset-requests': '10s'}
+    assert scheduler.acquire(now=T0) == 0
+    scheduler.update_from_headers(0, headers, now=T0)
+    scheduler.record_success(0)
+    scheduler.release(0)
+    # Key 0 đã hết quota tới lúc reset: không chờ 429 mới chuyển key
+    assert scheduler.key_state(0, now=T0) == CLOSED
+    assert scheduler.acquire(exclude={1}, now=T0 + 9.9) is None
+    assert scheduler.next_available_in(exclude={1}, now=T0 + 5.0) == 5.0
+
+    scheduler.update_from_headers(1, {'x-ratelimit-remaining-requests': '3'}, now=T0)
+    assert scheduler.acquire(now=T0 + 1) == 1
+    scheduler.release(1)
+    # Sau reset key 0 báo còn 50 request -> được ưu tiên hơn key 1 gần hết
+    scheduler.update_from_headers(0, {'x-ratelimit-remaining-requests': '50'}, now=T0 + 10)
+    assert scheduler.acquire(now=T0 + 10) == 0
+
+
+def test_parse_reset_formats():
+    assert parse_reset('2m59.56s') == pytest.approx(179.56)
+    assert parse_reset('7.66s') == 7.66
+    assert parse_reset('120ms') == pytest.approx(0.12)
+    assert parse_reset('30') == 30.0
+    assert parse_reset('1h') == 3600.0
+    assert parse_reset(None) is None
+    assert parse_reset('soon') is None
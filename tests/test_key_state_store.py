@@ -0,0 +1,125 @@
+"""
+KeyStateStore: ghi atomic (lỗi giữa chừng không để lại file ghi dở), 2
+instance cùng file gộp theo 'updated' mới hơn, file hỏng / sai version, lock
+hết hạn; key bị 401 được nạp lại còn cách ly tới QUARANTINE_TTL_SECONDS
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from src.services import key_state_store
+from src.services.key_scheduler import QUARANTINE_TTL_SECONDS, QUARANTINED, KeyScheduler
+from src.services.key_state_store import STATE_VERSION, KeyStateStore, _file_lock, key_id
+
+
+def entry(updated: float, remaining: int) -> dict:
+    return {'remaining_requests': remaining, 'updated': updated}
+
+
+def test_failed_write_keeps_previous_file_and_no_temp_files(tmp_path, monkeypatch):
+    store = KeyStateStore(str(tmp_path / 'key_state.json'))
+    store.save({'k1': entry(1.0, 10)})
+    before = (tmp_path / 'key_state.json').read_bytes()
+
+    def dump_half(obj, f, **kwargs):
+        f.write(json.dumps(obj)[:20])
+        raise OSError("disk full")
+
+    monkeypatch.setattr(key_state_store.json, 'dump', dump_half)
+    with pytest.raises(OSError):
+        store.save({'k1': entry(2.0, 5)})
+    monkeypatch.undo()
+
+    assert (tmp_path / 'key_state.json').read_bytes() == before
+    assert sorted(os.listdir(tmp_path)) == ['key_state.json', 'key_state.json.lock']
+    assert store.load() == {'k1': entry(1.0, 10)}
+
+
+def test_two_instances_merge_newest_updated_per_key(tmp_path):
+    path = str(tmp_path / 'key_state.json')
+    first, second = KeyStateStore(path), KeyStateStore(path)
+    first.save({'a': entry(100.0, 7), 'b': entry(200.0, 3)})
+    # Instance 2 có 'a' mới hơn nhưng 'b' cũ hơn (đọc trước khi instance 1 ghi)
+    merged = second.save({'a': entry(150.0, 6), 'b': entry(50.0, 9), 'c': entry(10.0, 1)})
+
+    assert merged == {'a': entry(150.0, 6), 'b': entry(200.0, 3), 'c': entry(10.0, 1)}
+    assert first.load() == merged
+    # Bản ghi cũ hơn không đè được bản ghi mới
+    first.save({'a': entry(120.0, 0)})
+    assert second.load()['a'] == entry(150.0, 6)
+
+
+@pytest.mark.parametrize('content', [
+    '{"version": 1, "keys": {"a": ',         # Ghi dở (không phải JSON)
+    '\x00\x01 not json',
+    '[1, 2, 3]',
+    '{"version": 999, "keys": {"a": {"updated": 1}}}',
+    '{"version": 1, "keys": ["a"]}',
+])
+def test_corrupt_or_wrong_version_file_is_ignored_and_replaced(tmp_path, content):
+    path = tmp_path / 'key_state.json'
+    path.write_text(content, encoding='utf-8')
+    store = KeyStateStore(str(path))
+    assert store.load() == {}
+
+    store.save({'a': entry(1.0, 4)})
+    assert json.loads(path.read_text(encoding='utf-8')) == {'version': STATE_VERSION,
+                                                            'keys': {'a': entry(1.0, 4)}}
+
+
+@pytest.mark.skipif(key_state_store.fcntl is None and key_state_store.msvcrt is None,
+                    reason="Không có file lock trên nền tảng này")
+def test_lock_times_out_while_held_and_waits_for_release(tmp_path):
+    store = KeyStateStore(str(tmp_path / 'key_state.json'))
+    store.save({'a': entry(1.0, 4)})
+
+    with _file_lock(store.lock_path):
+        started = time.monotonic()
+        with pytest.raises(TimeoutError):
+            with _file_lock(store.lock_path, timeout=0.2):
+                pass
+        assert time.monotonic() - started >= 0.2
+
+    # Lock được trả trong thời gian chờ: load() chờ rồi đọc bình thường
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with _file_lock(store.lock_path):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    held.wait(5)
+    threading.Timer(0.3, release.set).start()
+    started = time.monotonic()
+    assert store.load() == {'a': entry(1.0, 4)}
+    assert 0.25 <= time.monotonic() - started < 2.0
+    thread.join()
+
+
+def test_quarantine_survives_restart_until_ttl(tmp_path):
+    store = KeyStateStore(str(tmp_path / 'key_state.json'))
+    ids = [key_id('revoked'), key_id('good')]
+    scheduler = KeyScheduler(2)
+    scheduler.mark_invalid(0)
+    store.save(scheduler.export_state(ids))
+
+    restarted = KeyScheduler(2)
+    assert restarted.restore_state(ids, store.load()) == 1  # Key 'good' chưa có gì để lưu
+    assert restarted.key_state(0) == QUARANTINED
+    assert restarted.acquire() == 1
+
+    # Quá TTL kể từ lúc bị 401: nạp lại nhưng không cách ly nữa
+    saved = store.load()
+    saved[ids[0]]['invalid_at'] -= QUARANTINE_TTL_SECONDS + 1
+    later = KeyScheduler(2)
+    later.restore_state(ids, saved)
+    assert later.key_state(0) != QUARANTINED
+    # Key đổi (hash khác) không bị ảnh hưởng bởi bản ghi cũ
+    fresh = KeyScheduler(2)
+    assert fresh.restore_state([key_id('replacement'), ids[1]], store.load()) == 0
+    assert fresh.key_state(0) != QUARANTINED
@@ -0,0 +1,67 @@
+"""
+Bộ nhớ cấp phát (tracemalloc) không tăng theo độ dài bản ghi: ghi chunk +
+CaptureBuffer.take() không copy, EnhancementPipeline chỉ có 1 buffer làm việc
+"""
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from src.audio import CaptureBuffer, EnhancementPipeline
+
+SR = 16000
+CHUNK = 2048
+
+
+def traced_peak(run) -> int:
+    """Số byte cấp phát thêm tối đa trong lúc chạy run()"""
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+
+def noisy_speech(seconds: int) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * SR) / SR
+    tone = 4000 * np.sin(2 * np.pi * 220 * t) * (np.sin(2 * np.pi * 0.5 * t) > 0)
+    return (tone + rng.normal(0, 300, len(t))).astype(np.int16)
+
+
+@pytest.mark.parametrize('seconds', [5, 60])
+def test_capture_write_and_take_do_not_copy(seconds):
+    buffer = CaptureBuffer(seconds, SR, extra_frames=CHUNK)
+    buffer.reset()
+    audio = noisy_speech(seconds)
+    chunks = [audio[start:start + CHUNK].tobytes() for start in range(0, len(audio), CHUNK)]
+    taken = []
+
+    def record():
+        for chunk in chunks:
+            buffer.write(chunk)
+        taken.append(buffer.take())
+
+    peak = traced_peak(record)
+
+    assert peak < 4096
+    assert taken[0].base is not None  # View của mảng cấp phát trước, không phải bản sao
+    assert np.array_equal(taken[0], audio)
+
+
+@pytest.mark.parametrize('config', [{}, {'noise_reduction_method': 'gate'}, {'reduce_noise': False}])
+def test_pipeline_overhead_does_not_grow_with_length(config):
+    pipeline = EnhancementPipeline(config)
+    overhead = {}
+    for seconds in (5, 60):
+        audio = noisy_speech(seconds)
+        out = np.empty_like(audio)
+        pipeline.process(audio[:SR], out[:SR])  # Khởi tạo FFT / cache trước khi đo
+        peak = traced_peak(lambda: pipeline.process(audio, out))
+        # Trừ buffer làm việc float32 duy nhất (4 byte / sample)
+        overhead[seconds] = peak - 4 * len(audio)
+
+    assert overhead[60] < 2 * 1024 * 1024
+    assert abs(overhead[60] - overhead[5]) < 64 * 1024
@@ -0,0 +1,100 @@
+"""
+Mô phỏng quota: server giả lập áp giới hạn RPM (cửa sổ thu nhỏ còn 0.5s) và
+RPD cho từng key. Cùng 1 tải: xoay vòng khi gặp 429 (cách cũ, không scheduler)
+so với GroqSTTService dùng KeyScheduler - số 429 phải giảm về gần 0
+"""
+import threading
+import time
+
+import requests
+
+from src.services.groq_stt_service import GroqSTTService
+
+WINDOW = 0.5           # "1 phút" thu nhỏ để test chạy nhanh
+DAY = 60.0             # Chưa hết "ngày" trong lúc test chạy
+RPM = 5
+RPD = {'a': 4, 'b': 1000, 'c': 1000}  # Key 'a' gần hết quota ngày
+KEYS = list(RPD)
+LOAD = 36
+PACE = 0.02
+
+
+class PerKeyLimits:
+    """Giới hạn RPM (cửa sổ cố định) + RPD từng key, trả header x-ratelimit-* như Groq"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.window_end = {key: 0.0 for key in KEYS}
+        self.minute = {key: 0 for key in KEYS}
+        self.day = {key: 0 for key in KEYS}
+        self.rejected = 0
+
+    def __call__(self, key):
+        with self.lock:
+            now = time.monotonic()
+            if now >= self.window_end[key]:
+                self.window_end[key] = now + WINDOW
+                self.minute[key] = 0
+            minute_left = RPM - self.minute[key]
+            day_left = RPD[key] - self.day[key]
+            minute_reset = self.window_end[key] - now
+            if minute_left <= 0 or day_left <= 0:
+                self.rejected += 1
+                retry = minute_reset if day_left > 0 else DAY
+                return 429, {'retry-after': f"{retry:.3f}"}, {'error': {'message': 'rate limit'}}
+
+            self.minute[key] += 1
+            self.day[key] += 1
+            if day_left <= minute_left:
+                remaining, limit, reset = day_left - 1, RPD[key], DAY
+            else:
+                remaining, limit, reset = minute_left - 1, RPM, minute_reset
+            return 200, {'x-ratelimit-remaining-requests': remaining,
+                         'x-ratelimit-limit-requests': limit,
+                         'x-ratelimit-reset-requests': f"{reset:.3f}s"}, {'text': 'xin chào'}
+
+
+def round_robin_on_429(url: str, position: list) -> bool:
+    """Chính sách trước KeyScheduler: dùng key hiện tại, chỉ đổi key khi nhận 429"""
+    for _ in KEYS:
+        key = KEYS[position[0]]
+        resp = requests.post(f"{url}/audio/transcriptions", headers={'Authorization': f"Bearer {key}"},
+                             files={'file': ('audio.wav', b'RIFF', 'audio/wav')}, timeout=5)
+        if resp.status_code != 429:
+            return True
+        position[0] = (position[0] + 1) % len(KEYS)
+    return False
+
+
+def run_load(send):
+    ok = 0
+    for _ in range(LOAD):
+        ok += bool(send())
+        time.sleep(PACE)
+    return ok
+
+
+def test_scheduler_avoids_rate_limits_that_round_robin_hits(stub_server):
+    limits = PerKeyLimits()
+    server = stub_server(limits)
+    position = [0]
+    baseline_ok = run_load(lambda: round_robin_on_429(server.url, position))
+    baseline_rejected = limits.rejected
+
+    limits = PerKeyLimits()
+    server = stub_server(limits)
+    service = GroqSTTService(api_base=server.url, api_keys=KEYS, api_key_env='VTT_TEST_UNSET_KEY',
+                             max_key_wait=2 * WINDOW)
+    try:
+        scheduled_ok = run_load(lambda: service.transcribe_audio(b'RIFF') == 'xin chào')
+    finally:
+        service.close()
+
+    # Không scheduler: mỗi lần key hết RPM / RPD là 1 round trip 429 phí phạm
+    # (và request thất bại khi cả 3 key cùng 429)
+    assert baseline_rejected >= 10
+    assert baseline_ok < LOAD
+    # Scheduler đọc header và không gửi vào key đã biết hết quota tới lúc reset
+    assert limits.rejected <= 1
+    assert scheduled_ok == LOAD
+    assert limits.day['a'] <= RPD['a']
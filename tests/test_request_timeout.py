@@ -0,0 +1,43 @@
+"""
+Timeout từng lần gửi khi có deadline: key treo không được ăn hết thời gian
+của lần gửi lại trên key khác
+"""
+import time
+
+import pytest
+
+from src.services import GroqSTTService
+from src.services.groq_stt_service import DeadlineExceeded
+from stubs import ok
+
+
+def test_slow_key_then_fast_key_finishes_within_deadline(stub_server):
+    def respond(key):
+        if key == 'slow':
+            time.sleep(5)
+        return ok(key)
+
+    server = stub_server(respond)
+    service = GroqSTTService(server.url, api_key_env='VTT_TEST_UNSET_KEY', api_keys=['slow', 'fast'],
+                             timeout=60, max_network_retries=1)
+    try:
+        started = time.monotonic()
+        text = service.transcribe_audio(b'\0' * 64, deadline=started + 3.0)
+        assert text == 'fast'
+        assert time.monotonic() - started < 3.0
+        assert server.count('slow') == 1
+    finally:
+        service.close()
+
+
+def test_attempt_keeps_budget_for_retry():
+    service = GroqSTTService('http://127.0.0.1:9', api_key_env='VTT_TEST_UNSET_KEY', api_keys=['k'], timeout=60)
+    deadline = time.monotonic() + 10.0
+    (connect, read), _ = service._request_timeout(deadline=deadline, can_retry=True)
+    assert read <= 5.0 and connect <= 5.0
+    (connect, read), _ = service._request_timeout(deadline=deadline, can_retry=False)
+    assert 9.0 < read <= 10.0
+    (connect, read), _ = service._request_timeout(can_retry=True)
+    assert read == 60.0
+    with pytest.raises(DeadlineExceeded):
+        service._request_timeout(deadline=time.monotonic() - 1.0)
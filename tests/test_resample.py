@@ -0,0 +1,102 @@
+"""
+PolyphaseResampler: biên độ / pha của tone so với tín hiệu giải tích ở tần số
+đích, chống aliasing khi downsample về 16kHz, và round-trip qua WAV / FLAC
+"""
+import io
+import wave
+
+import numpy as np
+import pytest
+
+from src.audio import FlacEncoder, PolyphaseResampler, WavEncoder, resample
+
+DST = 16000
+EDGE = 100  # Bỏ các sample đầu/cuối chịu ảnh hưởng của zero-padding
+
+
+def tone(rate: int, frequency: float, seconds: float = 1.0, phase: float = 0.3) -> np.ndarray:
+    return np.sin(2 * np.pi * frequency * np.arange(int(seconds * rate)) / rate + phase)
+
+
+def fit_tone(y: np.ndarray, frequency: float, start: int):
+    """Biên độ và pha (least squares) của tone frequency trong y[start:-start] ở DST"""
+    t = np.arange(start, len(y) - start) / DST
+    basis = np.stack([np.sin(2 * np.pi * frequency * t), np.cos(2 * np.pi * frequency * t)], axis=1)
+    (a, b), *_ = np.linalg.lstsq(basis, y[start:len(y) - start], rcond=None)
+    return float(np.hypot(a, b)), float(np.arctan2(b, a))
+
+
+# Tone trong dải thông phẳng (< 60% Nyquist của tần số thấp hơn)
+PASSBAND_CASES = [(src, frequency) for src in (8000, 22050, 32000, 44100, 48000)
+                  for frequency in (440.0, 1000.0, 3000.0) if frequency < 0.3 * min(src, DST)]
+
+
+@pytest.mark.parametrize('src, frequency', PASSBAND_CASES)
+def test_tone_amplitude_and_phase_match_analytic(src, frequency):
+    y = PolyphaseResampler(src, DST).process(tone(src, frequency))
+    assert len(y) == DST
+
+    amplitude, phase = fit_tone(y, frequency, EDGE)
+    assert abs(amplitude - 1.0) < 1e-3
+    assert abs(phase - 0.3) < 1e-3  # Lệch nửa sample trục upsample ~ 0.07 rad ở 48k -> 16k
+
+    reference = tone(DST, frequency)
+    error = y[EDGE:-EDGE] - reference[EDGE:-EDGE]
+    assert np.sqrt(np.mean(error ** 2)) < 1e-3 * np.sqrt(0.5)
+
+
+@pytest.mark.parametrize('src', [22050, 44100, 48000])
+def test_downsampling_rejects_aliases(src):
+    resampler = PolyphaseResampler(src, DST)
+    # Trên Nyquist đích (8kHz), ngoài dải chuyển tiếp của bộ lọc
+    for frequency in (8800.0, 9500.0, 10500.0, 15000.0, 20000.0):
+        if frequency >= 0.95 * src / 2:
+            continue
+        y = resampler.process(tone(src, frequency))[EDGE:-EDGE]
+        level_db = 20 * np.log10(np.sqrt(np.mean(y ** 2)) / np.sqrt(0.5))
+        assert level_db < -80, f"{src} Hz, tone {frequency} Hz: {level_db:.1f} dB"
+
+
+def test_int16_resample_matches_float_path():
+    x = np.rint(12000 * tone(48000, 1000.0)).astype(np.int16)
+    y = resample(x, 48000, DST)
+    assert y.dtype == np.int16
+    expected = PolyphaseResampler(48000, DST).process(x)
+    assert np.max(np.abs(y.astype(np.float64) - expected)) <= 0.5 + 1e-3
+
+
+def speech_like(rate: int) -> np.ndarray:
+    x = 9000 * tone(rate, 220.0) + 4000 * tone(rate, 1370.0, phase=1.1) + 1500 * tone(rate, 3100.0)
+    return np.rint(x).astype(np.int16)
+
+
+@pytest.mark.parametrize('src', [22050, 44100, 48000])
+def test_wav_round_trip(src):
+    y = resample(speech_like(src), src, DST)
+    encoder = WavEncoder(DST)
+    for start in range(0, len(y), 1000):
+        encoder.feed(y[start:start + 1000])
+
+    with wave.open(io.BytesIO(encoder.finish())) as reader:
+        assert reader.getframerate() == DST
+        assert reader.getnchannels() == 1
+        assert reader.getsampwidth() == 2
+        decoded = np.frombuffer(reader.readframes(reader.getnframes()), dtype='<i2')
+    assert np.array_equal(decoded, y)
+
+    # Vẫn đúng tín hiệu giải tích sau khi lượng tử hóa int16 (sai số ~ 0.5 LSB)
+    reference = speech_like(DST).astype(np.float64)
+    assert np.max(np.abs(decoded[EDGE:-EDGE] - reference[EDGE:-EDGE])) < 30
+
+
+@pytest.mark.parametrize('src', [22050, 44100, 48000])
+def test_flac_round_trip(src):
+    soundfile = pytest.importorskip('soundfile')
+    y = resample(speech_like(src), src, DST)
+    encoder = FlacEncoder(DST)
+    for start in range(0, len(y), 1000):
+        encoder.feed(y[start:start + 1000])
+
+    decoded, rate = soundfile.read(io.BytesIO(encoder.finish()), dtype='int16')
+    assert rate == DST
+    assert np.array_equal(decoded, y)
@@ -0,0 +1,190 @@
+"""
+SPSCRingBuffer: quay vòng qua cuối bộ đệm, đếm sample bị bỏ khi consumer
+chậm (producer không bao giờ block), producer / consumer trên 2 thread.
+PrerollRing / PrerollReader: pre-roll lùi từ vị trí ghi, reader bị producer
+ghi đè vượt qua (lapped) nhảy tới dữ liệu an toàn cũ nhất và đếm phần bị bỏ
+"""
+import threading
+
+import numpy as np
+
+from src.audio.ring_buffer import PrerollRing, SPSCRingBuffer
+
+
+def ramp(start: int, count: int) -> np.ndarray:
+    return np.arange(start, start + count, dtype=np.int16)
+
+
+def test_spsc_wraparound_keeps_order():
+    ring = SPSCRingBuffer(8)
+    assert ring.push(ramp(0, 6)) == 0
+    assert ring.pop(4).tolist() == [0, 1, 2, 3]
+
+    # Ghi 5 sample từ vị trí 6: 2 ở cuối bộ đệm, 3 quay về đầu
+    assert ring.push(ramp(6, 5)) == 0
+    assert (ring.available(), ring.free_space()) == (7, 1)
+    assert ring.pop(3).tolist() == [4, 5, 6]
+    assert ring.pop(100).tolist() == [7, 8, 9, 10]  # Đọc qua chỗ nối
+    assert ring.pop(1).size == 0
+
+    # Nhiều vòng liên tiếp với chunk không chia hết capacity
+    expected = []
+    for start in range(11, 200, 3):
+        ring.push(ramp(start, 3))
+        expected += list(range(start, start + 3))
+        if ring.available() > 4:
+            assert ring.pop(5).tolist() == expected[:5]
+            expected = expected[5:]
+    assert ring.pop(8).tolist() == expected
+
+
+def test_spsc_overrun_drops_newest_and_counts_them():
+    ring = SPSCRingBuffer(10)
+    assert ring.push(ramp(0, 6)) == 0
+    # Consumer chưa đọc: chỉ còn 4 chỗ, 3 sample mới nhất bị bỏ
+    assert ring.push(ramp(6, 7)) == 3
+    assert ring.free_space() == 0
+    assert ring.push(ramp(13, 4)) == 4
+    # Dữ liệu đã vào bộ đệm còn nguyên (không bị ghi đè)
+    assert ring.pop(10).tolist() == list(range(10))
+
+    ring.push(ramp(20, 5))
+    ring.clear()
+    assert ring.available() == 0 and ring.free_space() == 10
+    assert ring.push(ramp(30, 12)) == 2
+
+
+def test_spsc_slow_consumer_on_another_thread():
+    ring = SPSCRingBuffer(256)
+    chunk, chunks = 64, 400  # Tổng 25600 sample: giá trị int16 không tràn
+    dropped = [0]
+    popped = []
+    done = threading.Event()
+    consumer_turn = threading.Semaphore(0)
+
+    def producer():
+        for index in range(chunks):
+            dropped[0] += ring.push(ramp(index * chunk, chunk))
+            if index % 4 == 0:
+                consumer_turn.release()  # Consumer chỉ đọc 1 lần mỗi 4 chunk
+        done.set()
+        consumer_turn.release()
+
+    def consumer():
+        while True:
+            consumer_turn.acquire()
+            popped.append(ring.pop(chunk))
+            if done.is_set():
+                popped.append(ring.pop(ring.capacity))
+                return
+
+    threads = [threading.Thread(target=producer), threading.Thread(target=consumer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    data = np.concatenate(popped)
+    assert dropped[0] > 0
+    assert len(data) + dropped[0] == chunks * chunk
+    # Sample đọc được tăng dần: đúng thứ tự ghi, chỉ có khoảng trống ở chỗ bị
+    # bỏ (không lặp, không lẫn dữ liệu cũ / ghi dở)
+    assert np.all(np.diff(data.astype(np.int32)) > 0)
+    assert data[0] == 0
+
+
+def test_preroll_reader_starts_history_before_write_position():
+    ring = PrerollRing(10, guard=2)
+    assert ring.reader(5).pop(100).size == 0  # Chưa ghi gì: không có pre-roll
+
+    ring.push(ramp(0, 7))
+    assert ring.reader(4).pop(100).tolist() == [3, 4, 5, 6]
+    assert ring.reader(50).pop(100).tolist() == list(range(7))  # Giới hạn bởi số đã ghi
+
+    # Quay vòng nhiều lần: pre-roll tối đa capacity (không tính guard)
+    ring.push(ramp(7, 30))
+    reader = ring.reader(50)
+    assert reader.start_index == ring.write_index - 10
+    assert reader.pop(4).tolist() == [27, 28, 29, 30]
+    ring.push(ramp(37, 3))
+    assert reader.available() == 9
+    assert reader.pop(100).tolist() == list(range(31, 40))
+    assert reader.dropped == 0
+
+
+def test_push_longer_than_capacity_keeps_the_newest_samples():
+    ring = PrerollRing(6, guard=2)
+    ring.push(ramp(0, 3))
+    ring.push(ramp(3, 20))
+    assert ring.write_index == 23
+    assert ring.reader(6).pop(100).tolist() == list(range(17, 23))
+
+
+def test_lapped_reader_skips_overwritten_samples_and_counts_them():
+    ring = PrerollRing(10, guard=2)
+    ring.push(ramp(0, 4))
+    reader = ring.reader(4)
+    assert reader.pop(2).tolist() == [0, 1]
+
+    # Producer ghi thêm 25 sample (quá capacity) trước khi reader đọc tiếp
+    for start in range(4, 29, 5):
+        ring.push(ramp(start, 5))
+    assert reader.available() == 27
+    data = reader.pop(100)
+    # Chỉ còn capacity - guard sample cũ nhất an toàn; phần trước bị bỏ
+    assert data.tolist() == list(range(19, 29))
+    assert reader.dropped == 17
+    assert reader.available() == 0
+
+    # Đọc tiếp liền mạch sau khi bị vượt
+    ring.push(ramp(29, 3))
+    assert reader.pop(100).tolist() == [29, 30, 31]
+    assert reader.dropped == 17
+
+
+def test_readers_are_independent():
+    ring = PrerollRing(16, guard=4)
+    ring.push(ramp(0, 8))
+    first, second = ring.reader(8), ring.reader(2)
+    assert first.pop(3).tolist() == [0, 1, 2]
+    assert second.pop(100).tolist() == [6, 7]
+    ring.push(ramp(8, 2))
+    assert first.pop(100).tolist() == list(range(3, 10))
+    assert second.pop(100).tolist() == [8, 9]
+
+
+def test_preroll_reader_lapped_by_writer_thread():
+    ring = PrerollRing(256, guard=64)
+    chunk, chunks = 64, 400
+    reader = ring.reader(0)
+    popped = []
+    done = threading.Event()
+    reader_turn = threading.Semaphore(0)
+
+    def producer():
+        for index in range(chunks):
+            ring.push(ramp(index * chunk, chunk))
+            if index % 6 == 0:
+                reader_turn.release()  # Reader chậm: bị vượt thường xuyên
+        done.set()
+        reader_turn.release()
+
+    def consumer():
+        while True:
+            reader_turn.acquire()
+            popped.append(reader.pop(chunk))
+            if done.is_set():
+                popped.append(reader.pop(ring.capacity))
+                return
+
+    threads = [threading.Thread(target=producer), threading.Thread(target=consumer)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    data = np.concatenate(popped)
+    assert reader.dropped > 0
+    assert len(data) + reader.dropped == chunks * chunk
+    assert np.all(np.diff(data.astype(np.int32)) > 0)
+    assert data[-1] == chunks * chunk - 1
@@ -0,0 +1,155 @@
+"""
+SegmentedTranscription với VAD thật trên giọng nói giả lập: vị trí cắt (giữa
+khoảng dừng, độ dài tối thiểu, đúng ranh giới frame khi nhiều kênh), đổi trục
+đoạn nói, ghép kết quả đúng thứ tự khi các đoạn xong không theo thứ tự
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.audio.vad import VoiceActivityDetector
+from src.core.segmented import SegmentedTranscription, shift_segments
+
+SR = 16000
+
+
+def voiced(seconds: float, f0: float = 140.0) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+    return (3000 * x / np.abs(x).max()).astype(np.int16)
+
+
+def silence(seconds: float, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, 20, int(seconds * SR)).astype(np.int16)
+
+
+def interleave(audio: np.ndarray, channels: int) -> np.ndarray:
+    return np.stack([audio] * channels, axis=1).reshape(-1)
+
+
+def feed(vad: VoiceActivityDetector, audio: np.ndarray) -> VoiceActivityDetector:
+    for start in range(0, len(audio), 1024 * vad.channels):
+        vad.process(audio[start:start + 1024 * vad.channels])
+    return vad
+
+
+def splitter(channels: int = 1, **kwargs) -> SegmentedTranscription:
+    kwargs.setdefault('min_segment_seconds', 0.5)
+    kwargs.setdefault('min_pause_seconds', 0.4)
+    return SegmentedTranscription(None, None, SR, channels, **kwargs)
+
+
+def test_cut_lands_in_the_middle_of_the_pause():
+    vad = feed(VoiceActivityDetector(SR), np.concatenate([silence(0.2), voiced(1.0)]))
+    segmented = splitter()
+    assert vad.in_speech
+    assert segmented.plan_cut(vad) is None  # Đang nói: không cắt
+
+    feed(vad, silence(0.3, 1))
+    assert segmented.plan_cut(vad) is None  # Dừng chưa đủ min_pause
+
+    feed(vad, silence(0.7, 2))
+    cut = segmented.plan_cut(vad)
+    speech_end = vad.segments(include_open=False)[-1][1]
+    assert speech_end < cut < vad.processed_samples
+    middle = vad.processed_samples - int(vad.trailing_silence * SR / 2)
+    assert cut == middle
+
+
+def test_minimum_segment_length_counts_from_the_last_cut():
+    take = np.concatenate([silence(0.2), voiced(1.0), silence(0.6, 1)])
+    vad = feed(VoiceActivityDetector(SR), take)
+    assert splitter(min_segment_seconds=6.0).plan_cut(vad) is None
+
+    segmented = splitter(min_segment_seconds=1.0)
+    segmented.executor = ThreadPoolExecutor(1)
+    segmented.transcribe = lambda audio, segments: ''
+    cut = segmented.plan_cut(vad)
+    assert cut is not None
+    segmented.submit(take[:cut], cut, vad.segments(include_open=False))
+    assert segmented.cut_sample == cut
+
+    # Câu tiếp theo ngắn hơn min_segment kể từ chỗ cắt: chưa cắt
+    feed(vad, np.concatenate([voiced(0.3), silence(0.6, 2)]))
+    assert segmented.plan_cut(vad) is None
+    # Đủ dài: cắt tiếp, sau chỗ cắt trước
+    feed(vad, np.concatenate([voiced(0.6), silence(0.6, 3)]))
+    assert segmented.plan_cut(vad) > cut
+    segmented.executor.shutdown()
+
+
+def test_no_cut_without_new_speech():
+    vad = feed(VoiceActivityDetector(SR), silence(3.0))
+    assert not vad.in_speech and vad.trailing_silence > 0.4
+    assert splitter().plan_cut(vad) is None
+
+
+@pytest.mark.parametrize('channels', [2, 3])
+def test_multichannel_cut_is_frame_aligned(channels):
+    mono = np.concatenate([silence(0.2), voiced(1.0), silence(1.0, 1)])
+    mono_cut = splitter().plan_cut(feed(VoiceActivityDetector(SR), mono))
+    cut = splitter(channels).plan_cut(feed(VoiceActivityDetector(SR, channels=channels),
+                                           interleave(mono, channels)))
+    assert cut % channels == 0
+    assert cut == channels * mono_cut
+
+
+def test_shift_segments_clips_and_rebases():
+    segments = [(100, 400), (900, 1500), (1800, 2600), (3000, 3500)]
+    assert shift_segments(segments, 1000, 2000) == [(0, 500), (800, 1000)]
+    assert shift_segments(segments, 0, 100) == []
+    assert shift_segments(segments, 2600, 3600) == [(400, 900)]
+
+
+def test_results_are_stitched_in_submission_order():
+    # Đoạn đầu chậm nhất, đoạn cuối nhanh nhất: xong theo thứ tự ngược
+    delays = {0: 0.3, 1: 0.15, 2: 0.0}
+    finished = []
+    lock = threading.Lock()
+
+    def transcribe(audio, segments):
+        time.sleep(delays[int(audio[0])])
+        with lock:
+            finished.append(int(audio[0]))
+        return f"đoạn {int(audio[0])} {segments}"
+
+    executor = ThreadPoolExecutor(3)
+    segmented = SegmentedTranscription(executor, transcribe, SR)
+    segments = [(100, 900), (1200, 2500)]
+    for index, end in enumerate((1000, 2000, 3000)):
+        segmented.submit(np.full(10, index, dtype=np.int16), end, segments)
+    try:
+        texts = segmented.results(timeout=5)
+    finally:
+        executor.shutdown()
+
+    assert finished == [2, 1, 0]
+    assert texts == ["đoạn 0 [(100, 900)]", "đoạn 1 [(200, 1000)]", "đoạn 2 [(0, 500)]"]
+    assert segmented.bounds == [(0, 1000), (1000, 2000), (2000, 3000)]
+
+
+def test_results_raise_on_failed_or_unfinished_segment():
+    release = threading.Event()
+    executor = ThreadPoolExecutor(2)
+
+    def transcribe(audio, segments):
+        if audio[0] == 0:
+            raise RuntimeError("429")
+        release.wait(5)
+        return "ok"
+
+    segmented = SegmentedTranscription(executor, transcribe, SR)
+    segmented.submit(np.zeros(4, dtype=np.int16), 100, [])
+    segmented.submit(np.ones(4, dtype=np.int16), 200, [])
+    try:
+        with pytest.raises(TimeoutError):
+            segmented.results(timeout=0.1)
+        release.set()
+        with pytest.raises(RuntimeError):
+            segmented.results(timeout=5)
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,132 @@
+"""
+SpeculativeTranscription với executor và VAD giả: trúng khi thả phím không nói
+thêm, trật khi nói tiếp, đoán lại sau lần trật, quota tốn thêm (future bị hủy
+trước khi chạy = 0s, đã chạy = cả đoạn đã gửi)
+"""
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from src.core.segmented import shift_segments
+from src.core.speculative import SpeculationStats, SpeculativeTranscription
+
+SR = 16000
+
+
+class FakeVAD:
+    """Chỉ các thuộc tính SpeculativeTranscription đọc"""
+
+    def __init__(self, segments, trailing_silence=1.0, in_speech=False):
+        self.closed = list(segments)
+        self.trailing_silence = trailing_silence
+        self.in_speech = in_speech
+
+    def segments(self, include_open=True):
+        return list(self.closed)
+
+
+class FakeExecutor:
+    """submit() trả Future chưa chạy; start() đánh dấu đã gửi request"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    @staticmethod
+    def start(future):
+        assert future.set_running_or_notify_cancel()
+
+
+def speculation(**kwargs):
+    executor = FakeExecutor()
+    stats = SpeculationStats()
+    return SpeculativeTranscription(executor, lambda audio, segments: "", stats, SR, **kwargs), executor, stats
+
+
+def speculate(spec, vad, start, end):
+    """Như VoiceToTextApp._maybe_speculate: gửi [start, end) nếu nên đoán"""
+    if not spec.should_start(vad, start):
+        return False
+    spec.submit(np.zeros(end - start, dtype=np.int16), start, end,
+                shift_segments(vad.segments(include_open=False), start, end))
+    return True
+
+
+def test_hit_when_nothing_is_said_after_the_pause():
+    spec, executor, stats = speculation()
+    vad = FakeVAD([(1600, 24000)], trailing_silence=0.8)
+    assert speculate(spec, vad, 0, 40000)
+    assert spec.seconds == pytest.approx(2.5)
+    assert not spec.should_start(vad, 0)  # Không có tiếng nói mới: không đoán lại
+
+    future = spec.take([(1600, 24000)], 0)
+    assert future is executor.futures[0]
+    assert spec.future is None
+    assert stats.to_dict() == {'speculations': 1, 'hits': 1, 'misses': 0, 'hit_rate': 1.0, 'wasted_seconds': 0.0}
+
+
+def test_no_speculation_while_speaking_or_pause_too_short():
+    spec, executor, _ = speculation(min_pause_seconds=0.7)
+    assert not speculate(spec, FakeVAD([(1600, 24000)], trailing_silence=0.5), 0, 32000)
+    assert not speculate(spec, FakeVAD([(1600, 24000)], in_speech=True), 0, 32000)
+    assert not speculate(spec, FakeVAD([(1600, 24000)]), 24000, 40000)  # Tiếng nói trước điểm cắt
+    assert not speculate(spec, None, 0, 32000)
+    assert executor.futures == []
+
+
+def test_miss_when_speech_resumes_then_respeculation_hits():
+    spec, executor, stats = speculation()
+    vad = FakeVAD([(1600, 24000)])
+    assert speculate(spec, vad, 0, 40000)
+    first = executor.futures[0]
+
+    # Nói tiếp rồi lại dừng: đoạn nói mới -> đoán lại, lần đoán cũ bị bỏ
+    vad.closed.append((48000, 64000))
+    assert speculate(spec, vad, 0, 80000)
+    assert first.cancelled()
+    assert spec.future is executor.futures[1]
+    assert spec.seconds == pytest.approx(5.0)
+
+    assert spec.take([(1600, 24000), (48000, 64000)], 0) is executor.futures[1]
+    assert stats.to_dict() == {'speculations': 2, 'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'wasted_seconds': 0.0}
+
+
+def test_take_misses_when_speech_follows_or_cut_moved():
+    spec, executor, stats = speculation()
+    assert speculate(spec, FakeVAD([(1600, 24000)]), 0, 40000)
+    # Thả phím sau khi nói thêm (chưa kịp dừng đủ lâu để đoán lại)
+    assert spec.take([(1600, 24000), (44000, 52000)], 0) is None
+    assert executor.futures[0].cancelled()
+
+    assert speculate(spec, FakeVAD([(1600, 24000)]), 0, 40000)
+    # SegmentedTranscription đã cắt sau lần đoán: điểm bắt đầu khác
+    assert spec.take([(1600, 24000)], 32000) is None
+    assert spec.take([(1600, 24000)], 0) is None  # Đã bỏ: không còn gì để lấy
+    assert stats.to_dict()['misses'] == 2
+
+
+def test_wasted_seconds_count_only_requests_already_sent():
+    spec, executor, stats = speculation(channels=2)
+    vad = FakeVAD([(3200, 48000)])
+
+    # Chưa chạy: hủy được, không tốn quota
+    assert speculate(spec, vad, 0, 64000)
+    assert spec.seconds == pytest.approx(2.0)
+    spec.discard()
+    assert executor.futures[0].cancelled()
+    assert stats.wasted_seconds == 0.0
+
+    # Đã gửi request: không hủy được, tính cả đoạn đã gửi
+    assert speculate(spec, vad, 0, 64000)
+    executor.start(executor.futures[1])
+    assert spec.take([(3200, 48000), (70000, 90000)], 0) is None
+    assert not executor.futures[1].cancelled()
+    assert stats.wasted_seconds == pytest.approx(2.0)
+
+    spec.discard()  # Không còn lần đoán nào: không đổi thống kê
+    assert stats.to_dict() == {'speculations': 2, 'hits': 0, 'misses': 2, 'hit_rate': 0.0, 'wasted_seconds': 2.0}
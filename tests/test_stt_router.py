@@ -0,0 +1,102 @@
+"""
+STTRouter với 2 endpoint cục bộ: chuyển endpoint khi lỗi, dồn traffic sang
+endpoint khỏe, endpoint treo không ăn hết deadline, hồi phục sau half-life
+"""
+import time
+
+from src.services import GroqSTTService, STTRouter
+from stubs import ok
+
+
+def make_service(server, key, **kwargs):
+    options = dict(api_key_env='VTT_TEST_UNSET_KEY', api_keys=[key], timeout=10, max_network_retries=0)
+    options.update(kwargs)
+    return GroqSTTService(server.url, **options)
+
+
+def fail(key):
+    return 500, {}, {'error': 'down'}
+
+
+def test_failover_and_traffic_moves_to_healthy_endpoint(stub_server):
+    broken = stub_server(fail)
+    healthy = stub_server(lambda key: ok("healthy"))
+    router = STTRouter([('broken', make_service(broken, 'ka')), ('healthy', make_service(healthy, 'kb'))])
+    try:
+        # Lần đầu cả 2 chưa có số liệu: thử 'broken' trước rồi chuyển sang 'healthy'
+        assert router.transcribe_audio(b'\0' * 64) == "healthy"
+        assert broken.count() == 1 and healthy.count() == 1
+
+        # Endpoint chỉ toàn lỗi phải xếp sau endpoint khỏe, không được 0.0
+        stats = {entry['endpoint']: entry for entry in router.get_endpoint_stats()}
+        assert stats['broken']['score'] > stats['healthy']['score'] > 0
+
+        for _ in range(5):
+            assert router.transcribe_audio(b'\0' * 64) == "healthy"
+        assert broken.count() == 1
+        assert healthy.count() == 6
+    finally:
+        router.close()
+
+
+def test_hanging_endpoint_does_not_consume_whole_deadline(stub_server):
+    def hang(key):
+        time.sleep(5)
+        return ok("late")
+
+    hanging = stub_server(hang)
+    healthy = stub_server(lambda key: ok("healthy"))
+    router = STTRouter([('hanging', make_service(hanging, 'ka')), ('healthy', make_service(healthy, 'kb'))])
+    try:
+        started = time.monotonic()
+        text = router.transcribe_audio(b'\0' * 64, deadline=started + 2.0)
+        assert text == "healthy"
+        assert time.monotonic() - started < 2.0
+        assert hanging.count() == 1
+
+        # Các lần sau đi thẳng tới endpoint khỏe
+        for _ in range(3):
+            assert router.transcribe_audio(b'\0' * 64, deadline=time.monotonic() + 2.0) == "healthy"
+        assert hanging.count() == 1
+    finally:
+        router.close()
+
+
+def test_failing_endpoint_recovers_after_half_life(stub_server):
+    state = {'down': False}
+
+    def primary(key):
+        if state['down']:
+            return fail(key)
+        time.sleep(0.01)
+        return ok("primary")
+
+    def secondary(key):
+        time.sleep(0.05)
+        return ok("secondary")
+
+    fast = stub_server(primary)
+    slow = stub_server(secondary)
+    router = STTRouter([('fast', make_service(fast, 'ka')), ('slow', make_service(slow, 'kb'))],
+                       error_penalty=50.0, error_half_life=0.5)
+    try:
+        # Cả 2 endpoint đều có số liệu, endpoint nhanh được ưu tiên
+        router.transcribe_audio(b'\0' * 64)
+        router.transcribe_audio(b'\0' * 64)
+        assert router.transcribe_audio(b'\0' * 64) == "primary"
+
+        # Endpoint nhanh hỏng: chuyển endpoint, rồi traffic dồn sang endpoint chậm
+        state['down'] = True
+        assert router.transcribe_audio(b'\0' * 64) == "secondary"
+        failed_calls = fast.count()
+        for _ in range(3):
+            assert router.transcribe_audio(b'\0' * 64) == "secondary"
+        assert fast.count() == failed_calls
+
+        # Sau vài half-life lỗi đã giảm: endpoint nhanh (đã sửa) được dùng lại
+        state['down'] = False
+        time.sleep(2.5)
+        assert router.transcribe_audio(b'\0' * 64) == "primary"
+        assert router.transcribe_audio(b'\0' * 64) == "primary"
+    finally:
+        router.close()
@@ -0,0 +1,103 @@
+"""
+TranscriptionPool: giao kết quả đúng thứ tự ghi dù job sau xong trước,
+backpressure (từ chối sau submit_timeout khi đủ max_pending job chưa giao)
+"""
+import threading
+import time
+
+from src.core.transcription_pool import TranscriptionJob, TranscriptionPool
+
+
+class Recorder:
+    """deliver() ghi lại thứ tự giao; wait() chờ đủ số job"""
+
+    def __init__(self):
+        self.delivered = []
+        self.condition = threading.Condition()
+
+    def __call__(self, job, result):
+        with self.condition:
+            self.delivered.append((job.seq, result))
+            self.condition.notify_all()
+
+    def wait(self, count: int, timeout: float = 5.0) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: len(self.delivered) >= count, timeout)
+
+
+def test_later_job_finishing_first_is_delivered_in_recording_order():
+    delays = [0.3, 0.05, 0.15, 0.0]
+    finished = []
+    lock = threading.Lock()
+
+    def worker(job):
+        time.sleep(delays[job.seq])
+        with lock:
+            finished.append(job.seq)
+        return f"text {job.seq}"
+
+    recorder = Recorder()
+    pool = TranscriptionPool(worker, recorder, max_workers=4, max_pending=4)
+    try:
+        for _ in delays:
+            assert pool.submit(TranscriptionJob(audio=None))
+        assert recorder.wait(len(delays))
+    finally:
+        pool.shutdown(wait=True)
+
+    assert finished[0] != 0  # Job 0 chậm nhất nhưng vẫn được giao đầu tiên
+    assert recorder.delivered == [(seq, f"text {seq}") for seq in range(len(delays))]
+    assert pool.pending == 0
+    assert pool.get_stats()['delivered'] == len(delays)
+
+
+def test_full_queue_rejects_after_submit_timeout():
+    release = threading.Event()
+    recorder = Recorder()
+    pool = TranscriptionPool(lambda job: release.wait(5.0) and job.seq, recorder,
+                             max_workers=1, max_pending=2, submit_timeout=0.2)
+    try:
+        assert pool.submit(TranscriptionJob(audio=None))
+        assert pool.submit(TranscriptionJob(audio=None))  # Chờ worker duy nhất
+        assert pool.is_full
+
+        began = time.perf_counter()
+        assert not pool.submit(TranscriptionJob(audio=None))
+        assert time.perf_counter() - began >= 0.2
+        assert pool.get_stats()['rejected'] == 1
+        assert pool.pending == 2
+
+        release.set()
+        assert recorder.wait(2)
+        assert pool.pending == 0
+
+        # Có chỗ trống lại: nhận job ngay
+        assert pool.submit(TranscriptionJob(audio=None))
+        assert recorder.wait(3)
+    finally:
+        release.set()
+        pool.shutdown(wait=True)
+
+    assert [seq for seq, _ in recorder.delivered] == [0, 1, 2]
+    stats = pool.get_stats()
+    assert (stats['submitted'], stats['rejected'], stats['delivered']) == (3, 1, 3)
+
+
+def test_failed_job_does_not_block_later_jobs():
+    def worker(job):
+        if job.seq == 0:
+            time.sleep(0.05)
+            raise RuntimeError("boom")
+        return job.seq
+
+    recorder = Recorder()
+    pool = TranscriptionPool(worker, recorder, max_workers=2)
+    try:
+        for _ in range(3):
+            pool.submit(TranscriptionJob(audio=None))
+        assert recorder.wait(3)
+    finally:
+        pool.shutdown(wait=True)
+
+    assert recorder.delivered == [(0, None), (1, 1), (2, 2)]
+    assert pool.get_stats()['failed'] == 1
@@ -0,0 +1,69 @@
+"""
+compact_silence: rút khoảng lặng mono / stereo, cắt đúng ranh giới frame,
+SpeechTimeMap đổi timestamp về bản ghi gốc
+"""
+import numpy as np
+
+from src.audio.trim import compact_silence
+
+SR = 16000
+
+
+def ramp(seconds: float) -> np.ndarray:
+    """Audio int16 mỗi sample khác nhau để kiểm tra đúng vị trí sau khi cắt"""
+    return (np.arange(int(seconds * SR)) % 30000).astype(np.int16)
+
+
+def test_mono_trims_edges_and_shortens_long_pause():
+    audio = ramp(5.0)
+    segments = [(SR, 2 * SR), (4 * SR, int(4.5 * SR))]
+    out, time_map = compact_silence(audio, segments, SR, padding_ms=100, max_pause_ms=400)
+
+    # Nới padding: [0.9, 2.1] + [3.9, 4.6]; khoảng dừng 1.8s còn 0.4s (0.2s mỗi bên)
+    expected = np.concatenate([audio[int(0.9 * SR):int(2.3 * SR)], audio[int(3.7 * SR):int(4.6 * SR)]])
+    assert np.array_equal(out, expected)
+    assert time_map.to_dict() == {'original_seconds': 5.0, 'kept_seconds': 2.3,
+                                  'saved_seconds': 2.7, 'pieces': 2}
+    assert abs(time_map.to_original(0.0) - 0.9) < 1e-9
+    assert abs(time_map.to_original(1.5) - 3.8) < 1e-9
+
+
+def test_stereo_matches_mono_per_channel():
+    left = ramp(5.0)
+    right = -left
+    stereo = np.stack([left, right], axis=1).reshape(-1)
+    segments = [(SR, 2 * SR), (4 * SR, int(4.5 * SR))]
+
+    mono_out, mono_map = compact_silence(left, segments, SR, padding_ms=100, max_pause_ms=400)
+    # Đoạn nói của VAD trên trục sample xen kẽ
+    stereo_segments = [(2 * start, 2 * end) for start, end in segments]
+    out, time_map = compact_silence(stereo, stereo_segments, SR, padding_ms=100, max_pause_ms=400,
+                                    channels=2)
+
+    assert len(out) == 2 * len(mono_out)
+    frames = out.reshape(-1, 2)
+    assert np.array_equal(frames[:, 0], mono_out)
+    assert np.array_equal(frames[:, 1], -mono_out)
+    assert time_map.to_dict() == mono_map.to_dict()
+    for seconds in (0.0, 0.7, 1.5, 2.4):
+        assert time_map.to_original(seconds) == mono_map.to_original(seconds)
+
+
+def test_stereo_cuts_on_frame_boundaries_with_odd_segment_edges():
+    left = ramp(3.0)
+    stereo = np.stack([left, left + 1], axis=1).reshape(-1)
+    # Ranh giới lẻ (giữa 1 frame) - không được tách 2 kênh của cùng 1 frame
+    segments = [(2 * SR + 1, 3 * SR + 3), (2 * 2 * SR + 1, 2 * int(2.5 * SR) - 1)]
+    for single in (segments[:1], segments):
+        out, time_map = compact_silence(stereo, single, SR, padding_ms=50, max_pause_ms=200, channels=2)
+        assert len(out) % 2 == 0
+        frames = out.reshape(-1, 2)
+        assert np.array_equal(frames[:, 1], frames[:, 0] + 1)
+        assert len(frames) == time_map.kept_samples
+
+
+def test_no_segments_keeps_audio():
+    stereo = np.zeros(2 * SR, dtype=np.int16)
+    out, time_map = compact_silence(stereo, [], SR, channels=2)
+    assert out is stereo
+    assert time_map.to_dict()['original_seconds'] == 1.0
@@ -0,0 +1,71 @@
+"""
+VAD với audio nhiều kênh: downmix trước khi chia frame, vị trí trả về trên
+trục sample xen kẽ, thời gian (hangover, trailing_silence) không đổi theo số kênh
+"""
+import numpy as np
+
+from src.audio.vad import VoiceActivityDetector, detect_speech_segments
+
+SR = 16000
+
+
+def voiced(seconds: float, f0: float = 140.0) -> np.ndarray:
+    """Âm hữu thanh giả lập (f0 + họa âm)"""
+    t = np.arange(int(seconds * SR)) / SR
+    x = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 12))
+    return (3000 * x / np.abs(x).max()).astype(np.int16)
+
+
+def silence(seconds: float, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).normal(0, 20, int(seconds * SR)).astype(np.int16)
+
+
+def utterance() -> np.ndarray:
+    return np.concatenate([silence(0.5), voiced(1.0), silence(0.8, 1), voiced(0.7), silence(1.2, 2)])
+
+
+def interleave(*channels) -> np.ndarray:
+    return np.stack(channels, axis=1).reshape(-1)
+
+
+def run(audio: np.ndarray, channels: int, chunks: int = 1) -> VoiceActivityDetector:
+    vad = VoiceActivityDetector(SR, channels=channels)
+    for chunk in np.array_split(audio, chunks):
+        vad.process(chunk)
+    return vad
+
+
+def test_stereo_matches_mono_on_interleaved_axis():
+    mono = utterance()
+    reference = run(mono, 1)
+    mono_trailing = reference.trailing_silence
+    mono_segments = reference.finalize()
+    assert len(mono_segments) == 2
+
+    # Chunk lẻ (không chia hết cho số kênh / frame) như khi đọc từ ring
+    stereo = run(interleave(mono, mono), 2, chunks=37)
+    assert stereo.trailing_silence == mono_trailing
+    assert stereo.processed_samples == 2 * reference.processed_samples
+    assert stereo.finalize() == [(2 * start, 2 * end) for start, end in mono_segments]
+
+
+def test_speech_on_one_channel_is_detected():
+    mono = utterance()
+    segments = detect_speech_segments(interleave(mono, silence(len(mono) / SR, 3)), SR, channels=2)
+    expected = detect_speech_segments(mono, SR)
+    assert segments == [(2 * start, 2 * end) for start, end in expected]
+
+
+def test_hangover_and_pause_are_in_seconds_for_any_channel_count():
+    for channels in (1, 2, 4):
+        # Khoảng dừng 0.2s < hangover 300ms: vẫn trong đoạn nói
+        audio = np.concatenate([silence(0.2), voiced(0.6), silence(0.2, 1)])
+        vad = run(interleave(*[audio] * channels), channels)
+        assert vad.in_speech
+        assert abs(vad.trailing_silence - 0.2) <= 0.02
+
+        # Dừng thêm 0.3s: quá hangover, đoạn nói đóng
+        vad.process(interleave(*[silence(0.3, 2)] * channels))
+        assert not vad.in_speech
+        assert abs(vad.trailing_silence - 0.5) <= 0.02
+        assert vad.processed_samples == 65 * vad.frame_size * channels  # 1.3s / 20ms